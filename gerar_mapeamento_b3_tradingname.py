@@ -4,29 +4,30 @@ GERADOR DE MAPEAMENTO TICKER → TRADING NAME (API B3)
 Este script consulta a API B3 para cada ticker e gera um arquivo CSV
 com o tradingName correto para busca de dividendos.
 
-RODAR UMA VEZ para gerar o mapeamento, depois usar nos scripts de dividendos.
+As resoluções ficam no cache persistente cache_tradingname_b3.json (src/cliente_b3.py,
+compartilhado com os coletores de dividendos): só códigos ausentes ou vencidos (30 dias;
+"não encontrado": 7 dias) são consultados de novo. --forcar refaz todos.
 
 USO:
 python gerar_mapeamento_b3_tradingname.py
+python gerar_mapeamento_b3_tradingname.py --forcar
 
 SAÍDA:
-- mapeamento_tradingname_b3.csv (ticker;trading_name;issuing_company)
+- cache_tradingname_b3.json (código → trading_name, issuing_company, código CVM, validade)
+- mapeamento_tradingname_b3.csv (ticker;codigo;trading_name;issuing_company;codigo_cvm;status)
 """
 
-import requests
-import base64
-import json
-import pandas as pd
-import time
+import argparse
+import sys
 import warnings
 from pathlib import Path
 
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from cliente_b3 import CacheNomesB3, ClienteB3, codigo_negociacao
+
 warnings.filterwarnings('ignore')
-try:
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-except:
-    pass
 
 
 def extrair_ticker_principal(ticker_raw: str) -> str:
@@ -40,102 +41,23 @@ def extrair_ticker_principal(ticker_raw: str) -> str:
     return ticker.strip().upper()
 
 
-def extrair_codigo_negociacao(ticker: str) -> str:
-    """PETR4 → PETR, VALE3 → VALE, TAEE11 → TAEE"""
-    ticker_clean = extrair_ticker_principal(ticker)
-    return ''.join([c for c in ticker_clean if not c.isdigit()])
-
-
-def buscar_trading_name(ticker: str, max_retries: int = 3) -> dict:
-    """
-    Busca o tradingName correto na API B3.
-    
-    Returns:
-        dict com 'ticker', 'codigo', 'trading_name', 'issuing_company', 'status'
-    """
-    ticker_clean = extrair_ticker_principal(ticker)
-    codigo = extrair_codigo_negociacao(ticker)
-    
-    resultado = {
-        'ticker': ticker_clean,
-        'codigo': codigo,
-        'trading_name': '',
-        'issuing_company': '',
-        'status': 'erro'
+def linha_mapeamento(ticker: str, entrada: dict) -> dict:
+    """Linha do CSV de mapeamento a partir da entrada do cache."""
+    return {
+        'ticker': ticker,
+        'codigo': codigo_negociacao(ticker),
+        'trading_name': entrada.get('trading_name', ''),
+        'issuing_company': entrada.get('issuing_company', ''),
+        'codigo_cvm': entrada.get('codigo_cvm', ''),
+        'status': entrada.get('status', 'erro'),
     }
-    
-    if not codigo:
-        resultado['status'] = 'codigo_vazio'
-        return resultado
-    
-    for attempt in range(max_retries):
-        try:
-            params = {
-                "language": "pt-br",
-                "pageNumber": 1,
-                "pageSize": 100,
-                "company": codigo
-            }
-            
-            params_b64 = base64.b64encode(json.dumps(params).encode()).decode()
-            url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetInitialCompanies/{params_b64}"
-            
-            response = requests.get(url, timeout=15, verify=False)
-            
-            # Retry em caso de erro 5xx
-            if response.status_code >= 500:
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
-                    continue
-                resultado['status'] = f'erro_{response.status_code}'
-                return resultado
-            
-            response.raise_for_status()
-            data = response.json()
-            results = data.get('results', [])
-            
-            if not results:
-                resultado['status'] = 'nao_encontrado'
-                return resultado
-            
-            # Buscar empresa com issuingCompany == codigo
-            empresa_correta = None
-            for emp in results:
-                if emp.get('issuingCompany', '').upper() == codigo.upper():
-                    empresa_correta = emp
-                    break
-            
-            if empresa_correta:
-                trading_name = empresa_correta.get('tradingName', '')
-                # Limpar caracteres especiais
-                trading_name = trading_name.replace('/', '').replace('.', '')
-                
-                resultado['trading_name'] = trading_name
-                resultado['issuing_company'] = empresa_correta.get('issuingCompany', '')
-                resultado['status'] = 'ok'
-            else:
-                # Se não encontrou exato, marcar para revisão manual
-                resultado['status'] = 'nao_encontrado_exato'
-                # Guardar as opções disponíveis para debug
-                opcoes = [f"{e.get('issuingCompany')}:{e.get('tradingName')}" for e in results[:5]]
-                resultado['opcoes'] = '|'.join(opcoes)
-            
-            return resultado
-            
-        except requests.exceptions.Timeout:
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-                continue
-            resultado['status'] = 'timeout'
-            return resultado
-        except Exception as e:
-            resultado['status'] = f'erro:{type(e).__name__}'
-            return resultado
-    
-    return resultado
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Mapeamento ticker → trading name (API B3)")
+    parser.add_argument("--forcar", action="store_true", help="Consulta todos os códigos, ignorando a validade do cache")
+    args = parser.parse_args()
+    
     print("=" * 70)
     print("GERADOR DE MAPEAMENTO TICKER → TRADING NAME (API B3)")
     print("=" * 70)
@@ -160,26 +82,31 @@ def main():
     print(f"✓ Tickers únicos: {len(tickers_unicos)}")
     print()
     
-    # Buscar trading name para cada ticker
+    # Resolver só códigos ausentes/vencidos no cache (em paralelo, com limite de taxa)
+    nomes = CacheNomesB3(cliente=ClienteB3(timeout=15))
+    codigos = {codigo_negociacao(t) for t in tickers_unicos}
+    vencidos = sum(1 for c in codigos if c and (args.forcar or nomes.vencido(c)))
+    print(f"✓ Cache: {len(nomes)} códigos | a consultar: {vencidos} de {len(codigos)}")
+    print()
+    
+    resolvidos = nomes.atualizar(tickers_unicos, forcar=args.forcar)
+    
     resultados = []
     ok_count = 0
     erro_count = 0
     
     for i, ticker in enumerate(tickers_unicos, 1):
-        print(f"[{i:3}/{len(tickers_unicos)}] {ticker:10} ", end='', flush=True)
-        
-        resultado = buscar_trading_name(ticker)
+        entrada = resolvidos.get(codigo_negociacao(ticker)) or {'status': 'codigo_vazio'}
+        resultado = linha_mapeamento(ticker, entrada)
         resultados.append(resultado)
         
         if resultado['status'] == 'ok':
-            print(f"✓ {resultado['trading_name']}")
             ok_count += 1
         else:
-            print(f"✗ {resultado['status']}")
+            print(f"[{i:3}/{len(tickers_unicos)}] {ticker:10} ✗ {resultado['status']}")
             erro_count += 1
-        
-        # Pequena pausa para não sobrecarregar a API
-        time.sleep(0.3)
+    
+    nomes.salvar()
     
     # Criar DataFrame de saída
     df_output = pd.DataFrame(resultados)
@@ -195,6 +122,7 @@ def main():
     print(f"✅ Sucesso: {ok_count}")
     print(f"❌ Erro: {erro_count}")
     print(f"📁 Salvo: {arquivo_saida}")
+    print(f"🏷️  Cache: {nomes.resumo()}")
     
     # Mostrar erros para revisão
     erros = df_output[df_output['status'] != 'ok']
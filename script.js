@@ -2772,8 +2772,14 @@ async function loadAcaoData(ticker) {
         console.log(`📂 Usando pasta: balancos/${tickerPasta}/`);
         
         const timestamp = new Date().getTime();
-        const response = await fetch(`https://raw.githubusercontent.com/Antoniosiqueiracnpi-t/Projeto_Monalytics/main/balancos/${tickerPasta}/historico_precos_diarios.json?t=${timestamp}`);
-        
+        const baseUrl = `https://raw.githubusercontent.com/Antoniosiqueiracnpi-t/Projeto_Monalytics/main/balancos/${tickerPasta}`;
+        let response = await fetch(`${baseUrl}/historico_precos_diarios.json?t=${timestamp}`);
+
+        // Sem a cópia legada (ex.: ABEV3): usa o histórico por ticker (mesmo formato, mais recente)
+        if (!response.ok) {
+            response = await fetch(`${baseUrl}/historico_precos_${tickerPasta}.json?t=${timestamp}`);
+        }
+
         if (!response.ok) {
             throw new Error(`Dados não encontrados para ${ticker}`);
         }
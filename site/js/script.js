@@ -347,6 +347,10 @@ const DATA_PATHS = {
 
 const NOTICIAS_MERCADO_PATH = 'balancos/NOTICIAS/noticias_mercado.json';
 const DIVIDENDOS_PATH = 'agenda_dividendos_acoes_investidor10.json';
+// Índice enxuto (só a partir do mês corrente, ordenado por data COM) gerado por src/calendario_dividendos.py
+const CALENDARIO_PROVENTOS_PATH = 'calendario_proventos.json';
+// Ranking compacto (ticker -> DY, DY médio 5a, payout, próxima data COM) gerado por src/calcular_multiplos.py
+const RANKING_DY_PATH = 'balancos/MULTIPLOS/ranking_dy.json';
 const MAPEAMENTO_B3_PATH = 'mapeamento_b3_consolidado.csv';
 const IBOV_PATH = 'balancos/IBOV/historico_precos_IBOV.json';
 
@@ -916,6 +920,8 @@ const DATA_CONFIG = {
     
     PATHS: {
         bolsa: '/balancos/IBOV/monitor_diario.json',
+        monitorIntraday: '/balancos/IBOV/monitor_intraday.json',
+        monitorDelta: '/balancos/IBOV/monitor_delta.json',
         indicadores: '/balancos/INDICADORES/indicadores_economicos.json',
         noticias: '/balancos/feed_noticias.json'
     },
@@ -923,6 +929,8 @@ const DATA_CONFIG = {
     // Estrutura esperada para validação
     EXPECTED_STRUCTURE: {
         bolsa: ['ultima_atualizacao', 'total_acoes', 'estatisticas', 'top_5_altas', 'top_5_baixas'],
+        monitorIntraday: ['data', 'tickers', 'snapshots'],
+        monitorDelta: ['data', 'seq', 'amplitude', 'mudancas'],
         indicadores: ['ultima_atualizacao', 'indicadores'],
         noticias: ['meta', 'feed']
     }
@@ -1303,6 +1311,7 @@ async function loadBolsaData() {
     }
     
     renderBolsaData(data);
+    iniciarMonitorIntraday();
 }
 
 /**
@@ -1390,6 +1399,106 @@ function initTabs() {
     });
 }
 
+// ---------------------- FOTOGRAFIAS INTRADAY (anel do dia + delta) ----------------------
+// monitor_ibov.py --snapshots publica monitor_intraday.json (todas as fotografias do dia) e
+// monitor_delta.json (só o que mudou na última). O anel é baixado uma vez; depois só o delta.
+
+const MONITOR_POLLING_MS = 5 * 60 * 1000; // monitor publica a cada 30 min
+let monitorIntraday = null;
+let monitorPollingTimer = null;
+
+/**
+ * Aplica o delta à última fotografia do anel em memória.
+ * Retorna false se o delta não for a continuação imediata (outro dia ou fotografia perdida).
+ */
+function aplicarDeltaMonitor(intraday, delta) {
+    if (!intraday || !delta || intraday.data !== delta.data) return false;
+
+    const snaps = intraday.snapshots || [];
+    const ultimo = snaps[snaps.length - 1];
+    if (!ultimo) return false;
+    if (delta.seq === ultimo.seq) return true;  // já aplicado
+    if (delta.seq !== ultimo.seq + 1) return false;
+
+    const novo = {
+        seq: delta.seq,
+        hora: delta.hora,
+        preco: ultimo.preco.slice(),
+        variacao: ultimo.variacao.slice(),
+        volume: ultimo.volume.slice(),
+        amplitude: delta.amplitude
+    };
+
+    const posicao = new Map(intraday.tickers.map((t, i) => [t, i]));
+    const mud = delta.mudancas;
+    mud.tickers.forEach((ticker, k) => {
+        let i = posicao.get(ticker);
+        if (i === undefined) {
+            i = intraday.tickers.push(ticker) - 1;
+            posicao.set(ticker, i);
+        }
+        novo.preco[i] = mud.preco[k];
+        novo.variacao[i] = mud.variacao[k];
+        novo.volume[i] = mud.volume[k];
+    });
+
+    snaps.push(novo);
+    return true;
+}
+
+/**
+ * Série de amplitude do pregão (avanço/declínio por fotografia), pronta para gráfico.
+ */
+function serieAmplitudeIntraday(intraday = monitorIntraday) {
+    return (intraday?.snapshots || []).map(snap => ({
+        hora: snap.hora,
+        alta: snap.amplitude.alta,
+        baixa: snap.amplitude.baixa,
+        estaveis: snap.amplitude.estaveis,
+        saldo: snap.amplitude.alta - snap.amplitude.baixa
+    }));
+}
+
+/**
+ * Atualiza os contadores do card da bolsa com o delta mais recente.
+ */
+function atualizarResumoBolsa(delta) {
+    const variacaoEl = document.getElementById('variacaoMedia');
+    if (!variacaoEl) return;
+
+    variacaoEl.textContent = formatPercentage(delta.variacao_media);
+    variacaoEl.classList.toggle('positive', delta.variacao_media > 0);
+    variacaoEl.classList.toggle('negative', delta.variacao_media < 0);
+    document.getElementById('acoesAlta').textContent = delta.amplitude.alta || 0;
+    document.getElementById('acoesBaixa').textContent = delta.amplitude.baixa || 0;
+
+    if (delta.ultima_atualizacao) {
+        document.getElementById('bolsaTimestamp').textContent = formatTimestamp(new Date(delta.ultima_atualizacao));
+    }
+}
+
+/**
+ * Consulta o delta; se não encaixar no anel em memória, recarrega o anel inteiro.
+ */
+async function atualizarMonitorIntraday() {
+    const delta = await fetchJSON('monitorDelta');
+    if (!delta) return monitorIntraday;
+
+    if (!aplicarDeltaMonitor(monitorIntraday, delta)) {
+        dataCache.cache.delete('monitorIntraday');
+        monitorIntraday = await fetchJSON('monitorIntraday');
+    }
+
+    atualizarResumoBolsa(delta);
+    return monitorIntraday;
+}
+
+function iniciarMonitorIntraday() {
+    if (monitorPollingTimer) return;
+    atualizarMonitorIntraday();
+    monitorPollingTimer = setInterval(atualizarMonitorIntraday, MONITOR_POLLING_MS);
+}
+
 // =========================== SLIDE 2: INDICADORES ECONÔMICOS ===========================
 
 /**
@@ -1811,6 +1920,17 @@ function obterTickerPasta(ticker) {
  */
 async function loadDividendosData() {
     try {
+        // Preferência: calendário indexado; sem ele, a agenda completa
+        const calendario = await fetch(`${DATA_CONFIG.GITHUB_RAW}/${DATA_CONFIG.BRANCH}/${CALENDARIO_PROVENTOS_PATH}?t=${Date.now()}`)
+            .then(r => (r.ok ? r.json() : null))
+            .catch(() => null);
+
+        if (calendario && Array.isArray(calendario.eventos)) {
+            allDividendos = calendario.eventos;
+            renderDividendos(currentPeriodDays);
+            return;
+        }
+
         const response = await fetch(`${DATA_CONFIG.GITHUB_RAW}/${DATA_CONFIG.BRANCH}/${DIVIDENDOS_PATH}?t=${Date.now()}`);
 
         if (!response.ok) {
@@ -2391,12 +2511,79 @@ async function loadMapeamentoB3() {
     }
 }
 
+/**
+ * Reconstrói o array "dados" (um objeto por pregão) a partir do formato colunar
+ * compacto (historico_precos_<TICKER>.min.json), gerado por capturar_historico_precos.py.
+ * Datas e preços vêm em deltas inteiros; a soma acumulada / escala devolve os valores originais.
+ */
+function decodificarHistoricoColunar(json) {
+    const col = json.colunas;
+    const escala = json.escala || 100;
+    const base = new Date(json.base + 'T00:00:00Z').getTime();
+    const n = col.dias.length;
+
+    const acumular = (arr) => {
+        const out = new Array(n);
+        let total = 0;
+        for (let i = 0; i < n; i++) {
+            if (arr[i] === null) { out[i] = null; continue; }
+            total += arr[i];
+            out[i] = total;
+        }
+        return out;
+    };
+
+    const fech = acumular(col.fechamento);
+    const mm20 = acumular(col.mm20);
+    const mm50 = acumular(col.mm50);
+    const mm200 = acumular(col.mm200);
+    const relativo = (v, i) => (v === null || fech[i] === null) ? null : (fech[i] + v) / escala;
+    const preco = (v) => v === null ? null : v / escala;
+
+    const dados = new Array(n);
+    let dia = 0;
+    for (let i = 0; i < n; i++) {
+        dia += col.dias[i];
+        dados[i] = {
+            data: new Date(base + dia * 86400000).toISOString().slice(0, 10),
+            abertura: relativo(col.abertura[i], i),
+            maxima: relativo(col.maxima[i], i),
+            minima: relativo(col.minima[i], i),
+            fechamento: preco(fech[i]),
+            volume: col.volume[i],
+            mm20: preco(mm20[i]),
+            mm50: preco(mm50[i]),
+            mm200: preco(mm200[i])
+        };
+    }
+
+    const { colunas, base: _base, escala: _escala, ...resto } = json;
+    return { ...resto, dados };
+}
+
+/**
+ * Carrega um histórico de preços preferindo a versão colunar (.min.json);
+ * se ela ainda não existir, usa o JSON legível (.json). Retorna null se nenhum existir.
+ */
+async function carregarHistoricoPrecos(caminho) {
+    const urlBase = `https://raw.githubusercontent.com/Antoniosiqueiracnpi-t/Projeto_Monalytics/main/${caminho}`;
+    const ts = Date.now();
+
+    try {
+        const respMin = await fetch(`${urlBase.replace(/\.json$/, '.min.json')}?t=${ts}`);
+        if (respMin.ok) return decodificarHistoricoColunar(await respMin.json());
+    } catch (e) {
+        console.warn('⚠️ Histórico colunar indisponível, usando JSON completo:', caminho);
+    }
+
+    const resp = await fetch(`${urlBase}?t=${ts}`);
+    return resp.ok ? await resp.json() : null;
+}
+
 // Carrega dados do Ibovespa
 async function loadIbovData() {
     try {
-        const timestamp = new Date().getTime();
-        const response = await fetch(`https://raw.githubusercontent.com/Antoniosiqueiracnpi-t/Projeto_Monalytics/main/${IBOV_PATH}?t=${timestamp}`);
-        ibovData = await response.json();
+        ibovData = await carregarHistoricoPrecos(IBOV_PATH);
         console.log('IBOV carregado:', ibovData.dados.length, 'registros');
     } catch (error) {
         console.error('Erro ao carregar IBOV:', error);
@@ -2765,19 +2952,16 @@ async function loadAcaoData(ticker) {
         // ----------------------------------------------------------
         //  AJUSTE PEDIDO: HISTÓRICO DE PREÇOS INDIVIDUAL POR TICKER
         // ----------------------------------------------------------
-        const historicoUrl =
-            `https://raw.githubusercontent.com/Antoniosiqueiracnpi-t/Projeto_Monalytics/main/balancos/${tickerPasta}/historico_precos_${t}.json?t=${ts}`;
+        const historicoPath = `balancos/${tickerPasta}/historico_precos_${t}.json`;
 
-        console.log("📈 Carregando histórico:", historicoUrl);
+        console.log("📈 Carregando histórico:", historicoPath);
 
-        const respHistorico = await fetch(historicoUrl);
+        acaoAtualData = await carregarHistoricoPrecos(historicoPath);
 
-        if (!respHistorico.ok) {
+        if (!acaoAtualData) {
             throw new Error(`Histórico de preços não encontrado para ${t}`);
         }
 
-        acaoAtualData = await respHistorico.json();
-
         console.log("✅ Histórico carregado:", acaoAtualData?.dados?.length, "registros");
 
 
@@ -2886,6 +3070,26 @@ console.log('✅ Hooks de carregamento inicializados na ordem correta');
 
 let multiplosData = null;
 let multiplosChart = null;
+let multiplosMetadataPromise = null;
+
+/**
+ * Carrega (uma única vez) os metadados compartilhados dos múltiplos
+ * (balancos/MULTIPLOS/multiplos_metadata.js), referenciados por "metadata_ref"
+ * em cada multiplos_<TICKER>.js
+ */
+function carregarMetadataMultiplos() {
+    if (!multiplosMetadataPromise) {
+        const url = `https://raw.githubusercontent.com/Antoniosiqueiracnpi-t/Projeto_Monalytics/main/balancos/MULTIPLOS/multiplos_metadata.js`;
+        multiplosMetadataPromise = fetch(url)
+            .then(response => response.ok ? response.text() : '')
+            .then(jsCode => { if (jsCode) eval(jsCode); })
+            .catch(error => {
+                console.warn('⚠️ Metadados de múltiplos indisponíveis:', error);
+                multiplosMetadataPromise = null;
+            });
+    }
+    return multiplosMetadataPromise;
+}
 
 /**
  * Carrega dados de múltiplos da empresa
@@ -2921,6 +3125,7 @@ async function loadMultiplosData(ticker) {
         }
 
         const jsCode = await response.text();
+        await carregarMetadataMultiplos();
         
         // ✅ SEGURANÇA: Limpa cache anterior
         if (window.MONALYTICS && window.MONALYTICS.multiplos) {
@@ -3570,13 +3775,51 @@ let dividendosChart = null;
 let currentDividendosView = 'dy'; // 'dy' ou 'pagos'
 let currentDividendosPeriod = 5; // 5 ou 10 anos
 
+let rankingDYPromise = null;
+
+/**
+ * Ranking de DY do universo (um único fetch por sessão); null se indisponível
+ */
+function carregarRankingDY() {
+    if (!rankingDYPromise) {
+        rankingDYPromise = fetch(`${DATA_CONFIG.GITHUB_RAW}/${DATA_CONFIG.BRANCH}/${RANKING_DY_PATH}?t=${Date.now()}`)
+            .then(r => (r.ok ? r.json() : null))
+            .catch(() => null);
+    }
+    return rankingDYPromise;
+}
+
+/**
+ * Linha do ranking de DY para o ticker como objeto {dy, dy_medio_5a, payout, proxima_data_com, empresa}
+ */
+async function obterRankingDYTicker(tickerNorm) {
+    const ranking = await carregarRankingDY();
+    const linha = ranking && ranking.tickers && ranking.tickers[tickerNorm];
+    if (!Array.isArray(linha) || !Array.isArray(ranking.campos)) {
+        return null;
+    }
+    const item = {};
+    ranking.campos.forEach((campo, i) => { item[campo] = linha[i]; });
+    return item;
+}
+
 /**
- * Carrega DY atual do arquivo multiplos.js
+ * Carrega DY atual do ranking de DY (fallback: arquivo multiplos.js)
  * CORREÇÃO: Acessa window.MONALYTICS.multiplos[ticker]
  */
 async function carregarDYAtual(ticker) {
     try {
         const tickerNorm = normalizarTicker(ticker);
+
+        const itemRanking = await obterRankingDYTicker(tickerNorm);
+        if (itemRanking && typeof itemRanking.dy === 'number') {
+            if (dividendosHistoricoData) {
+                dividendosHistoricoData.dy_atual = itemRanking.dy;
+            }
+            console.log(`✅ DY atual carregado do ranking: ${itemRanking.dy.toFixed(2)}%`);
+            return itemRanking.dy;
+        }
+
         const empresaInfo = mapeamentoB3.find(item => normalizarTicker(item && item.ticker) === tickerNorm);
 
         if (!empresaInfo) {
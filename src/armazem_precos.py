@@ -0,0 +1,668 @@
+# src/armazem_precos.py
+"""
+ARMAZÉM LOCAL DE PREÇOS DIÁRIOS (OHLCV)
+=======================================
+
+Base única (SQLite) de preços diários ajustados por ticker, compartilhada pelos jobs de preço:
+- capturar_precos.py           -> preços de fim de trimestre (precos_em_datas)
+- capturar_historico_precos.py -> gráficos de 5 anos (historico_anos)
+- atualizar_precos_diarios.py  -> último fechamento (ultimo_fechamento)
+
+Regras:
+- Downloads agrupados via provedores_precos.py (ProvedorYahoo: lotes de N símbolos com
+  backoff e nova tentativa; ProvedorFixture para testes/benchmark offline).
+- Append-only com marca d'água (última data) por ticker: cada atualização baixa apenas os
+  dias que faltam (mais uma pequena sobreposição) e no máximo uma vez por dia.
+- O último pregão gravado é provisório (pode ter sido capturado durante o pregão) e é
+  regravado na atualização seguinte.
+- Preços gravados SEM ajuste (como negociados): o download vem sem ajuste de proventos e os
+  desdobramentos/grupamentos que o Yahoo já aplica são desfeitos antes de gravar. Eventos
+  corporativos ficam na tabela "eventos":
+    * desdobramento/grupamento: do próprio download (Yahoo "Stock Splits")
+    * dividendo/JCP: balancos/<PASTA>/dividendos_detalhado.json (importar_proventos; fonte "b3"),
+      com os do Yahoo como reserva para tickers sem esse arquivo
+  A série ajustada (historico, precos_em_datas, matriz_fechamentos...) é derivada localmente
+  na leitura: um provento novo não exige baixar de novo o histórico.
+- Se os preços da sobreposição ainda assim divergirem do gravado (correção na fonte), o
+  histórico do ticker é baixado de novo por inteiro e substituído; o caso fica registrado na
+  tabela "reajustes".
+
+Arquivo: balancos/PRECOS/precos_diarios.sqlite (ou variável de ambiente MONALYTICS_PRECOS_DB).
+Não é versionado no git; nos workflows é preservado via actions/cache.
+
+EXECUÇÃO:
+python src/armazem_precos.py --lista "PETR4,VALE3,IBOV"
+python src/armazem_precos.py --info
+python src/armazem_precos.py --proventos        # importa dividendos_detalhado.json (sem rede)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+from multi_ticker_utils import _find_balancos_dir
+from provedores_precos import (
+    COLUNAS_OHLCV,
+    HAS_YFINANCE,
+    ProvedorPrecos,
+    ProvedorYahoo,
+    normalizar_ohlcv,
+    simbolo_yahoo,
+    ticker_armazem,
+)
+
+
+# ======================================================================================
+# CONFIGURAÇÕES
+# ======================================================================================
+
+PASTA_ARMAZEM = "PRECOS"
+ARQUIVO_ARMAZEM = "precos_diarios.sqlite"
+VARIAVEL_AMBIENTE = "MONALYTICS_PRECOS_DB"
+
+INICIO_PADRAO = "2005-01-01"     # início do histórico na primeira carga de um ticker
+SOBREPOSICAO_DIAS = 10           # dias corridos re-baixados antes da marca d'água
+TOLERANCIA_REAJUSTE = 1e-4       # variação relativa que caracteriza reajuste do histórico
+BASE_PRECOS = "bruto"            # base gravada na tabela precos (versões antigas: ajustada)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS precos (
+    ticker     TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    abertura   REAL,
+    maxima     REAL,
+    minima     REAL,
+    fechamento REAL NOT NULL,
+    volume     REAL,
+    PRIMARY KEY (ticker, data)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS controle (
+    ticker        TEXT PRIMARY KEY,
+    primeira_data TEXT,
+    ultima_data   TEXT,
+    verificado_em TEXT
+);
+
+CREATE TABLE IF NOT EXISTS reajustes (
+    ticker          TEXT NOT NULL,
+    detectado_em    TEXT NOT NULL,
+    data_referencia TEXT,
+    fator           REAL
+);
+
+-- data = primeiro pregão sem o direito (ex-data); ajusta os preços anteriores a ela
+-- valor: dividendo em R$/ação na base negociada; desdobramento = ações novas / antigas
+CREATE TABLE IF NOT EXISTS eventos (
+    ticker TEXT NOT NULL,
+    data   TEXT NOT NULL,
+    tipo   TEXT NOT NULL,
+    valor  REAL NOT NULL,
+    fonte  TEXT NOT NULL,
+    PRIMARY KEY (ticker, data, tipo, fonte)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+
+# ======================================================================================
+# UTILITÁRIOS
+# ======================================================================================
+
+def precos_asof(serie: pd.Series, datas: Iterable, max_dias: int) -> np.ndarray:
+    """
+    Preço "as-of" de cada data (vetorizado via searchsorted): último valor com data <= alvo,
+    desde que dentro de max_dias dias corridos. Sem preço na janela -> NaN.
+    """
+    alvo = pd.DatetimeIndex(list(datas)).values
+    out = np.full(len(alvo), np.nan)
+    if serie is None or serie.empty or len(alvo) == 0:
+        return out
+
+    datas_serie = pd.DatetimeIndex(serie.index).values
+    pos = np.searchsorted(datas_serie, alvo, side="right") - 1
+    ok = pos >= 0
+    pos = np.clip(pos, 0, None)
+    ok &= datas_serie[pos] >= alvo - np.timedelta64(max_dias, "D")
+    out[ok] = serie.to_numpy(dtype=float)[pos[ok]]
+    return out
+
+
+def desfazer_desdobramentos(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Tuple[str, str, float]]]:
+    """
+    Volta o download (já corrigido por desdobramentos pelo Yahoo) para a base negociada.
+
+    Cada pregão é multiplicado pelo produto das razões dos desdobramentos posteriores a ele
+    (volume dividido). Basta a janela baixada: todo desdobramento posterior a uma data dela
+    também está nela.
+
+    Returns:
+        (OHLCV bruto, eventos [(data, tipo, valor)] de desdobramento e dividendo do Yahoo)
+    """
+    if df.empty:
+        return df[COLUNAS_OHLCV], []
+
+    n = len(df)
+    razao = df["desdobramento"].to_numpy(dtype=float) if "desdobramento" in df.columns else np.zeros(n)
+    razao = np.where(razao > 0, razao, 1.0)
+    posteriores = np.append(np.cumprod(razao[::-1])[::-1][1:], 1.0)
+
+    bruto = df[COLUNAS_OHLCV].copy()
+    for col in ("abertura", "maxima", "minima", "fechamento"):
+        bruto[col] = bruto[col] * posteriores
+    bruto["volume"] = bruto["volume"] / posteriores
+
+    datas = df.index.strftime("%Y-%m-%d")
+    eventos = [(d, "desdobramento", float(r)) for d, r in zip(datas, razao) if r != 1.0]
+    if "dividendos" in df.columns:
+        dividendos = df["dividendos"].to_numpy(dtype=float) * posteriores
+        eventos += [(d, "dividendo", float(v)) for d, v in zip(datas, dividendos) if v > 0]
+    return bruto, eventos
+
+
+def fatores_ajuste(datas: pd.DatetimeIndex, fechamentos: np.ndarray, eventos: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fatores multiplicativos (preço, volume) que levam a série bruta à base ajustada de hoje.
+
+    Para cada evento com ex-data e, os pregões anteriores a e são multiplicados por:
+      desdobramento: 1 / razão (volume: × razão)
+      dividendo:     1 - valor / fechamento bruto do último pregão antes de e
+    Eventos posteriores ao último pregão ainda não valem e são ignorados.
+    """
+    n = len(datas)
+    fator_preco, fator_volume = np.ones(n), np.ones(n)
+    if n == 0 or eventos is None or eventos.empty:
+        return fator_preco, fator_volume
+
+    t = datas.values
+    e = pd.DatetimeIndex(pd.to_datetime(eventos["data"])).values
+    tipo = eventos["tipo"].to_numpy()
+    valor = eventos["valor"].to_numpy(dtype=float)
+    validos = e <= t[-1]
+    e, tipo, valor = e[validos], tipo[validos], valor[validos]
+
+    anterior = np.searchsorted(t, e, side="left") - 1
+    f_preco = np.ones(len(e))
+    f_volume = np.ones(len(e))
+
+    desd = tipo == "desdobramento"
+    f_preco[desd] = 1.0 / valor[desd]
+    f_volume[desd] = valor[desd]
+
+    div = (tipo == "dividendo") & (anterior >= 0)
+    ref = fechamentos[np.clip(anterior, 0, None)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_div = 1.0 - valor / ref
+    ok = div & np.isfinite(f_div) & (f_div > 0)
+    f_preco[ok] = f_div[ok]
+
+    # Produto dos fatores dos eventos com ex-data > cada pregão (sufixo acumulado)
+    ordem = np.argsort(e, kind="stable")
+    e, f_preco, f_volume = e[ordem], f_preco[ordem], f_volume[ordem]
+    suf_preco = np.append(np.cumprod(f_preco[::-1])[::-1], 1.0)
+    suf_volume = np.append(np.cumprod(f_volume[::-1])[::-1], 1.0)
+    pos = np.searchsorted(e, t, side="right")
+    return suf_preco[pos], suf_volume[pos]
+
+
+def _proventos_json(arquivo: Path) -> Tuple[Optional[str], List[Tuple[str, float]]]:
+    """(ticker, [(ex-data, R$/ação)]) de um dividendos_detalhado.json."""
+    with open(arquivo, encoding="utf-8") as f:
+        dados = json.load(f)
+
+    # Um evento por (data_com, tipo): mesmo critério do DPA em calcular_multiplos
+    por_evento: Dict[Tuple[str, str], float] = {}
+    for d in dados.get("dividendos") or []:
+        try:
+            chave = (str(d["data_com"])[:10], str(d.get("tipo", "")))
+            por_evento[chave] = max(por_evento.get(chave, 0.0), float(d["valor"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    por_data: Dict[str, float] = {}
+    for (data_com, _), valor in por_evento.items():
+        if valor > 0:
+            # data com = último dia com direito -> ex-data no dia seguinte
+            ex = (pd.Timestamp(data_com) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            por_data[ex] = por_data.get(ex, 0.0) + valor
+
+    ticker = dados.get("ticker")
+    return (ticker_armazem(ticker) if ticker else None), sorted(por_data.items())
+
+
+def caminho_armazem_padrao() -> Path:
+    """balancos/PRECOS/precos_diarios.sqlite (ou MONALYTICS_PRECOS_DB)."""
+    env = os.environ.get(VARIAVEL_AMBIENTE)
+    if env:
+        return Path(env)
+    return _find_balancos_dir() / PASTA_ARMAZEM / ARQUIVO_ARMAZEM
+
+
+# ======================================================================================
+# ARMAZÉM
+# ======================================================================================
+
+class ArmazemPrecos:
+    """
+    Armazém SQLite de OHLCV diário por ticker.
+
+    Downloads via ProvedorPrecos (default: ProvedorYahoo, agrupado em lotes);
+    escrita serializada por lock; cada operação abre a sua própria conexão.
+    """
+
+    def __init__(
+        self,
+        caminho: Optional[Path] = None,
+        inicio: str = INICIO_PADRAO,
+        provedor: Optional[ProvedorPrecos] = None,
+    ):
+        self.caminho = Path(caminho) if caminho is not None else caminho_armazem_padrao()
+        self.inicio = inicio
+        self.provedor = provedor if provedor is not None else ProvedorYahoo(ajustado=False)
+        self._lock = threading.Lock()
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with self._conexao() as con:
+            con.executescript(_SCHEMA)
+            self._migrar_base(con)
+
+    def _migrar_base(self, con: sqlite3.Connection) -> None:
+        """Armazém de versão anterior (preços já ajustados): descarta para rebaixar sem ajuste."""
+        row = con.execute("SELECT valor FROM meta WHERE chave = 'base_precos'").fetchone()
+        if row and row[0] == BASE_PRECOS:
+            return
+        if con.execute("SELECT 1 FROM precos LIMIT 1").fetchone():
+            print("🔁 Armazém em base ajustada (versão anterior): históricos serão baixados de novo sem ajuste")
+            con.execute("DELETE FROM precos")
+            con.execute("DELETE FROM controle")
+        con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('base_precos', ?)", (BASE_PRECOS,))
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(str(self.caminho), timeout=60)
+        try:
+            yield con
+            con.commit()
+        finally:
+            con.close()
+
+    # ----------------------------------------------------------------------------------
+    # Controle (marca d'água)
+    # ----------------------------------------------------------------------------------
+
+    def controle(self, ticker: str) -> Optional[Dict[str, Optional[str]]]:
+        """Registro de controle do ticker: primeira_data, ultima_data, verificado_em."""
+        t = ticker_armazem(ticker)
+        with self._conexao() as con:
+            row = con.execute(
+                "SELECT primeira_data, ultima_data, verificado_em FROM controle WHERE ticker = ?", (t,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"primeira_data": row[0], "ultima_data": row[1], "verificado_em": row[2]}
+
+    def marca_dagua(self, ticker: str) -> Optional[str]:
+        """Última data gravada do ticker (YYYY-MM-DD) ou None."""
+        ctrl = self.controle(ticker)
+        return ctrl["ultima_data"] if ctrl else None
+
+    # ----------------------------------------------------------------------------------
+    # Atualização
+    # ----------------------------------------------------------------------------------
+
+    def _baixar(self, t: str, inicio: str) -> pd.DataFrame:
+        sym = simbolo_yahoo(t)
+        df = self.provedor.baixar([sym], inicio).get(sym)
+        return df if df is not None else normalizar_ohlcv(None, sym)
+
+    def _gravar(
+        self,
+        con: sqlite3.Connection,
+        t: str,
+        df: pd.DataFrame,
+        substituir: bool,
+        eventos: Iterable[Tuple[str, str, float]] = (),
+    ) -> None:
+        if substituir:
+            con.execute("DELETE FROM precos WHERE ticker = ?", (t,))
+            con.execute("DELETE FROM eventos WHERE ticker = ? AND fonte = 'yahoo'", (t,))
+        con.executemany(
+            "INSERT OR REPLACE INTO eventos (ticker, data, tipo, valor, fonte) VALUES (?, ?, ?, ?, 'yahoo')",
+            [(t, d, tipo, v) for d, tipo, v in eventos],
+        )
+        registros = [
+            (t, d.strftime("%Y-%m-%d"), *[None if pd.isna(v) else float(v) for v in linha])
+            for d, linha in zip(df.index, df[COLUNAS_OHLCV].itertuples(index=False, name=None))
+        ]
+        con.executemany(
+            "INSERT OR REPLACE INTO precos (ticker, data, abertura, maxima, minima, fechamento, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            registros,
+        )
+        primeira, ultima = con.execute(
+            "SELECT MIN(data), MAX(data) FROM precos WHERE ticker = ?", (t,)
+        ).fetchone()
+        con.execute(
+            "INSERT OR REPLACE INTO controle (ticker, primeira_data, ultima_data, verificado_em) "
+            "VALUES (?, ?, ?, ?)",
+            (t, primeira, ultima, date.today().isoformat()),
+        )
+
+    def _planejar(self, t: str, forcar: bool) -> Tuple[Optional[Dict[str, Optional[str]]], Optional[str]]:
+        """(controle, início do download); início None = já verificado hoje."""
+        ctrl = self.controle(t)
+        if ctrl and ctrl["verificado_em"] == date.today().isoformat() and not forcar:
+            return ctrl, None
+        ultima = ctrl["ultima_data"] if ctrl else None
+        if ultima:
+            return ctrl, (pd.Timestamp(ultima) - pd.Timedelta(days=SOBREPOSICAO_DIAS)).strftime("%Y-%m-%d")
+        return ctrl, self.inicio
+
+    def _incorporar(
+        self,
+        t: str,
+        ctrl: Optional[Dict[str, Optional[str]]],
+        inicio: str,
+        novos: Optional[pd.DataFrame],
+    ) -> Dict[str, object]:
+        """Grava o download incremental (detectando reajuste do histórico)."""
+        status: Dict[str, object] = {"ticker": t, "baixado": True, "novos": 0, "reajustado": False}
+        if novos is None or novos.empty:
+            return status
+        novos, eventos = desfazer_desdobramentos(novos)
+
+        ultima = ctrl["ultima_data"] if ctrl else None
+        substituir = False
+        if ultima:
+            # Último pregão gravado é provisório: a comparação usa só as datas anteriores a ele
+            gravados = self.historico(t, inicio=inicio, ajustado=False)["fechamento"]
+            gravados = gravados[gravados.index < pd.Timestamp(ultima)]
+            comuns = gravados.index.intersection(novos.index)
+            if len(comuns):
+                razao = novos.loc[comuns, "fechamento"].to_numpy(dtype=float) / gravados.loc[comuns].to_numpy(dtype=float)
+                if np.nanmax(np.abs(razao - 1.0)) > TOLERANCIA_REAJUSTE:
+                    completo = self._baixar(t, (ctrl or {}).get("primeira_data") or self.inicio)
+                    if completo.empty:
+                        # Sem o histórico completo não dá para reajustar: tenta de novo na próxima execução
+                        return status
+                    with self._lock, self._conexao() as con:
+                        con.execute(
+                            "INSERT INTO reajustes (ticker, detectado_em, data_referencia, fator) VALUES (?, ?, ?, ?)",
+                            (t, datetime.now().isoformat(timespec="seconds"),
+                             comuns[-1].strftime("%Y-%m-%d"), float(np.nanmedian(razao))),
+                        )
+                    novos, eventos = desfazer_desdobramentos(completo)
+                    substituir = True
+                    status["reajustado"] = True
+
+            if not substituir:
+                novos = novos[novos.index >= pd.Timestamp(ultima)]
+
+        with self._lock, self._conexao() as con:
+            self._gravar(con, t, novos, substituir=substituir, eventos=eventos)
+
+        status["novos"] = int((novos.index > pd.Timestamp(ultima)).sum()) if ultima else len(novos)
+        return status
+
+    def atualizar(self, ticker: str, forcar: bool = False) -> Dict[str, object]:
+        """
+        Atualiza o ticker de forma incremental.
+
+        Returns:
+            {"ticker", "baixado": bool, "novos": int, "reajustado": bool}
+        """
+        return self.atualizar_lote([ticker], forcar=forcar)[ticker_armazem(ticker)]
+
+    def atualizar_lote(self, tickers: List[str], forcar: bool = False) -> Dict[str, Dict[str, object]]:
+        """
+        Atualiza vários tickers: os que têm o mesmo início de download (normalmente todos,
+        pois compartilham a marca d'água do último pregão) vão numa única chamada agrupada
+        ao provedor.
+        """
+        chaves = list(dict.fromkeys(ticker_armazem(t) for t in tickers))
+        resultados: Dict[str, Dict[str, object]] = {}
+
+        grupos: Dict[str, List[str]] = {}
+        planos: Dict[str, Optional[Dict[str, Optional[str]]]] = {}
+        for t in chaves:
+            ctrl, inicio = self._planejar(t, forcar)
+            if inicio is None:
+                resultados[t] = {"ticker": t, "baixado": False, "novos": 0, "reajustado": False}
+                continue
+            planos[t] = ctrl
+            grupos.setdefault(inicio, []).append(t)
+
+        for inicio, grupo in grupos.items():
+            dados = self.provedor.baixar([simbolo_yahoo(t) for t in grupo], inicio)
+            for t in grupo:
+                try:
+                    resultados[t] = self._incorporar(t, planos[t], inicio, dados.get(simbolo_yahoo(t)))
+                except Exception as e:
+                    print(f"  ⚠️  {t}: erro ao atualizar armazém ({type(e).__name__}: {e})")
+                    resultados[t] = {"ticker": t, "baixado": True, "novos": 0, "reajustado": False}
+        return resultados
+
+    # ----------------------------------------------------------------------------------
+    # Leitura
+    # ----------------------------------------------------------------------------------
+
+    def eventos(self, ticker: str) -> pd.DataFrame:
+        """
+        Eventos que valem para o ajuste do ticker (data, tipo, valor, fonte).
+
+        Dividendos da B3 (dividendos_detalhado.json) têm precedência: se o ticker tem algum,
+        os dividendos do Yahoo são ignorados.
+        """
+        t = ticker_armazem(ticker)
+        with self._conexao() as con:
+            ev = pd.read_sql_query(
+                "SELECT data, tipo, valor, fonte FROM eventos WHERE ticker = ? ORDER BY data", con, params=[t]
+            )
+        dividendo = ev["tipo"] == "dividendo"
+        if (dividendo & (ev["fonte"] == "b3")).any():
+            ev = ev[~(dividendo & (ev["fonte"] == "yahoo"))]
+        return ev.reset_index(drop=True)
+
+    def _ajustar(self, t: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica à série bruta completa do ticker os fatores dos seus eventos."""
+        fator_preco, fator_volume = fatores_ajuste(df.index, df["fechamento"].to_numpy(dtype=float), self.eventos(t))
+        df = df.copy()
+        for col in ("abertura", "maxima", "minima", "fechamento"):
+            df[col] = df[col] * fator_preco
+        df["volume"] = df["volume"] * fator_volume
+        return df
+
+    def historico(
+        self,
+        ticker: str,
+        inicio: Optional[str] = None,
+        fim: Optional[str] = None,
+        ajustado: bool = True,
+    ) -> pd.DataFrame:
+        """
+        OHLCV diário do ticker (índice "Date"), opcionalmente filtrado por [inicio, fim].
+
+        ajustado=True (padrão) devolve a série ajustada por proventos e desdobramentos,
+        derivada localmente dos preços brutos + tabela de eventos; False, como negociada.
+        """
+        t = ticker_armazem(ticker)
+        sql = "SELECT data, abertura, maxima, minima, fechamento, volume FROM precos WHERE ticker = ?"
+        params: List[str] = [t]
+        # O fator de um dividendo usa o fechamento da véspera: o ajuste lê a série inteira
+        if inicio and not ajustado:
+            sql += " AND data >= ?"
+            params.append(str(inicio)[:10])
+        if fim:
+            sql += " AND data <= ?"
+            params.append(str(fim)[:10])
+        sql += " ORDER BY data"
+
+        with self._conexao() as con:
+            df = pd.read_sql_query(sql, con, params=params)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("data")), name="Date")
+        df = df[COLUNAS_OHLCV].astype(float)
+        if ajustado:
+            df = self._ajustar(t, df)
+            if inicio:
+                df = df[df.index >= pd.Timestamp(str(inicio)[:10])]
+        return df
+
+    def matriz_fechamentos(
+        self,
+        tickers: Optional[Iterable[str]] = None,
+        inicio: Optional[str] = None,
+        ajustado: bool = True,
+    ) -> pd.DataFrame:
+        """Fechamentos de vários tickers numa matriz data × ticker (uma única consulta de preços)."""
+        sql = "SELECT data, ticker, fechamento FROM precos WHERE 1 = 1"
+        params: List[str] = []
+        if tickers is not None:
+            chaves = [ticker_armazem(t) for t in tickers]
+            sql += f" AND ticker IN ({', '.join('?' * len(chaves))})"
+            params.extend(chaves)
+
+        with self._conexao() as con:
+            df = pd.read_sql_query(sql, con, params=params)
+        matriz = df.pivot(index="data", columns="ticker", values="fechamento").astype(float)
+        matriz.index = pd.DatetimeIndex(pd.to_datetime(matriz.index), name="Date")
+        matriz.columns.name = None
+        matriz = matriz.sort_index()
+
+        if ajustado:
+            for t in matriz.columns:
+                serie = matriz[t].dropna()
+                fator, _ = fatores_ajuste(serie.index, serie.to_numpy(), self.eventos(t))
+                matriz.loc[serie.index, t] = serie.to_numpy() * fator
+        if inicio:
+            matriz = matriz[matriz.index >= pd.Timestamp(str(inicio)[:10])]
+        return matriz.dropna(how="all")
+
+    def historico_anos(self, ticker: str, anos: int = 5) -> pd.DataFrame:
+        """Últimos `anos` anos de OHLCV (mesma janela do gráfico de 5 anos: +30 dias de margem)."""
+        inicio = (date.today() - timedelta(days=anos * 365 + 30)).isoformat()
+        return self.historico(ticker, inicio=inicio)
+
+    def ultimo_fechamento(self, ticker: str) -> Optional[Dict[str, object]]:
+        """
+        {'data', 'fechamento', 'volume'} do último pregão gravado, ou None.
+
+        Bruto e ajustado coincidem no último pregão (o ajuste só altera datas anteriores a cada
+        evento), então a leitura dispensa os eventos.
+        """
+        t = ticker_armazem(ticker)
+        with self._conexao() as con:
+            row = con.execute(
+                "SELECT data, fechamento, volume FROM precos WHERE ticker = ? ORDER BY data DESC LIMIT 1", (t,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"data": row[0], "fechamento": float(row[1]), "volume": float(row[2] or 0.0)}
+
+    def precos_em_datas(self, ticker: str, datas: Iterable, max_dias: int = 10) -> np.ndarray:
+        """Fechamento as-of em cada data (ex.: fins de trimestre), NaN sem pregão na janela."""
+        datas = pd.DatetimeIndex(list(datas))
+        if len(datas) == 0:
+            return np.array([], dtype=float)
+        inicio = (datas.min() - pd.Timedelta(days=max_dias)).strftime("%Y-%m-%d")
+        serie = self.historico(ticker, inicio=inicio)["fechamento"]
+        return precos_asof(serie, datas, max_dias)
+
+    # ----------------------------------------------------------------------------------
+    # Eventos corporativos
+    # ----------------------------------------------------------------------------------
+
+    def importar_proventos(self, pasta_base: Optional[Path] = None) -> Dict[str, int]:
+        """
+        Carrega os dividendos/JCP de balancos/*/dividendos_detalhado.json na tabela de eventos
+        (fonte "b3", substituindo a importação anterior do ticker). Não acessa a rede.
+
+        Returns:
+            {ticker: quantidade de eventos}
+        """
+        pasta_base = pasta_base or _find_balancos_dir()
+        importados: Dict[str, int] = {}
+        for arquivo in sorted(pasta_base.glob("*/dividendos_detalhado.json")):
+            try:
+                t, proventos = _proventos_json(arquivo)
+            except (OSError, ValueError) as e:
+                print(f"  ⚠️  {arquivo.parent.name}: {type(e).__name__}: {e}")
+                continue
+            if not t:
+                continue
+            with self._lock, self._conexao() as con:
+                con.execute("DELETE FROM eventos WHERE ticker = ? AND fonte = 'b3'", (t,))
+                con.executemany(
+                    "INSERT OR REPLACE INTO eventos (ticker, data, tipo, valor, fonte) VALUES (?, ?, 'dividendo', ?, 'b3')",
+                    [(t, d, v) for d, v in proventos],
+                )
+            importados[t] = len(proventos)
+        return importados
+
+    def resumo(self) -> pd.DataFrame:
+        """Tabela de controle com a quantidade de pregões e de eventos por ticker."""
+        with self._conexao() as con:
+            return pd.read_sql_query(
+                "SELECT c.ticker, c.primeira_data, c.ultima_data, c.verificado_em, COUNT(p.data) AS pregoes, "
+                "(SELECT COUNT(*) FROM eventos e WHERE e.ticker = c.ticker) AS eventos "
+                "FROM controle c LEFT JOIN precos p ON p.ticker = c.ticker "
+                "GROUP BY c.ticker ORDER BY c.ticker",
+                con,
+            )
+
+
+# ======================================================================================
+# CLI
+# ======================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Armazém local de preços diários (OHLCV)")
+    parser.add_argument("--lista", default="", help="Tickers separados por vírgula (ex: PETR4,VALE3,IBOV)")
+    parser.add_argument("--forcar", action="store_true", help="Ignora a verificação diária")
+    parser.add_argument("--info", action="store_true", help="Mostra o resumo do armazém")
+    parser.add_argument("--proventos", action="store_true",
+                       help="Importa dividendos_detalhado.json para a tabela de eventos (sem rede)")
+    args = parser.parse_args()
+
+    armazem = ArmazemPrecos()
+    print(f"\n>>> ARMAZÉM DE PREÇOS: {armazem.caminho} <<<\n")
+
+    if args.proventos:
+        importados = armazem.importar_proventos()
+        print(f"💰 Proventos importados: {sum(importados.values())} evento(s) de {len(importados)} ticker(s)\n")
+
+    tickers = [t.strip().upper() for t in args.lista.split(",") if t.strip()]
+    if tickers:
+        if not HAS_YFINANCE:
+            print("❌ yfinance não instalado: pip install yfinance")
+            return
+        for t, st in sorted(armazem.atualizar_lote(tickers, forcar=args.forcar).items()):
+            if not st["baixado"]:
+                print(f"⏭️  {t}: já verificado hoje")
+            elif st["reajustado"]:
+                print(f"🔁 {t}: histórico reajustado ({st['novos']} pregões)")
+            else:
+                print(f"✅ {t}: +{st['novos']} pregão(ões)")
+
+    if args.info or not (tickers or args.proventos):
+        print(armazem.resumo().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,13 @@ MISSÃO:
 3. Extrair informações (tipo, valor, datas)
 4. Atualizar agenda_dividendos_acoes_investidor10.json SEM apagar dados existentes
 5. Adicionar apenas proventos FUTUROS (data_pagamento >= hoje)
+6. Regerar calendario_proventos.json (próximos proventos do site, ver calendario_dividendos.py)
+
+INCREMENTAL:
+O feed (ordenado do mais recente para o mais antigo) é lido em streaming e só as notícias
+ainda não processadas são analisadas. A marca d'água fica em
+balancos/agenda_dividendos_feed_estado.json: data mais recente vista + ids (ticker:idNoticia)
+dos últimos JANELA_IDS_DIAS dias; a leitura para ao passar dessa janela.
 
 ESTRUTURA DO JSON DE AGENDA:
 [
@@ -32,17 +39,143 @@ ESTRUTURA DO JSON DE AGENDA:
 
 EXECUÇÃO:
 python src/atualizar_agenda_dividendos_feed.py
+python src/atualizar_agenda_dividendos_feed.py --completo   # reprocessa o feed inteiro
 """
 
 from __future__ import annotations
 
 import json
 import re
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import argparse
 
+sys.path.insert(0, str(Path(__file__).parent))
+from calendario_dividendos import salvar_calendario
+from multi_ticker_utils import escrever_se_mudou
+
+
+# ======================================================================================
+# PADRÕES (compilados uma vez)
+# ======================================================================================
+
+ARQUIVO_ESTADO = "agenda_dividendos_feed_estado.json"
+JANELA_IDS_DIAS = 7  # notícias podem entrar no feed com data até esse atraso
+
+PALAVRAS_JSCP = (
+    "JUROS SOBRE CAPITAL PROPRIO",
+    "JUROS SOBRE O CAPITAL PROPRIO",
+    "JUROS S/ CAPITAL PROPRIO",
+    "JCP",
+    "JSCP",
+)
+PALAVRAS_DIVIDENDO = ("DIVIDENDO", "DIVIDEND", "DIV.", "PROVENT")
+# Palavras-chave de proventos / de exclusão (evitar falsos positivos)
+PALAVRAS_PROVENTO = (
+    "DIVIDENDO", "DIVIDEND", "JCP", "JSCP",
+    "JUROS SOBRE CAPITAL", "PROVENTO", "RENDIMENTO",
+)
+PALAVRAS_EXCLUSAO = ("CALENDARIO", "ASSEMBLEIA", "ATA", "POLITICA")
+
+
+def _alternativas(palavras: Tuple[str, ...]) -> re.Pattern:
+    """Busca de substring de qualquer das palavras (texto já em maiúsculas)."""
+    return re.compile("|".join(re.escape(p) for p in palavras))
+
+
+RE_JSCP = _alternativas(PALAVRAS_JSCP)
+RE_DIVIDENDO = _alternativas(PALAVRAS_DIVIDENDO)
+RE_PROVENTO = _alternativas(PALAVRAS_PROVENTO)
+RE_EXCLUSAO = _alternativas(PALAVRAS_EXCLUSAO)
+
+# Valores (ordem de especificidade)
+RE_VALORES = (
+    re.compile(r'R\$\s*(\d+[.,]\d{2})', re.IGNORECASE),           # R$ 1,23 ou R$ 1.23
+    re.compile(r'(\d+[.,]\d{2})\s*(?:por|reais)', re.IGNORECASE), # 1,23 por ação
+    re.compile(r'valor\s+de\s+R\$\s*(\d+[.,]\d{2})', re.IGNORECASE), # valor de R$ 1,23
+)
+RE_DATA = re.compile(r'\b(\d{2})/(\d{2})/(\d{2,4})\b')  # DD/MM/YYYY ou DD/MM/YY
+RE_CLASSE = re.compile(r'\d+$')
+RE_ID_NOTICIA = re.compile(r'idNoticia=(\d+)')
+
+
+# ======================================================================================
+# LEITURA EM STREAMING
+# ======================================================================================
+
+def iterar_array_json(caminho: Path, chave: str, tamanho_bloco: int = 1 << 16) -> Iterator:
+    """
+    Itera os elementos do array `chave` de um objeto JSON sem carregar o arquivo todo.
+
+    Lê em blocos e decodifica um valor por vez (json.JSONDecoder.raw_decode); os demais
+    campos do objeto raiz são decodificados e descartados. Parar a iteração para a leitura.
+    """
+    decoder = json.JSONDecoder()
+    with open(caminho, 'r', encoding='utf-8') as f:
+        buf, pos, eof = "", 0, False
+
+        def ler() -> bool:
+            nonlocal buf, pos, eof
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                eof = True
+                return False
+            buf, pos = buf[pos:] + bloco, 0
+            return True
+
+        def proximo_char() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not ler():
+                    raise ValueError(f"JSON truncado: {caminho}")
+
+        def esperar(caracteres: str) -> str:
+            nonlocal pos
+            c = proximo_char()
+            if c not in caracteres:
+                raise ValueError(f"JSON inválido em {caminho}: esperado {caracteres!r}, encontrado {c!r}")
+            pos += 1
+            return c
+
+        def valor():
+            nonlocal pos
+            proximo_char()
+            while True:
+                try:
+                    obj, fim = decoder.raw_decode(buf, pos)
+                    # Número no fim do bloco pode estar cortado: garante o caractere seguinte
+                    if fim < len(buf) or eof or not ler():
+                        pos = fim
+                        return obj
+                except json.JSONDecodeError:
+                    if not ler():
+                        raise
+
+        esperar("{")
+        if proximo_char() == "}":
+            return
+        while True:
+            nome = valor()
+            esperar(":")
+            if nome != chave:
+                valor()
+            else:
+                esperar("[")
+                if proximo_char() == "]":
+                    return
+                while True:
+                    yield valor()
+                    if esperar(",]") == "]":
+                        return
+            if esperar(",}") == "}":
+                return
+
 
 class AtualizadorAgendaDividendos:
     """
@@ -52,10 +185,13 @@ class AtualizadorAgendaDividendos:
     def __init__(
         self, 
         arquivo_feed: str = "balancos/feed_noticias.json",
-        arquivo_agenda: str = "agenda_dividendos_acoes_investidor10.json"
+        arquivo_agenda: str = "agenda_dividendos_acoes_investidor10.json",
+        incremental: bool = True
     ):
         self.arquivo_feed = Path(arquivo_feed)
         self.arquivo_agenda = Path(arquivo_agenda)
+        self.arquivo_estado = self.arquivo_feed.parent / ARQUIVO_ESTADO
+        self.incremental = incremental
         self.proventos_novos = []
         self.proventos_ignorados = []
         self.data_hoje = datetime.now().strftime('%Y-%m-%d')
@@ -64,18 +200,60 @@ class AtualizadorAgendaDividendos:
     # CARREGAR DADOS
     # ==================================================================================
     
-    def carregar_feed(self) -> Optional[Dict]:
-        """Carrega feed de notícias."""
-        if not self.arquivo_feed.exists():
-            print(f"❌ Arquivo não encontrado: {self.arquivo_feed}")
-            return None
-        
+    def carregar_estado(self) -> Dict[str, str]:
+        """Ids já processados {ticker:idNoticia: data} ({} no modo completo ou sem estado)."""
+        if not self.incremental or not self.arquivo_estado.exists():
+            return {}
         try:
-            with open(self.arquivo_feed, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.arquivo_estado, 'r', encoding='utf-8') as f:
+                return json.load(f).get('processados', {})
         except Exception as e:
-            print(f"❌ Erro ao carregar feed: {e}")
-            return None
+            print(f"⚠️  Estado do feed ilegível ({e}): feed será reprocessado")
+            return {}
+    
+    def salvar_estado(self, processados: Dict[str, str]):
+        """Grava a marca d'água mantendo só os ids dentro da janela."""
+        if not processados:
+            return
+        marca = max(processados.values())
+        corte = self._inicio_janela(marca)
+        estado = {
+            'marca_dagua': marca,
+            'janela_dias': JANELA_IDS_DIAS,
+            'processados': dict(sorted((k, v) for k, v in processados.items() if v >= corte)),
+        }
+        escrever_se_mudou(self.arquivo_estado, json.dumps(estado, ensure_ascii=False, indent=2))
+    
+    @staticmethod
+    def _inicio_janela(marca: str) -> str:
+        return (datetime.strptime(marca, '%Y-%m-%d') - timedelta(days=JANELA_IDS_DIAS)).strftime('%Y-%m-%d')
+    
+    @staticmethod
+    def _id_item(item_feed: Dict) -> str:
+        """ticker:idNoticia (a mesma notícia aparece para mais de um ticker)."""
+        ticker = (item_feed.get('empresa') or {}).get('ticker', '')
+        noticia = item_feed.get('noticia') or {}
+        m = RE_ID_NOTICIA.search(noticia.get('url') or '')
+        ident = m.group(1) if m else f"{noticia.get('titulo', '')}|{noticia.get('headline', '')}"
+        return f"{ticker}:{ident}"
+    
+    def iterar_feed_novo(self, processados: Dict[str, str]) -> Iterator[Dict]:
+        """
+        Itens do feed ainda não processados, em streaming.
+        
+        O feed vem do mais recente para o mais antigo: ao passar do início da janela da
+        marca d'água a leitura para. Os ids vistos são registrados em `processados`.
+        """
+        corte = self._inicio_janela(max(processados.values())) if processados else None
+        for item in iterar_array_json(self.arquivo_feed, 'feed'):
+            data = item.get('data') or ''
+            if corte and data and data < corte:
+                break
+            ident = self._id_item(item)
+            if ident in processados:
+                continue
+            processados[ident] = data or self.data_hoje
+            yield item
     
     def carregar_agenda_existente(self) -> List[Dict]:
         """Carrega agenda existente ou retorna lista vazia."""
@@ -106,21 +284,10 @@ class AtualizadorAgendaDividendos:
         texto_upper = texto.upper()
         
         # Ordem de prioridade (mais específico primeiro)
-        if any(palavra in texto_upper for palavra in [
-            "JUROS SOBRE CAPITAL PROPRIO",
-            "JUROS SOBRE O CAPITAL PROPRIO",
-            "JUROS S/ CAPITAL PROPRIO",
-            "JCP",
-            "JSCP"
-        ]):
+        if RE_JSCP.search(texto_upper):
             return "JSCP"
         
-        if any(palavra in texto_upper for palavra in [
-            "DIVIDENDO",
-            "DIVIDEND",
-            "DIV.",
-            "PROVENT"
-        ]):
+        if RE_DIVIDENDO.search(texto_upper):
             return "Dividendos"
         
         return None
@@ -133,21 +300,7 @@ class AtualizadorAgendaDividendos:
         
         texto = f"{titulo} {headline} {categoria}"
         
-        # Palavras-chave de proventos
-        keywords_provento = [
-            "DIVIDENDO", "DIVIDEND", "JCP", "JSCP",
-            "JUROS SOBRE CAPITAL", "PROVENTO", "RENDIMENTO"
-        ]
-        
-        # Palavras de exclusão (evitar falsos positivos)
-        keywords_exclusao = [
-            "CALENDARIO", "ASSEMBLEIA", "ATA", "POLITICA"
-        ]
-        
-        tem_provento = any(kw in texto for kw in keywords_provento)
-        tem_exclusao = any(kw in texto for kw in keywords_exclusao)
-        
-        return tem_provento and not tem_exclusao
+        return bool(RE_PROVENTO.search(texto)) and not RE_EXCLUSAO.search(texto)
     
     # ==================================================================================
     # EXTRAÇÃO DE INFORMAÇÕES
@@ -164,15 +317,8 @@ class AtualizadorAgendaDividendos:
         - R$ 0.15
         - 0,15 por ação
         """
-        # Padrões de regex (ordem de especificidade)
-        padroes = [
-            r'R\$\s*(\d+[.,]\d{2})',           # R$ 1,23 ou R$ 1.23
-            r'(\d+[.,]\d{2})\s*(?:por|reais)', # 1,23 por ação
-            r'valor\s+de\s+R\$\s*(\d+[.,]\d{2})', # valor de R$ 1,23
-        ]
-        
-        for padrao in padroes:
-            match = re.search(padrao, texto, re.IGNORECASE)
+        for padrao in RE_VALORES:
+            match = padrao.search(texto)
             if match:
                 valor_str = match.group(1).replace(',', '.')
                 try:
@@ -192,12 +338,8 @@ class AtualizadorAgendaDividendos:
                 'data_pagamento': 'YYYY-MM-DD' ou None
             }
         """
-        # Padrões de data
-        # DD/MM/YYYY ou DD/MM/YY
-        padrao_data = r'\b(\d{2})/(\d{2})/(\d{2,4})\b'
-        
         datas_encontradas = []
-        for match in re.finditer(padrao_data, texto):
+        for match in RE_DATA.finditer(texto):
             dia, mes, ano = match.groups()
             
             # Normalizar ano (2 dígitos → 4 dígitos)
@@ -231,7 +373,7 @@ class AtualizadorAgendaDividendos:
     
     def _extrair_ticker_base(self, ticker: str) -> str:
         """Remove número de classe do ticker (BBDC4 → BBDC)."""
-        return re.sub(r'\d+$', '', ticker.upper().strip())
+        return RE_CLASSE.sub('', ticker.upper().strip())
     
     # ==================================================================================
     # PROCESSAMENTO DE NOTÍCIAS
@@ -381,62 +523,86 @@ class AtualizadorAgendaDividendos:
         # 1. Carregar dados
         print("1️⃣ Carregando dados...")
         
-        feed = self.carregar_feed()
-        if not feed:
+        if not self.arquivo_feed.exists():
+            print(f"❌ Arquivo não encontrado: {self.arquivo_feed}")
             return 0, 0
         
+        processados = self.carregar_estado()
+        if processados:
+            print(f"✅ Marca d'água do feed: {max(processados.values())} ({len(processados)} ids na janela)")
+        
         agenda_existente = self.carregar_agenda_existente()
         total_existentes = len(agenda_existente)
         
-        # 2. Processar feed
-        print(f"\n2️⃣ Processando feed ({len(feed.get('feed', []))} notícias)...")
+        # 2. Processar feed (só itens novos, em streaming)
+        print(f"\n2️⃣ Processando feed...")
         
         proventos_candidatos = []
         noticias_provento = 0
+        noticias_lidas = 0
         
-        for item in feed.get('feed', []):
-            if self._e_noticia_provento(item.get('noticia', {})):
-                noticias_provento += 1
-                provento = self.processar_noticia(item)
-                if provento:
-                    proventos_candidatos.append(provento)
+        try:
+            for item in self.iterar_feed_novo(processados):
+                noticias_lidas += 1
+                if self._e_noticia_provento(item.get('noticia', {})):
+                    noticias_provento += 1
+                    provento = self.processar_noticia(item)
+                    if provento:
+                        proventos_candidatos.append(provento)
+        except Exception as e:
+            print(f"❌ Erro ao ler feed: {e}")
+            return 0, total_existentes
         
+        print(f"  ✅ {noticias_lidas} notícias novas desde a última execução")
         print(f"  ✅ {noticias_provento} notícias sobre proventos identificadas")
         print(f"  ✅ {len(proventos_candidatos)} proventos futuros extraídos")
         
         # 3. Remover duplicatas
         print(f"\n3️⃣ Removendo duplicatas...")
         
-        proventos_unicos = self.remover_duplicatas(agenda_existente, proventos_candidatos)
+        proventos_unicos = self.remover_duplicatas(agenda_existente, proventos_candidatos) if proventos_candidatos else []
         print(f"  ✅ {len(proventos_unicos)} proventos novos para adicionar")
         
         # 4. Consolidar e salvar
         print(f"\n4️⃣ Salvando agenda atualizada...")
         
-        agenda_atualizada = agenda_existente + proventos_unicos
-        
-        # Ordenar por data de pagamento (mais antigo primeiro)
-        agenda_atualizada.sort(
-            key=lambda x: (
-                x.get('data_pagamento', '9999-99-99'),
-                x.get('ticker', ''),
-                x.get('valor', 0)
-            )
-        )
-        
-        # Salvar
-        try:
-            with open(self.arquivo_agenda, 'w', encoding='utf-8') as f:
-                json.dump(agenda_atualizada, f, ensure_ascii=False, indent=2)
+        if proventos_unicos or not self.arquivo_agenda.exists():
+            agenda_atualizada = agenda_existente + proventos_unicos
             
-            print(f"  ✅ Agenda salva: {self.arquivo_agenda}")
-            print(f"  📊 Total de proventos: {len(agenda_atualizada)}")
-            print(f"     - Existentes: {total_existentes}")
-            print(f"     - Novos: {len(proventos_unicos)}")
+            # Ordenar por data de pagamento (mais antigo primeiro)
+            agenda_atualizada.sort(
+                key=lambda x: (
+                    x.get('data_pagamento') or '9999-99-99',
+                    x.get('ticker', ''),
+                    x.get('valor', 0)
+                )
+            )
             
+            # Salvar
+            try:
+                with open(self.arquivo_agenda, 'w', encoding='utf-8') as f:
+                    json.dump(agenda_atualizada, f, ensure_ascii=False, indent=2)
+                
+                print(f"  ✅ Agenda salva: {self.arquivo_agenda}")
+                print(f"  📊 Total de proventos: {len(agenda_atualizada)}")
+                print(f"     - Existentes: {total_existentes}")
+                print(f"     - Novos: {len(proventos_unicos)}")
+                
+            except Exception as e:
+                print(f"  ❌ Erro ao salvar: {e}")
+                return 0, total_existentes
+        else:
+            print(f"  ⏭️  Nenhum provento novo: agenda mantida ({total_existentes} proventos)")
+        
+        # Marca d'água só depois da agenda gravada (falha acima = itens reprocessados)
+        self.salvar_estado(processados)
+        
+        # Calendário indexado por data COM (vitrine "próximos proventos" do site)
+        try:
+            caminho, total_calendario, _ = salvar_calendario(self.arquivo_agenda)
+            print(f"  ✅ Calendário: {caminho} ({total_calendario} eventos a partir do mês corrente)")
         except Exception as e:
-            print(f"  ❌ Erro ao salvar: {e}")
-            return 0, total_existentes
+            print(f"  ⚠️  Erro ao gerar calendário: {e}")
         
         # 5. Resumo dos novos
         if proventos_unicos:
@@ -473,11 +639,17 @@ def main():
         default="agenda_dividendos_acoes_investidor10.json",
         help="Caminho do arquivo agenda_dividendos_acoes_investidor10.json"
     )
+    parser.add_argument(
+        "--completo",
+        action="store_true",
+        help="Ignora a marca d'água e reprocessa o feed inteiro"
+    )
     args = parser.parse_args()
     
     atualizador = AtualizadorAgendaDividendos(
         arquivo_feed=args.feed,
-        arquivo_agenda=args.agenda
+        arquivo_agenda=args.agenda,
+        incremental=not args.completo
     )
     
     novos, existentes = atualizador.executar()
@@ -36,6 +36,8 @@ import pandas as pd
 # Importar utilitários do projeto
 sys.path.insert(0, str(Path(__file__).parent))
 from multi_ticker_utils import get_ticker_principal, get_pasta_balanco, load_mapeamento_consolidado
+from armazem_precos import ArmazemPrecos
+from provedores_precos import ProvedorPrecos, ProvedorYahoo
 
 # Tentar importar yfinance
 try:
@@ -112,32 +114,74 @@ def baixar_preco_ultimo_dia(ticker: str, max_dias_atras: int = 10) -> Optional[D
         return None
 
 
-def baixar_precos_lote(tickers: List[str], max_workers: int = 10) -> Dict[str, Optional[Dict]]:
+def _ultimo_dia_armazem(armazem: ArmazemPrecos, ticker: str, max_dias_atras: int = 10) -> Optional[Dict[str, float]]:
+    """Último fechamento do armazém local (mesmo formato de baixar_preco_ultimo_dia)."""
+    ultimo = armazem.ultimo_fechamento(ticker)
+    if ultimo is None:
+        return None
+    if datetime.strptime(ultimo['data'], '%Y-%m-%d') < datetime.now() - timedelta(days=max_dias_atras):
+        return None
+    return {
+        'data': ultimo['data'],
+        'preco_fechamento': ultimo['fechamento'],
+        'preco_ajustado': ultimo['fechamento'],
+        'volume': ultimo['volume'],
+    }
+
+
+def baixar_precos_lote(
+    tickers: List[str],
+    tamanho_lote: int = 50,
+    armazem: Optional[ArmazemPrecos] = None,
+    provedor: Optional[ProvedorPrecos] = None,
+    max_dias_atras: int = 10,
+) -> Dict[str, Optional[Dict]]:
     """
-    Baixa preços para múltiplos tickers em paralelo.
-    
+    Baixa preços para múltiplos tickers com requisições agrupadas.
+
+    Os símbolos vão em lotes de `tamanho_lote` por yf.download(group_by="ticker")
+    (ProvedorYahoo: lote adaptativo, backoff e nova tentativa só dos que falharam),
+    em vez de um yf.Ticker().history() por símbolo.
+
+    Com armazém local (armazem_precos.py), o download é incremental (só os dias que
+    faltam) e o último fechamento é lido do armazém.
+
+    Args:
+        tickers: Tickers B3
+        tamanho_lote: Símbolos por requisição (valor inicial; ajustado em caso de rate limit)
+        armazem: Armazém local de preços (opcional)
+        provedor: Fonte de preços (default: ProvedorYahoo; ProvedorFixture para testes offline)
+        max_dias_atras: Janela de busca do último pregão
+
     Returns:
         {ticker: dados_preco}
     """
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    
-    resultados = {}
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(baixar_preco_ultimo_dia, ticker): ticker 
-            for ticker in tickers
+    if armazem is not None:
+        armazem.atualizar_lote(tickers)
+        return {ticker: _ultimo_dia_armazem(armazem, ticker, max_dias_atras) for ticker in tickers}
+
+    provedor = provedor if provedor is not None else ProvedorYahoo(lote=tamanho_lote)
+    hoje = datetime.now()
+    dados = provedor.baixar(
+        [_ticker_para_yahoo(t) for t in tickers],
+        inicio=(hoje - timedelta(days=max_dias_atras)).strftime('%Y-%m-%d'),
+        # fim é exclusivo (como o end do yfinance): amanhã, para incluir o pregão de hoje
+        fim=(hoje + timedelta(days=1)).strftime('%Y-%m-%d'),
+    )
+
+    resultados: Dict[str, Optional[Dict]] = {}
+    for ticker in tickers:
+        hist = dados.get(_ticker_para_yahoo(ticker))
+        if hist is None or hist.empty:
+            resultados[ticker] = None
+            continue
+        ultimo = hist.iloc[-1]
+        resultados[ticker] = {
+            'data': hist.index[-1].strftime('%Y-%m-%d'),
+            'preco_fechamento': float(ultimo['fechamento']),
+            'preco_ajustado': float(ultimo['fechamento']),
+            'volume': float(ultimo['volume']) if pd.notna(ultimo['volume']) else 0.0,
         }
-        
-        for future in as_completed(futures):
-            ticker = futures[future]
-            try:
-                dados = future.result()
-                resultados[ticker] = dados
-            except Exception as e:
-                print(f"❌ Erro em {ticker}: {e}")
-                resultados[ticker] = None
-    
     return resultados
 
 
@@ -197,6 +241,71 @@ def atualizar_arquivo_precos(ticker: str, preco_novo: Dict[str, float]) -> Tuple
         return False, f"erro: {e}"
 
 
+def _fim_trimestre(periodo: str) -> pd.Timestamp:
+    """'2024T3' -> 2024-09-30."""
+    ano, tri = periodo.split("T")
+    return pd.Timestamp(int(ano), 3 * int(tri), 1) + pd.offsets.MonthEnd(0)
+
+
+def recalcular_precos_trimestrais(
+    ticker: str,
+    armazem: ArmazemPrecos,
+    preco_novo: Dict[str, float],
+) -> Tuple[bool, str]:
+    """
+    Reescreve a linha do ticker em precos_trimestrais.csv inteira a partir do armazém.
+
+    Todos os trimestres saem da mesma série ajustada (as-of no fim do trimestre; o trimestre
+    corrente usa o último pregão), então um provento ou desdobramento novo reajusta também
+    os trimestres antigos, sem rede e sem misturar bases de ajuste na mesma linha.
+    Trimestres sem pregão no armazém mantêm o valor anterior.
+
+    Returns:
+        (sucesso, mensagem)
+    """
+    pasta = get_pasta_balanco(ticker)
+    arquivo_precos = pasta / "precos_trimestrais.csv"
+
+    if not arquivo_precos.exists():
+        return False, "arquivo precos_trimestrais.csv não existe"
+
+    try:
+        df = pd.read_csv(arquivo_precos)
+        if "Ticker" in df.columns:
+            linhas = df.index[df["Ticker"].astype(str).str.upper() == ticker.upper()]
+            if len(linhas) == 0:
+                return False, "ticker ausente em precos_trimestrais.csv"
+            linha = linhas[0]
+        else:
+            linha = df.index[0]
+
+        periodo_atual = _determinar_trimestre(datetime.strptime(preco_novo['data'], '%Y-%m-%d'))
+        if periodo_atual not in df.columns:
+            df[periodo_atual] = np.nan
+
+        periodos = [c for c in df.columns if len(c) == 6 and c[4] == "T" and c[:4].isdigit()]
+        ultimo = pd.Timestamp(preco_novo['data'])
+        datas = [min(_fim_trimestre(p), ultimo) for p in periodos]
+        valores = armazem.precos_em_datas(ticker, datas)
+
+        alterados = 0
+        for periodo, valor in zip(periodos, valores):
+            if np.isnan(valor):
+                continue
+            valor = round(float(valor), 2)
+            if df.at[linha, periodo] != valor:
+                df[periodo] = df[periodo].astype(float)
+                df.at[linha, periodo] = valor
+                alterados += 1
+
+        if alterados:
+            df.to_csv(arquivo_precos, index=False)
+        return True, f"{alterados} trimestre(s) reajustado(s), {periodo_atual}=R${df.at[linha, periodo_atual]}"
+
+    except Exception as e:
+        return False, f"erro: {e}"
+
+
 def atualizar_arquivo_acoes(ticker: str, periodo: str) -> Tuple[bool, str]:
     """
     Atualiza o arquivo acoes_historico.csv para incluir novo período.
@@ -290,7 +399,8 @@ def processar_atualizacao_diaria(
     quantidade: int = 10,
     ticker: str = "",
     lista: str = "",
-    faixa: str = "1-50"
+    faixa: str = "1-50",
+    usar_armazem: bool = True,
 ) -> Tuple[int, int, int]:
     """
     Processa atualização diária de preços e múltiplos.
@@ -360,7 +470,11 @@ def processar_atualizacao_diaria(
     print(f"Baixando preços...\n")
     
     # Baixar preços em lote
-    precos = baixar_precos_lote(tickers_processar, max_workers=10)
+    armazem = ArmazemPrecos() if usar_armazem else None
+    if armazem is not None:
+        # Proventos da B3 já capturados: ajustam a série localmente, sem rebaixar histórico
+        armazem.importar_proventos()
+    precos = baixar_precos_lote(tickers_processar, armazem=armazem)
     
     # Processar cada ticker
     ok_count = 0
@@ -380,8 +494,11 @@ def processar_atualizacao_diaria(
             data_preco = datetime.strptime(preco_dados['data'], '%Y-%m-%d')
             periodo = _determinar_trimestre(data_preco)
             
-            # 2. Atualizar arquivo de preços
-            ok_preco, msg_preco = atualizar_arquivo_precos(ticker_clean, preco_dados)
+            # 2. Atualizar arquivo de preços (com armazém: todos os trimestres, na base de hoje)
+            if armazem is not None:
+                ok_preco, msg_preco = recalcular_precos_trimestrais(ticker_clean, armazem, preco_dados)
+            else:
+                ok_preco, msg_preco = atualizar_arquivo_precos(ticker_clean, preco_dados)
             if not ok_preco:
                 print(f"⚠️  {ticker_clean}: preços - {msg_preco}")
             
@@ -425,6 +542,8 @@ def main():
     parser.add_argument("--ticker", default="")
     parser.add_argument("--lista", default="")
     parser.add_argument("--faixa", default="1-50")
+    parser.add_argument("--sem-armazem", action="store_true",
+                       help="Baixa direto do Yahoo, sem usar o armazém local de preços")
     args = parser.parse_args()
     
     processar_atualizacao_diaria(
@@ -432,7 +551,8 @@ def main():
         quantidade=args.quantidade,
         ticker=args.ticker,
         lista=args.lista,
-        faixa=args.faixa
+        faixa=args.faixa,
+        usar_armazem=not args.sem_armazem,
     )
 
 
@@ -31,12 +31,16 @@ UNIDADES:
 - Market Cap = Preço × Ações / 1000 → resultado em R$ MIL
 
 Saída: JSON + CSV para fácil consumo em HTML/JavaScript
+Modo lote (--lote): pool de processos + painel consolidado e agregados setoriais
+em balancos/MULTIPLOS/
+Ranking de DY (todas as execuções com gravação): balancos/MULTIPLOS/ranking_dy.json
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 import sys
 from dataclasses import dataclass, field
@@ -49,7 +53,15 @@ import pandas as pd
 
 # Importar utilitários do projeto
 sys.path.insert(0, str(Path(__file__).parent))
-from multi_ticker_utils import get_ticker_principal, get_pasta_balanco, load_mapeamento_consolidado
+from multi_ticker_utils import (
+    get_ticker_principal,
+    get_pasta_balanco,
+    load_mapeamento_consolidado,
+    _find_balancos_dir,
+    escrever_se_mudou,
+    hash_conteudo,
+)
+from calendario_dividendos import CalendarioTicker
 
 
 # ======================================================================================
@@ -397,9 +409,18 @@ class DadosEmpresa:
     acoes: Optional[pd.DataFrame] = None
     dividendos: Optional[pd.DataFrame] = None
     dividendos_detalhado: Optional[List[Dict]] = None  # CORREÇÃO v3.0: dados do JSON
+    # Índices de proventos montados uma vez (ver _calendario_dividendos / _dpa_trimestral)
+    calendario_dividendos: Optional[CalendarioTicker] = None
+    dpa_trimestral: Optional[Dict[str, float]] = None
+    # Quantidade de ações por espécie indexada por período (ver _serie_acoes)
+    serie_acoes: Optional["SerieAcoes"] = None
     padrao_fiscal: Optional[PadraoFiscal] = None
     periodos: List[str] = field(default_factory=list)
     erros: List[str] = field(default_factory=list)
+    # Vetores alinhados a `periodos` (pré-calculados na carga; ver _preparar_vetores_ebitda)
+    indice_periodos: Dict[str, int] = field(default_factory=dict)
+    da_periodos: Optional[np.ndarray] = None
+    ebitda_periodos: Optional[np.ndarray] = None
 
 
 def _carregar_csv_padronizado(path: Path) -> Optional[pd.DataFrame]:
@@ -466,6 +487,8 @@ def carregar_dados_empresa(ticker: str) -> DadosEmpresa:
                 dados.dividendos_detalhado = json_data.get('dividendos', [])
         except Exception:
             dados.dividendos_detalhado = None
+    if dados.dividendos_detalhado:
+        dados.calendario_dividendos = CalendarioTicker(dados.dividendos_detalhado)
     
     if dados.dre is None:
         dados.erros.append("DRE padronizado não encontrado")
@@ -478,6 +501,10 @@ def carregar_dados_empresa(ticker: str) -> DadosEmpresa:
         cols = [c for c in dados.dre.columns if _parse_periodo(c)[0] > 0]
         dados.periodos = _ordenar_periodos(cols)
         dados.padrao_fiscal = detectar_padrao_fiscal(ticker_upper, dados.periodos)
+        _preparar_vetores_ebitda(dados)
+    
+    if dados.acoes is not None and not dados.acoes.empty:
+        dados.serie_acoes = SerieAcoes.de_dataframe(dados.acoes)
     
     return dados
 
@@ -738,7 +765,19 @@ def _calcular_fator_unit_pacote(dados: DadosEmpresa, periodo: str) -> int:
     CORREÇÃO v3.0: Usa mapeamento FATOR_UNIT_PADRAO quando não consegue calcular.
 
     Retorna inteiro >= 1. Se não for possível calcular, usa mapeamento padrão ou retorna 1.
+    O resultado fica memorizado por período resolvido em SerieAcoes.fatores_unit.
     """
+    serie = _serie_acoes(dados)
+    i = serie.indice(periodo) if serie is not None else None
+    if i is not None and i in serie.fatores_unit:
+        return serie.fatores_unit[i]
+    fator = _calcular_fator_unit_pacote_sem_cache(dados, periodo)
+    if i is not None:
+        serie.fatores_unit[i] = fator
+    return fator
+
+
+def _calcular_fator_unit_pacote_sem_cache(dados: DadosEmpresa, periodo: str) -> int:
     total_ex11 = _obter_acoes_total_ex11(dados, periodo)
     units = _obter_acoes_unit(dados, periodo)
 
@@ -781,19 +820,19 @@ def _ajustar_acoes_para_ticker_preco(dados: DadosEmpresa, periodo: str, ticker_p
         # tenta usar a própria linha de UNIT se existir
         a_unit = _obter_acoes_unit(dados, periodo_use)
         if np.isfinite(a_unit) and a_unit > 0:
-            return float(a_unit), _encontrar_periodo_imputacao(dados.acoes, periodo_use) or periodo_use, _calcular_fator_unit_pacote(dados, periodo_use)
+            return float(a_unit), _periodo_acoes(dados, periodo_use) or periodo_use, _calcular_fator_unit_pacote(dados, periodo_use)
 
         # fallback: converte ON+PN em "quantidade de UNIT"
         total_ex11 = _obter_acoes_total_ex11(dados, periodo_use)
         fator = _calcular_fator_unit_pacote(dados, periodo_use)
         if np.isfinite(total_ex11) and total_ex11 > 0 and fator >= 1:
-            return float(total_ex11 / fator), _encontrar_periodo_imputacao(dados.acoes, periodo_use) or periodo_use, fator
+            return float(total_ex11 / fator), _periodo_acoes(dados, periodo_use) or periodo_use, fator
 
-        return np.nan, _encontrar_periodo_imputacao(dados.acoes, periodo_use) or periodo_use, fator
+        return np.nan, _periodo_acoes(dados, periodo_use) or periodo_use, fator
 
     # não-unit: regra geral (ON+PN)
     a = _obter_acoes(dados, periodo_use)
-    return float(a) if np.isfinite(a) else np.nan, _encontrar_periodo_imputacao(dados.acoes, periodo_use) or periodo_use, 1
+    return float(a) if np.isfinite(a) else np.nan, _periodo_acoes(dados, periodo_use) or periodo_use, 1
 
 
 def _listar_tickers_saida_multiclasse(dados: DadosEmpresa, ticker_seed: str) -> List[str]:
@@ -860,35 +899,100 @@ def _detectar_coluna_especie(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
-def _obter_acoes_especie(dados: DadosEmpresa, especie: str, periodo: str) -> float:
+def _chave_periodo(periodo: str) -> int:
+    """Chave ordenável de período (ano*10 + trimestre); 0 para não-período."""
+    ano, tri = _parse_periodo(periodo)
+    return ano * 10 + {'T1': 1, 'T2': 2, 'T3': 3, 'T4': 4}.get(tri, 0)
+
+
+@dataclass
+class SerieAcoes:
     """
-    Obtém ações de uma espécie específica (ex.: 'ON', 'PN') no período.
+    acoes_historico.csv já convertido: um vetor de quantidades por espécie, alinhado aos
+    períodos com número válido (ordenados), montado uma vez por ticker.
 
-    ✅ Robustez: tolera formato pt-BR/EN.
-    ✅ Usa imputação de período para evitar cair em colunas inexistentes.
+    Mesma semântica de _encontrar_periodo_imputacao + leitura da linha: período exato,
+    senão o anterior mais próximo (forward fill), senão o posterior (backfill), achado
+    por busca binária nas chaves dos períodos.
     """
+    periodos: List[str]
+    chaves: np.ndarray
+    especies: Dict[str, np.ndarray]       # espécie (maiúscula) -> quantidades (1ª linha da espécie)
+    primeira_valida: np.ndarray           # 1º número de cada coluna (fallback sem espécie/TOTAL)
+    tem_coluna_especie: bool
+    fatores_unit: Dict[int, int] = field(default_factory=dict)  # índice -> fator do pacote UNIT
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> "SerieAcoes":
+        periodos = _get_colunas_numericas_validas(df)
+        valores = (
+            df[periodos].apply(_series_to_numeric_smart) if periodos
+            else pd.DataFrame(index=df.index)
+        )
+        col_especie = _detectar_coluna_especie(df)
+        especies: Dict[str, np.ndarray] = {}
+        if col_especie:
+            rotulos = df[col_especie].astype(str).str.upper().str.strip()
+            for pos, rotulo in enumerate(rotulos):
+                if rotulo not in especies:
+                    especies[rotulo] = valores.iloc[pos].to_numpy(dtype=float)
+        primeira = valores.bfill().iloc[0].to_numpy(dtype=float) if len(valores) else np.full(len(periodos), np.nan)
+        return cls(
+            periodos=periodos,
+            chaves=np.array([_chave_periodo(p) for p in periodos], dtype=np.int64),
+            especies=especies,
+            primeira_valida=primeira,
+            tem_coluna_especie=col_especie is not None,
+        )
+
+    def indice(self, periodo: str) -> Optional[int]:
+        """Posição do período a usar (exato / anterior / posterior) ou None se não há períodos."""
+        if not self.periodos:
+            return None
+        i = int(np.searchsorted(self.chaves, _chave_periodo(periodo), side="right"))
+        return i - 1 if i > 0 else 0
+
+    def periodo(self, periodo: str) -> Optional[str]:
+        """Equivalente a _encontrar_periodo_imputacao(acoes, periodo)."""
+        i = self.indice(periodo)
+        return self.periodos[i] if i is not None else None
+
+    def valor(self, especie: str, periodo: str) -> float:
+        i = self.indice(periodo)
+        vetor = self.especies.get(especie)
+        if i is None or vetor is None:
+            return np.nan
+        v = vetor[i]
+        return float(v) if np.isfinite(v) else np.nan
+
+
+def _serie_acoes(dados: DadosEmpresa) -> Optional[SerieAcoes]:
+    """Série de ações do ticker; monta sob demanda se o DadosEmpresa não veio do carregador."""
     if dados.acoes is None or dados.acoes.empty:
-        return np.nan
+        return None
+    if dados.serie_acoes is None:
+        dados.serie_acoes = SerieAcoes.de_dataframe(dados.acoes)
+    return dados.serie_acoes
 
-    df = dados.acoes
-    col_especie = _detectar_coluna_especie(df)
-    if not col_especie:
-        return np.nan
 
-    periodo_busca = _encontrar_periodo_imputacao(df, periodo)
-    if not periodo_busca:
-        col_periodos = _get_colunas_numericas_validas(df)
-        if not col_periodos:
-            return np.nan
-        periodo_busca = col_periodos[-1]
+def _periodo_acoes(dados: DadosEmpresa, periodo: str) -> Optional[str]:
+    """Período de acoes_historico.csv usado para `periodo` (com imputação)."""
+    serie = _serie_acoes(dados)
+    return serie.periodo(periodo) if serie is not None else None
 
-    serie = df[col_especie].astype(str).str.upper().str.strip()
-    mask = serie.eq(str(especie).upper().strip())
-    if not mask.any():
+
+def _obter_acoes_especie(dados: DadosEmpresa, especie: str, periodo: str) -> float:
+    """
+    Obtém ações de uma espécie específica (ex.: 'ON', 'PN') no período.
+
+    ✅ Robustez: tolera formato pt-BR/EN.
+    ✅ Usa imputação de período para evitar cair em colunas inexistentes.
+    """
+    serie = _serie_acoes(dados)
+    if serie is None or not serie.tem_coluna_especie:
         return np.nan
 
-    val = _to_float_smart(df.loc[mask, periodo_busca].iloc[0])
-    return float(val) if np.isfinite(val) else np.nan
+    return serie.valor(str(especie).upper().strip(), periodo)
 
 def _obter_acoes_total_ex11(dados: DadosEmpresa, periodo: str) -> float:
     """
@@ -911,27 +1015,16 @@ def _obter_acoes_total_ex11(dados: DadosEmpresa, periodo: str) -> float:
         return pn
 
     # fallback TOTAL
-    df = dados.acoes
-    col_especie = _detectar_coluna_especie(df)
-    periodo_busca = _encontrar_periodo_imputacao(df, periodo)
-    if not periodo_busca:
-        col_periodos = _get_colunas_numericas_validas(df)
-        if not col_periodos:
-            return np.nan
-        periodo_busca = col_periodos[-1]
+    serie = _serie_acoes(dados)
+    i = serie.indice(periodo)
+    if i is None:
+        return np.nan
 
-    if col_especie:
-        serie = df[col_especie].astype(str).str.upper().str.strip()
-        mask = serie.eq("TOTAL")
-        if mask.any():
-            val = _to_float_smart(df.loc[mask, periodo_busca].iloc[0])
-            return float(val) if np.isfinite(val) else np.nan
+    if "TOTAL" in serie.especies:
+        return serie.valor("TOTAL", periodo)
 
-    s = _series_to_numeric_smart(df[periodo_busca])
-    if s.notna().any():
-        return float(s.dropna().iloc[0])
-
-    return np.nan
+    v = serie.primeira_valida[i]
+    return float(v) if np.isfinite(v) else np.nan
 
 def _periodos_numericos(df: pd.DataFrame) -> List[str]:
     if df is None:
@@ -993,7 +1086,7 @@ def _obter_acoes_atual(dados: DadosEmpresa) -> Tuple[float, str]:
     if dados.acoes is None or dados.acoes.empty:
         return np.nan, ""
 
-    col_periodos = _get_colunas_numericas_validas(dados.acoes)
+    col_periodos = _serie_acoes(dados).periodos
     if not col_periodos:
         return np.nan, ""
 
@@ -1007,7 +1100,12 @@ def _obter_acoes_atual(dados: DadosEmpresa) -> Tuple[float, str]:
 
 
 
-def _calcular_market_cap(dados: DadosEmpresa, periodo: str, ticker_preco: Optional[str] = None) -> float:
+def _calcular_market_cap(
+    dados: DadosEmpresa,
+    periodo: str,
+    ticker_preco: Optional[str] = None,
+    fallback_preco_atual: bool = True,
+) -> float:
     """
     Calcula Market Cap (R$ mil) para um período.
 
@@ -1021,7 +1119,8 @@ def _calcular_market_cap(dados: DadosEmpresa, periodo: str, ticker_preco: Option
 
     Observação:
     - Ações são obtidas com imputação via _obter_acoes_especie/_obter_acoes_total_ex11.
-    - Preço do período usa a coluna do próprio período; se faltar, cai no último preço disponível.
+    - Preço do período usa a coluna do próprio período; se faltar, cai no último preço disponível
+      (fallback_preco_atual=False: sem esse fallback, a parcela sem preço fica de fora/NaN).
     """
     periodo = str(periodo or "").upper().strip()
     if not periodo:
@@ -1032,6 +1131,8 @@ def _calcular_market_cap(dados: DadosEmpresa, periodo: str, ticker_preco: Option
         p = _obter_preco(dados, periodo, ticker_preco=t)
         if np.isfinite(p) and p > 0:
             return float(p)
+        if not fallback_preco_atual:
+            return np.nan
         p2, _ = _obter_preco_atual(dados, ticker_preco=t)
         return float(p2) if np.isfinite(p2) else np.nan
 
@@ -1368,61 +1469,108 @@ def _obter_valor_medio(
 # CÁLCULO DE D&A E EBITDA - CORRIGIDOS
 # ======================================================================================
 
-def _calcular_da_periodo(dados: DadosEmpresa, periodo: str) -> float:
+# Uma única passada de regex classifica as linhas da DFC relevantes para D&A:
+#   grupo 1 -> código sintético 6.01.DA
+#   grupo 2 -> ramo 01/02 sob 6.01.01 (6.01.01.01 / 6.01.01.02)
+#   grupo 3 -> presente quando é subconta do ramo (6.01.01.0X.*)
+_RE_DA_DFC = r"^6\.01\.(?:(DA)$|01\.(01|02)(?:(\.)|$))"
+
+
+def _vetor_da(dfc: Optional[pd.DataFrame], periodos: List[str]) -> np.ndarray:
     """
-    Calcula D&A (Depreciação e Amortização) de um período de forma **robusta**.
+    Calcula D&A (Depreciação e Amortização) de vários períodos de uma vez, de forma **robusta**.
 
     Problema comum (que derruba EV/EBITDA): usar agregadores amplos de DFC (ex.: 6.01.01)
     como se fossem D&A. Em muitas companhias, 6.01.01 representa "Ajustes" (com vários itens),
     o que superestima o EBITDA.
 
-    Regra (universal):
+    Regra (universal), aplicada período a período:
     1) Prioriza código sintético 6.01.DA (se existir).
-    2) Depois tenta códigos específicos de D&A (6.01.01.02 e 6.01.01.01).
-    3) Se não encontrar, NÃO usa o agregador 6.01.01 (evita superestimar); retorna NaN.
+    2) Depois tenta códigos específicos de D&A (6.01.01.02 e 6.01.01.01): conta exata ou,
+       se não existir, soma das subcontas do ramo.
+    3) Fallback: soma dos módulos de todo o ramo 6.01.01.(01|02).* (se > 0).
+    4) Se não encontrar, NÃO usa o agregador 6.01.01 (evita superestimar); retorna NaN.
        Nesse caso, o EBITDA do período vira uma aproximação conservadora (= EBIT).
     """
-    if dados.dfc is None or periodo not in dados.dfc.columns:
-        return np.nan
+    out = np.full(len(periodos), np.nan)
+    if dfc is None or 'cd_conta' not in dfc.columns:
+        return out
+
+    pos = [i for i, p in enumerate(periodos) if p in dfc.columns]
+    if not pos:
+        return out
+    cols = [periodos[i] for i in pos]
+
+    classes = dfc['cd_conta'].astype(str).str.extract(_RE_DA_DFC)
+    relevantes = (classes[0].notna() | classes[1].notna()).to_numpy()
+    if not relevantes.any():
+        return out
+
+    classes = classes[relevantes]
+    matriz = dfc.loc[relevantes, cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    ramo = classes[1].to_numpy(dtype=object)
+    subconta = classes[2].notna().to_numpy()
+
+    da = np.full(len(cols), np.nan)
+
+    def _preencher(vals: np.ndarray) -> None:
+        faltando = ~np.isfinite(da) & np.isfinite(vals)
+        da[faltando] = np.abs(vals[faltando])
+
+    # 1) Preferência máxima: código sintético gerado pelo pipeline (quando existir)
+    sintetico = classes[0].notna().to_numpy()
+    if sintetico.any():
+        _preencher(matriz[np.argmax(sintetico)])
+
+    # 2) Códigos específicos de D&A (mesma regra de _extrair_valor_conta)
+    for cd in ("02", "01"):
+        do_ramo = ramo == cd
+        exata = do_ramo & ~subconta
+        if exata.any():
+            _preencher(matriz[np.argmax(exata)])
+        elif (do_ramo & subconta).any():
+            _preencher(np.nansum(matriz[do_ramo & subconta], axis=0))
+
+    # 3) Fallback: qualquer linha do ramo 6.01.01.(01|02), somando módulos
+    soma = np.nansum(np.abs(matriz[pd.notna(ramo)]), axis=0)
+    faltando = ~np.isfinite(da) & (soma > 0)
+    da[faltando] = soma[faltando]
+
+    out[pos] = da
+    return out
 
-    dfc = dados.dfc
-    if 'cd_conta' not in dfc.columns:
-        return np.nan
 
-    def _val_exato(cd: str) -> float:
-        mask = (dfc['cd_conta'] == cd)
-        if mask.any():
-            v = pd.to_numeric(dfc.loc[mask, periodo], errors='coerce').values[0]
-            return float(v) if pd.notna(v) else np.nan
-        return np.nan
+def _preparar_vetores_ebitda(dados: DadosEmpresa) -> None:
+    """
+    Pré-calcula (uma vez por ticker) os vetores de D&A e EBITDA alinhados a dados.periodos.
 
-    # 1) Preferência máxima: código sintético gerado pelo seu pipeline (quando existir)
-    val = _val_exato("6.01.DA")
-    if np.isfinite(val):
-        return abs(val)
+    EBITDA = EBIT + D&A (D&A robusto via DFC; se D&A indisponível, aproxima por EBIT).
+    """
+    periodos = dados.periodos
+    dados.indice_periodos = {p: i for i, p in enumerate(periodos)}
+    dados.da_periodos = _vetor_da(dados.dfc, periodos)
 
-    # 2) Preferência: códigos específicos de D&A (podem ter subcontas; aqui permitimos soma do ramo específico)
-    for cd in ("6.01.01.02", "6.01.01.01"):
-        v = _extrair_valor_conta(dfc, cd, periodo)
-        if np.isfinite(v):
-            return abs(v)
+    ebit = _serie_conta(dados.dre, [CONTAS_DRE["ebit"]], periodos)
+    dados.ebitda_periodos = np.where(np.isfinite(dados.da_periodos), ebit + dados.da_periodos, ebit)
 
-    # 3) Fallback: tentar encontrar qualquer subconta típica de D&A sob 6.01.01.*
-    # (sem recorrer ao agregador 6.01.01, que costuma englobar diversos "Ajustes")
-    try:
-        ser_cd = dfc['cd_conta'].astype(str)
-    except Exception:
-        return np.nan
 
-    # Preferir padrões clássicos: ...01 ou ...02 logo abaixo de 6.01.01
-    candidatos = dfc[ser_cd.str.match(r"^6\.01\.01\.(01|02)(\.|$)", na=False)]
-    if not candidatos.empty:
-        vals = pd.to_numeric(candidatos[periodo], errors='coerce')
-        soma = float(np.nansum(np.abs(vals.values)))
-        return soma if np.isfinite(soma) and soma > 0 else np.nan
+def _vetores_ebitda(dados: DadosEmpresa) -> Tuple[np.ndarray, np.ndarray]:
+    """Vetores (D&A, EBITDA) por período; calcula sob demanda se o DadosEmpresa não veio do carregador."""
+    if dados.ebitda_periodos is None or len(dados.ebitda_periodos) != len(dados.periodos):
+        _preparar_vetores_ebitda(dados)
+    return dados.da_periodos, dados.ebitda_periodos
+
+
+def _calcular_da_periodo(dados: DadosEmpresa, periodo: str) -> float:
+    """D&A de um período (ver regras em _vetor_da)."""
+    idx = dados.indice_periodos.get(periodo) if dados.indice_periodos else None
+    if idx is None or dados.da_periodos is None:
+        if periodo not in dados.periodos:
+            return float(_vetor_da(dados.dfc, [periodo])[0])
+        _preparar_vetores_ebitda(dados)
+        idx = dados.indice_periodos[periodo]
+    return float(dados.da_periodos[idx])
 
-    # Não usar 6.01.01 (agregador amplo) para não superestimar EBITDA
-    return np.nan
 
 def _calcular_ebitda_periodo(dados: DadosEmpresa, periodo: str) -> float:
     """
@@ -1431,49 +1579,67 @@ def _calcular_ebitda_periodo(dados: DadosEmpresa, periodo: str) -> float:
     Regra: EBITDA = EBIT + D&A (D&A robusto via DFC; se D&A indisponível, aproxima por EBIT).
     Isso evita superestimar EBITDA quando o DFC traz um agregador amplo de ajustes.
     """
-    ebit = _extrair_valor_conta(dados.dre, CONTAS_DRE["ebit"], periodo)
-    
-    if not np.isfinite(ebit):
-        return np.nan
-    
-    da = _calcular_da_periodo(dados, periodo)
-    
-    if np.isfinite(da):
-        return ebit + da
-    
-    # Se não tem D&A, retorna EBIT como aproximação
-    return ebit
+    _, ebitda = _vetores_ebitda(dados)
+    idx = dados.indice_periodos.get(periodo)
+    if idx is None:
+        ebit = _extrair_valor_conta(dados.dre, CONTAS_DRE["ebit"], periodo)
+        if not np.isfinite(ebit):
+            return np.nan
+        da = _calcular_da_periodo(dados, periodo)
+        return ebit + da if np.isfinite(da) else ebit
+    return float(ebitda[idx])
 
 
 def _calcular_ebitda_ltm(dados: DadosEmpresa, periodo_fim: str) -> float:
-    """Calcula EBITDA LTM somando os últimos 4 trimestres."""
+    """Calcula EBITDA LTM somando os últimos 4 trimestres (fatia do vetor pré-calculado)."""
     if dados.padrao_fiscal is None:
         return np.nan
-    
-    periodos = dados.periodos
-    if periodo_fim not in periodos:
+
+    _, ebitda = _vetores_ebitda(dados)
+    idx_fim = dados.indice_periodos.get(periodo_fim)
+    if idx_fim is None:
         return np.nan
-    
-    idx_fim = periodos.index(periodo_fim)
-    padrao = dados.padrao_fiscal
-    
-    n_periodos = 3 if padrao.tipo == 'SEMESTRAL' else 4
-    start_idx = max(0, idx_fim - n_periodos + 1)
-    periodos_ltm = periodos[start_idx:idx_fim + 1]
-    
-    soma = 0.0
-    count = 0
-    
-    for p in periodos_ltm:
-        ebitda = _calcular_ebitda_periodo(dados, p)
-        if np.isfinite(ebitda):
-            soma += ebitda
-            count += 1
-    
-    if count < n_periodos:
+
+    n_periodos = 3 if dados.padrao_fiscal.tipo == 'SEMESTRAL' else 4
+    if idx_fim + 1 < n_periodos:
         return np.nan
-    
-    return soma
+
+    janela = ebitda[idx_fim - n_periodos + 1:idx_fim + 1]
+    if not np.isfinite(janela).all():
+        return np.nan
+
+    return float(janela.sum())
+
+
+def _calendario_dividendos(dados: DadosEmpresa) -> CalendarioTicker:
+    """Calendário de proventos do ticker (data COM ordenada); monta sob demanda se preciso."""
+    if dados.calendario_dividendos is None:
+        dados.calendario_dividendos = CalendarioTicker(dados.dividendos_detalhado or [])
+    return dados.calendario_dividendos
+
+
+def _dpa_trimestral(dados: DadosEmpresa) -> Dict[str, float]:
+    """
+    {período: DPA} de dividendos_trimestrais.csv (primeiro valor numérico de cada coluna),
+    calculado uma vez por ticker em vez de converter a coluna a cada consulta.
+    """
+    if dados.dpa_trimestral is None:
+        dados.dpa_trimestral = {}
+        if dados.dividendos is not None:
+            colunas_div = [c for c in dados.dividendos.columns if _parse_periodo(c)[0] > 0]
+            if colunas_div and len(dados.dividendos) > 0:
+                valores = dados.dividendos[colunas_div].apply(pd.to_numeric, errors='coerce')
+                primeiros = valores.bfill().iloc[0]
+                dados.dpa_trimestral = {c: float(v) for c, v in primeiros.items() if pd.notna(v)}
+    return dados.dpa_trimestral
+
+
+def _periodos_12m(periodo_fim: str) -> List[str]:
+    """Os 4 trimestres da janela LTM terminada em periodo_fim (ano atual T1..T_fim + ano anterior)."""
+    ano_fim, tri_fim = _parse_periodo(periodo_fim)
+    tri_num = {'T1': 1, 'T2': 2, 'T3': 3, 'T4': 4}.get(tri_fim, 0)
+    return [f"{ano_fim}T{t}" for t in range(1, tri_num + 1)] + \
+           [f"{ano_fim - 1}T{t}" for t in range(tri_num + 1, 5)]
 
 
 def _calcular_dividendos_ltm(dados: DadosEmpresa, periodo_fim: str) -> float:
@@ -1507,49 +1673,16 @@ def _calcular_dividendos_ltm(dados: DadosEmpresa, periodo_fim: str) -> float:
     if ano_fim == 0:
         return np.nan
     
-    tri_num = {'T1': 1, 'T2': 2, 'T3': 3, 'T4': 4}.get(tri_fim, 0)
-    
-    # Obter todas as colunas de dividendos disponíveis
-    colunas_div = [c for c in dados.dividendos.columns if _parse_periodo(c)[0] > 0]
-    
-    periodos_12m = []
-    
-    # ========== LÓGICA CORRIGIDA ==========
-    
-    # Passo 1: Ano atual - T1 até T_fim
-    # Ex: Se tri_fim=3 (2025T3) → adiciona 2025T1, 2025T2, 2025T3
-    for t in range(1, tri_num + 1):
-        periodos_12m.append(f"{ano_fim}T{t}")
-    
-    # Passo 2: Ano anterior - T(tri_fim + 1) até T4
-    # Ex: Se tri_fim=3 (2025T3) → adiciona 2024T4
-    for t in range(tri_num + 1, 5):
-        periodos_12m.append(f"{ano_fim - 1}T{t}")
-    
-    # ✅ CORREÇÃO: REMOVIDO loop duplicado que adicionava trimestres extras
-    # ANTES (BUG):
-    # for t in range(1, tri_num + 1):
-    #     p = f"{ano_fim - 1}T{t}"
-    #     if p not in periodos_12m:
-    #         periodos_12m.append(p)
-    # ↑ Isso adicionava 2024T1, 2024T2, 2024T3 → total = 7 trimestres (errado!)
-    
-    # AGORA: Total sempre = 4 trimestres ✅
-    
-    # ========================================
-    
-    # Buscar dividendos em todos esses períodos (4 trimestres)
+    # Total sempre = 4 trimestres (ano atual T1..T_fim + ano anterior T_fim+1..T4)
+    dpa = _dpa_trimestral(dados)
     soma = 0.0
     
-    for p in periodos_12m:
-        if p in colunas_div:
-            vals = pd.to_numeric(dados.dividendos[p], errors='coerce').dropna()
-            if len(vals) > 0:
-                div_por_acao = float(vals.iloc[0])
-                if np.isfinite(div_por_acao) and div_por_acao > 0:
-                    # Converter dividendos por ação em dividendos totais (R$ MIL)
-                    div_total_mil = (div_por_acao * num_acoes) / 1000.0
-                    soma += div_total_mil
+    for p in _periodos_12m(periodo_fim):
+        div_por_acao = dpa.get(p, np.nan)
+        if np.isfinite(div_por_acao) and div_por_acao > 0:
+            # Converter dividendos por ação em dividendos totais (R$ MIL)
+            div_total_mil = (div_por_acao * num_acoes) / 1000.0
+            soma += div_total_mil
     
     return soma if soma > 0 else np.nan
 
@@ -1577,34 +1710,12 @@ def _calcular_dpa_ltm(dados: DadosEmpresa, periodo_fim: str) -> float:
     Returns:
         DPA LTM em R$/ação
     """
-    from datetime import datetime, timedelta
-    from collections import defaultdict
-    
     # Usar dividendos_detalhado.json se disponível
     if dados.dividendos_detalhado and len(dados.dividendos_detalhado) > 0:
-        # CORREÇÃO v3.2: Usar DATA ATUAL como referência (como Fundamentus)
-        data_ref = datetime.now()
-        
-        # Últimos 12 meses a partir de HOJE
-        data_inicio = data_ref - timedelta(days=365)
-        
-        # Agrupar por (data_com, tipo) e pegar MÁXIMO
-        # Isso evita somar dividendos ON + PN (que são o mesmo evento de provento)
-        # Cada (data_com, tipo) representa UM evento de provento da empresa
-        por_evento = defaultdict(float)
-        for d in dados.dividendos_detalhado:
-            try:
-                data_com = datetime.strptime(d['data_com'], '%Y-%m-%d')
-                if data_inicio < data_com <= data_ref:
-                    # Chave: (data_com, tipo) - um evento por data/tipo
-                    chave = (d['data_com'], d.get('tipo', ''))
-                    # Pegar o MÁXIMO valor para cada evento (ON e PN podem ter valores ligeiramente diferentes)
-                    por_evento[chave] = max(por_evento[chave], d['valor'])
-            except (ValueError, KeyError):
-                continue
-        
-        # Somar valores de cada evento único
-        soma_dpa = sum(por_evento.values())
+        # CORREÇÃO v3.2: Janela de 12 meses até HOJE (como Fundamentus): hoje-365 < data_com <= hoje.
+        # O calendário já agrupa por (data_com, tipo) com o MÁXIMO valor (ON + PN são o
+        # mesmo evento) e soma a janela por busca binária.
+        soma_dpa = _calendario_dividendos(dados).ltm(datetime.now())
         return soma_dpa if soma_dpa > 0 else np.nan
     
     # Fallback: usar dividendos_trimestrais.csv (método antigo)
@@ -1612,29 +1723,15 @@ def _calcular_dpa_ltm(dados: DadosEmpresa, periodo_fim: str) -> float:
         return np.nan
     
     ano_fim, tri_fim = _parse_periodo(periodo_fim)
-    if ano_fim == 0:
+    if ano_fim == 0 or tri_fim not in ('T1', 'T2', 'T3', 'T4'):
         return np.nan
     
-    tri_num = {'T1': 1, 'T2': 2, 'T3': 3, 'T4': 4}.get(tri_fim, 0)
-    if tri_num == 0:
-        return np.nan
-    
-    colunas_div = [c for c in dados.dividendos.columns if _parse_periodo(c)[0] > 0]
-    
-    periodos_12m = []
-    for t in range(1, tri_num + 1):
-        periodos_12m.append(f"{ano_fim}T{t}")
-    for t in range(tri_num + 1, 5):
-        periodos_12m.append(f"{ano_fim - 1}T{t}")
-    
+    dpa_trimestral = _dpa_trimestral(dados)
     soma_dpa = 0.0
-    for p in periodos_12m:
-        if p in colunas_div:
-            vals = pd.to_numeric(dados.dividendos[p], errors='coerce').dropna()
-            if len(vals) > 0:
-                dpa = float(vals.iloc[0])
-                if np.isfinite(dpa) and dpa >= 0:
-                    soma_dpa += dpa
+    for p in _periodos_12m(periodo_fim):
+        dpa = dpa_trimestral.get(p, np.nan)
+        if np.isfinite(dpa) and dpa >= 0:
+            soma_dpa += dpa
     
     return soma_dpa if soma_dpa > 0 else np.nan
 
@@ -2351,6 +2448,26 @@ MULTIPLOS_SEGURADORAS_METADATA = {
 }
 
 
+# Metadados por tipo de empresa (publicados uma única vez em multiplos_metadata.js)
+METADATA_POR_TIPO: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "empresas": MULTIPLOS_METADATA,
+    "bancos": MULTIPLOS_BANCOS_METADATA,
+    "holdings_seguros": MULTIPLOS_HOLDINGS_SEGUROS_METADATA,
+    "seguradoras": MULTIPLOS_SEGURADORAS_METADATA,
+}
+
+
+def _tipo_metadata(ticker: str) -> str:
+    """Chave de METADATA_POR_TIPO aplicável ao ticker."""
+    if _is_banco(ticker):
+        return "bancos"
+    if _is_holding_seguros(ticker):
+        return "holdings_seguros"
+    if _is_seguradora_operacional(ticker):
+        return "seguradoras"
+    return "empresas"
+
+
 # ======================================================================================
 # DETECTOR DE CÓDIGO DO PL PARA BANCOS
 # ======================================================================================
@@ -2823,13 +2940,161 @@ def calcular_multiplos_seguradora(dados: DadosEmpresa, periodo: str, usar_preco_
     
     return resultado
 
+# ======================================================================================
+# SÉRIE TRIMESTRAL (VALUATION BANDS)
+# ======================================================================================
+
+# Múltiplos emitidos na série trimestral (bancos: sem EV/EBITDA e Margem EBITDA)
+MULTIPLOS_TRIMESTRAIS = ["P_L", "P_VPA", "EV_EBITDA", "ROE", "MARGEM_EBITDA", "MARGEM_LIQUIDA"]
+MULTIPLOS_TRIMESTRAIS_BANCOS = ["P_L", "P_VPA", "ROE", "MARGEM_LIQUIDA"]
+
+
+def _serie_conta(df: Optional[pd.DataFrame], codigos: List[str], periodos: List[str]) -> np.ndarray:
+    """
+    Versão vetorizada de _buscar_conta_flexivel/_extrair_valor_conta para vários períodos.
+
+    Mesma regra: conta exata (primeira linha) ou, se não existir, soma das subcontas;
+    com vários códigos, cada período usa o primeiro código com valor finito.
+    """
+    out = np.full(len(periodos), np.nan)
+    if df is None or 'cd_conta' not in df.columns:
+        return out
+
+    pos = [i for i, p in enumerate(periodos) if p in df.columns]
+    cols = [periodos[i] for i in pos]
+    if not cols:
+        return out
+
+    for cd in codigos:
+        mask_exata = df['cd_conta'] == cd
+        if mask_exata.any():
+            vals = pd.to_numeric(df.loc[mask_exata, cols].iloc[0], errors='coerce').to_numpy(dtype=float)
+        else:
+            mask_sub = df['cd_conta'].str.startswith(cd + '.')
+            if not mask_sub.any():
+                continue
+            vals = df.loc[mask_sub, cols].apply(pd.to_numeric, errors='coerce').sum(skipna=True).to_numpy(dtype=float)
+
+        alvo = out[pos]
+        faltando = ~np.isfinite(alvo)
+        alvo[faltando] = vals[faltando]
+        out[pos] = alvo
+        if np.isfinite(out[pos]).all():
+            break
+
+    return out
+
+
+def _rolling_ltm(valores: np.ndarray, n: int) -> np.ndarray:
+    """Soma móvel de n períodos exigindo os n valores (mesma regra de _calcular_ltm)."""
+    return pd.Series(valores).rolling(n, min_periods=n).sum().to_numpy(dtype=float)
+
+
+def _serie_normalizada(valores: np.ndarray, decimals: int = 4) -> List[Optional[float]]:
+    return [_normalizar_valor(v, decimals) for v in valores]
+
+
+def gerar_serie_trimestral(dados: DadosEmpresa, ticker_preco: Optional[str] = None) -> Optional[Dict[str, List]]:
+    """
+    Série trimestral de múltiplos (um ponto por trimestre reportado), em formato colunar:
+
+        {"periodos": [...], "preco": [...], "P_L": [...], "EV_EBITDA": [...], ...}
+
+    Contas são lidas uma vez como vetores (todos os períodos) e os LTM saem de somas
+    móveis, em vez de repetir as buscas por conta a cada trimestre. Preço = fechamento do
+    próprio trimestre (sem fallback para o preço atual, para não distorcer as bandas).
+
+    Holdings de seguros e seguradoras operacionais (contas específicas por ticker) não
+    têm série trimestral.
+    """
+    if not dados.periodos or dados.padrao_fiscal is None or dados.dre is None:
+        return None
+    if _is_holding_seguros(dados.ticker) or _is_seguradora_operacional(dados.ticker):
+        return None
+
+    banco = _is_banco(dados.ticker)
+    periodos = list(dados.periodos)
+    n_ltm = dados.padrao_fiscal.trimestres_ltm
+
+    ll_ltm = _rolling_ltm(_serie_conta(dados.dre, [CONTAS_DRE["lucro_liquido"]], periodos), n_ltm)
+    receita_ltm = _rolling_ltm(_serie_conta(dados.dre, [CONTAS_DRE["receita"]], periodos), n_ltm)
+
+    pl_code = _detectar_codigo_pl_banco(dados.bpp) if banco else CONTAS_BPP["patrimonio_liquido"]
+    pl = _serie_conta(dados.bpp, [pl_code], periodos)
+    pl_ant = np.concatenate([np.full(min(4, len(pl)), np.nan), pl[:-4]]) if len(pl) > 4 else np.full(len(pl), np.nan)
+    pl_medio = np.where(np.isfinite(pl) & np.isfinite(pl_ant), (pl + pl_ant) / 2, pl)
+
+    preco = np.array([_obter_preco(dados, p, ticker_preco=ticker_preco) for p in periodos], dtype=float)
+    # ações mudam só nos períodos presentes em acoes_historico.csv: resolve uma vez por período de ações
+    cache_acoes: Dict[str, float] = {}
+    acoes_lista: List[float] = []
+    for p in periodos:
+        p_acoes = _periodo_acoes(dados, p)
+        chave = p_acoes or p
+        if chave not in cache_acoes:
+            cache_acoes[chave] = _ajustar_acoes_para_ticker_preco(dados, chave, ticker_preco)[0]
+        acoes_lista.append(cache_acoes[chave])
+    acoes = np.array(acoes_lista, dtype=float)
+    acoes = np.where(np.isfinite(acoes) & (acoes > 0), acoes, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lpa = ll_ltm * 1000.0 / acoes
+        vpa = pl * 1000.0 / acoes
+        serie: Dict[str, np.ndarray] = {
+            "P_L": preco / lpa,
+            "P_VPA": preco / vpa,
+            "ROE": ll_ltm / pl_medio * 100,
+            "MARGEM_LIQUIDA": ll_ltm / receita_ltm * 100,
+        }
+
+        if banco:
+            serie["ROE"] = np.where(pl_medio > 0, serie["ROE"], np.nan)
+            serie["MARGEM_LIQUIDA"] = np.where(receita_ltm > 0, serie["MARGEM_LIQUIDA"], np.nan)
+        else:
+            ebitda_ltm = _rolling_ltm(_vetores_ebitda(dados)[1], n_ltm)
+
+            emp_cp = np.nan_to_num(_serie_conta(dados.bpp, [CONTAS_BPP["emprestimos_cp"], "2.01.04", "2.01.04.01"], periodos))
+            emp_lp = np.nan_to_num(_serie_conta(dados.bpp, [CONTAS_BPP["emprestimos_lp"], "2.02.01", "2.02.01.01"], periodos))
+            caixa = np.nan_to_num(_serie_conta(dados.bpa, [CONTAS_BPA["caixa"]], periodos))
+            aplic = np.nan_to_num(_serie_conta(dados.bpa, [CONTAS_BPA["aplicacoes"]], periodos))
+            # VM com o fechamento do próprio trimestre; sem preço no trimestre o EV fica NaN
+            market_cap = np.array(
+                [_calcular_market_cap(dados, p, ticker_preco=None, fallback_preco_atual=False) for p in periodos],
+                dtype=float,
+            )
+            ev = market_cap + emp_cp + emp_lp - caixa - aplic
+
+            serie["EV_EBITDA"] = ev / ebitda_ltm
+            serie["MARGEM_EBITDA"] = ebitda_ltm / receita_ltm * 100
+
+    # divisões por zero / infinitos -> NaN (mesma semântica de _safe_divide)
+    for cod, vals in serie.items():
+        serie[cod] = np.where(np.isfinite(vals), vals, np.nan)
+
+    codigos = MULTIPLOS_TRIMESTRAIS_BANCOS if banco else MULTIPLOS_TRIMESTRAIS
+    saida: Dict[str, List] = {"periodos": periodos, "preco": _serie_normalizada(preco, 2)}
+    for cod in codigos:
+        saida[cod] = _serie_normalizada(serie[cod])
+    return saida
+
+
 # ======================================================================================
 # GERADOR DE HISTÓRICO ANUALIZADO
 # ======================================================================================
 
 
-def gerar_historico_anualizado(dados: DadosEmpresa, ticker_preco: Optional[str] = None, ticker_saida: Optional[str] = None) -> Dict[str, Any]:
-    """Gera histórico de múltiplos anualizado."""
+def gerar_historico_anualizado(
+    dados: DadosEmpresa,
+    ticker_preco: Optional[str] = None,
+    ticker_saida: Optional[str] = None,
+    incluir_trimestral: bool = False,
+) -> Dict[str, Any]:
+    """
+    Gera histórico de múltiplos anualizado.
+
+    Com incluir_trimestral=True, adiciona a chave "historico_trimestral" (série colunar
+    de gerar_serie_trimestral) ao resultado.
+    """
     if not dados.periodos or dados.padrao_fiscal is None:
         return {"erro": "Dados insuficientes", "ticker": dados.ticker}
 
@@ -2904,7 +3169,7 @@ def gerar_historico_anualizado(dados: DadosEmpresa, ticker_preco: Optional[str]
         if np.isfinite(acoes_eq) and acoes_eq > 0:
             acoes_atual = acoes_eq
 
-    return {
+    resultado = {
         "ticker": ticker_out,
         "ticker_preco": (ticker_preco or ticker_out).upper().strip(),
         "padrao_fiscal": {
@@ -2912,12 +3177,8 @@ def gerar_historico_anualizado(dados: DadosEmpresa, ticker_preco: Optional[str]
             "descricao": dados.padrao_fiscal.descricao,
             "trimestres_ltm": dados.padrao_fiscal.trimestres_ltm
         },
-        "metadata": (
-            MULTIPLOS_BANCOS_METADATA if _is_banco(dados.ticker)
-            else MULTIPLOS_HOLDINGS_SEGUROS_METADATA if _is_holding_seguros(dados.ticker)
-            else MULTIPLOS_SEGURADORAS_METADATA if _is_seguradora_operacional(dados.ticker)
-            else MULTIPLOS_METADATA
-        ),
+        "metadata_ref": _tipo_metadata(dados.ticker),
+        "metadata": METADATA_POR_TIPO[_tipo_metadata(dados.ticker)],
         "historico_anual": historico_anual,
         "ltm": {
             "periodo_referencia": ultimo_periodo,
@@ -2932,6 +3193,13 @@ def gerar_historico_anualizado(dados: DadosEmpresa, ticker_preco: Optional[str]
         "erros": dados.erros
     }
 
+    if incluir_trimestral:
+        serie = gerar_serie_trimestral(dados, ticker_preco=ticker_preco)
+        if serie:
+            resultado["historico_trimestral"] = serie
+
+    return resultado
+
 
 
 
@@ -2940,10 +3208,39 @@ def gerar_historico_anualizado(dados: DadosEmpresa, ticker_preco: Optional[str]
 # ======================================================================================
 
 
-def processar_ticker(ticker: str, salvar: bool = True) -> Tuple[bool, str, Optional[Dict]]:
+def processar_ticker(
+    ticker: str,
+    salvar: bool = True,
+    trimestral: bool = False,
+    comprimir: bool = False,
+) -> Tuple[bool, str, Optional[Dict]]:
     """
     Processa um ticker e gera múltiplos.
 
+    Wrapper de processar_ticker_classes() que devolve apenas o resultado "seed"
+    (classe igual ao ticker solicitado, ou a primeira classe disponível).
+
+    Retorna:
+        (sucesso, mensagem, resultado_seed)
+    """
+    sucesso, msg, resultados = processar_ticker_classes(ticker, salvar=salvar, trimestral=trimestral, comprimir=comprimir)
+    if not sucesso or not resultados:
+        return sucesso, msg, None
+
+    ticker_upper = (ticker or "").upper().strip()
+    resultado_seed = resultados.get(ticker_upper) or next(iter(resultados.values()))
+    return sucesso, msg, resultado_seed
+
+
+def processar_ticker_classes(
+    ticker: str,
+    salvar: bool = True,
+    trimestral: bool = False,
+    comprimir: bool = False,
+) -> Tuple[bool, str, Dict[str, Dict]]:
+    """
+    Processa um ticker e gera múltiplos para todas as classes disponíveis.
+
     NOVO PADRÃO (multi-classes):
     - Para empresas com mais de uma classe disponível no precos_trimestrais.csv, gera arquivos por classe:
         multiplos_<TICKER>.csv
@@ -2954,18 +3251,21 @@ def processar_ticker(ticker: str, salvar: bool = True) -> Tuple[bool, str, Optio
     - Para UNIT (classe 11), ajusta a quantidade de ações para equivaler a "quantidade de UNIT"
       (UNIT = pacote de ações ON+PN), usando o fator derivado do acoes_historico.csv quando possível.
 
+    - trimestral=True inclui "historico_trimestral" (série colunar por trimestre) em cada classe.
+    - Arquivos só são regravados quando o conteúdo muda; comprimir=True gera também .js.gz/.js.br.
+
     Retorna:
-        (sucesso, mensagem, resultado_seed)
+        (sucesso, mensagem, {ticker_classe: resultado})
     """
     ticker_upper = (ticker or "").upper().strip()
     if not ticker_upper:
-        return False, "Ticker vazio.", None
+        return False, "Ticker vazio.", {}
 
     try:
         dados = carregar_dados_empresa(ticker_upper)
 
         if not dados.periodos:
-            return False, "Nenhum período encontrado nos dados.", None
+            return False, "Nenhum período encontrado nos dados.", {}
 
         pasta = get_pasta_balanco(ticker_upper)
 
@@ -2975,29 +3275,27 @@ def processar_ticker(ticker: str, salvar: bool = True) -> Tuple[bool, str, Optio
             tickers_saida = [ticker_upper]
 
         # gera sempre por classe (novo padrão)
-        resultado_seed: Optional[Dict] = None
+        resultados: Dict[str, Dict] = {}
 
         for t_out in tickers_saida:
-            resultado = gerar_historico_anualizado(dados, ticker_preco=t_out, ticker_saida=t_out)
-            if resultado_seed is None and t_out == ticker_upper:
-                resultado_seed = resultado
+            resultado = gerar_historico_anualizado(dados, ticker_preco=t_out, ticker_saida=t_out, incluir_trimestral=trimestral)
+            resultados[t_out] = resultado
 
             if salvar:
                 js_path = pasta / f"multiplos_{t_out}.js"
                 csv_path = pasta / f"multiplos_{t_out}.csv"
 
-                _salvar_js_historico(resultado, js_path, ticker=t_out)
+                _salvar_js_historico(resultado, js_path, ticker=t_out, comprimir=comprimir)
                 _salvar_csv_historico(resultado, csv_path)
 
-        if resultado_seed is None:
-            # se o seed não estava na lista, usa o primeiro
-            resultado_seed = gerar_historico_anualizado(dados, ticker_preco=tickers_saida[0], ticker_saida=tickers_saida[0])
+        if salvar:
+            _salvar_metadata_compartilhada(comprimir=comprimir)
 
         msg = f"OK - gerados {len(tickers_saida)} arquivo(s): " + ", ".join(tickers_saida)
-        return True, msg, resultado_seed
+        return True, msg, resultados
 
     except Exception as e:
-        return False, f"ERRO - {str(e)}", None
+        return False, f"ERRO - {str(e)}", {}
 
 
 def _salvar_csv_historico(resultado: Dict, path: Path):
@@ -3052,37 +3350,698 @@ def _salvar_csv_historico(resultado: Dict, path: Path):
                              "Cheque precos_trimestrais.csv / acoes_historico.csv e o filtro por ticker/classe.")
 
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False, encoding="utf-8")
+    escrever_se_mudou(path, df.to_csv(index=False))
+
+
+# ======================================================================================
+# SERIALIZAÇÃO COMPACTA (WRITE-IF-CHANGED)
+# ======================================================================================
+
+ARQUIVO_METADATA_JS = "multiplos_metadata.js"
+ARQUIVO_ATUALIZACAO = "multiplos_atualizacao.json"
 
-def _salvar_js_historico(resultado: Dict[str, Any], output_path: Path, ticker: Optional[str] = None) -> None:
+
+def _conteudo_js_multiplos(resultado: Dict[str, Any], ticker: str) -> str:
+    """
+    Conteúdo do multiplos_<TICKER>.js: JSON minificado, sem o bloco de metadados
+    (referenciado por "metadata_ref" e resolvido de multiplos_metadata.js) e sem
+    ltm.data_calculo (volátil; registrado em MULTIPLOS/multiplos_atualizacao.json).
+    """
+    payload = {k: v for k, v in resultado.items() if k != "metadata"}
+    payload.setdefault("metadata_ref", _tipo_metadata(resultado.get("ticker") or ticker))
+    if isinstance(payload.get("ltm"), dict):
+        payload["ltm"] = {k: v for k, v in payload["ltm"].items() if k != "data_calculo"}
+
+    dados = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return (
+        "// Arquivo gerado automaticamente por calcular_multiplos.py\n"
+        "(function(){var M=window.MONALYTICS=window.MONALYTICS||{};M.multiplos=M.multiplos||{};"
+        f"var d={dados};d.metadata=(M.multiplos_metadata||{{}})[d.metadata_ref]||{{}};"
+        f"M.multiplos[{json.dumps(ticker)}]=d;}})();\n"
+    )
+
+
+def _salvar_metadata_compartilhada(comprimir: bool = False) -> bool:
+    """Publica os metadados de todos os tipos em balancos/MULTIPLOS/multiplos_metadata.js."""
+    dados = json.dumps(METADATA_POR_TIPO, ensure_ascii=False, separators=(",", ":"))
+    js = (
+        "// Arquivo gerado automaticamente por calcular_multiplos.py\n"
+        "(function(){var M=window.MONALYTICS=window.MONALYTICS||{};"
+        f"M.multiplos_metadata={dados};}})();\n"
+    )
+    return escrever_se_mudou(_pasta_painel() / ARQUIVO_METADATA_JS, js, comprimir=comprimir)
+
+
+def _salvar_js_historico(
+    resultado: Dict[str, Any],
+    output_path: Path,
+    ticker: Optional[str] = None,
+    comprimir: bool = False,
+) -> bool:
     """
     Salva o resultado como JavaScript (para consumo direto via <script src=...>).
 
     Padrão:
       window.MONALYTICS.multiplos["TICKER"] = {...};
 
+    O arquivo só é regravado quando o conteúdo muda (ver escrever_se_mudou).
+
     Args:
         resultado: dict do histórico (mesma estrutura do JSON)
         output_path: caminho .js
         ticker: chave do dicionário (default: resultado['ticker'])
+        comprimir: também gera .js.gz (e .js.br se brotli estiver instalado)
+
+    Returns:
+        True se o arquivo foi (re)gravado
     """
     try:
-        output_path.parent.mkdir(parents=True, exist_ok=True)
         t = (ticker or resultado.get("ticker") or "").upper().strip() or "TICKER"
+        return escrever_se_mudou(output_path, _conteudo_js_multiplos(resultado, t), comprimir=comprimir)
+    except Exception as e:
+        print(f"⚠️ Erro ao salvar JS em {output_path}: {e}")
+        return False
+
+
+def registrar_atualizacao_multiplos(resultados_lote: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Registra em balancos/MULTIPLOS/multiplos_atualizacao.json o hash e a data de cálculo
+    de cada classe cujo conteúdo mudou (as demais mantêm a data anterior). O arquivo só é
+    regravado quando algum registro muda.
+
+    Returns:
+        Quantidade de classes com conteúdo novo
+    """
+    path = _pasta_painel() / ARQUIVO_ATUALIZACAO
+    estado: Dict[str, Any] = {"tickers": {}}
+    if path.exists():
+        try:
+            estado = json.loads(path.read_text(encoding="utf-8"))
+        except Exception:
+            pass
+    registros = estado.setdefault("tickers", {})
+
+    agora = datetime.now().isoformat(timespec="seconds")
+    alterados = 0
+    for item in resultados_lote.values():
+        for t_out, resultado in (item.get("resultados") or {}).items():
+            h = hash_conteudo(_conteudo_js_multiplos(resultado, t_out).encode("utf-8"))[:16]
+            if (registros.get(t_out) or {}).get("hash") != h:
+                data_calculo = (resultado.get("ltm") or {}).get("data_calculo") or agora
+                registros[t_out] = {"hash": h, "data_calculo": data_calculo}
+                alterados += 1
+
+    # Sem carimbo de execução: o arquivo é versionado e só muda quando alguma classe muda
+    estado.pop("ultima_execucao", None)
+    estado["tickers"] = dict(sorted(registros.items()))
+    escrever_se_mudou(path, json.dumps(estado, ensure_ascii=False, indent=0))
+    return alterados
+
+
+# ======================================================================================
+# PROCESSAMENTO EM LOTE (POOL DE PROCESSOS) + PAINEL CONSOLIDADO
+# ======================================================================================
+
+# Painel único (ticker × múltiplo × período) consumido pelo screener/comparações do site
+PASTA_PAINEL = "MULTIPLOS"
+ARQUIVO_PAINEL_JSON = "painel_multiplos.json"
+ARQUIVO_PAINEL_PARQUET = "painel_multiplos.parquet"
+
+
+def _pasta_painel() -> Path:
+    """Pasta dos artefatos consolidados: balancos/MULTIPLOS/."""
+    return _find_balancos_dir() / PASTA_PAINEL
+
+
+def _processar_ticker_lote(
+    ticker: str,
+    salvar: bool,
+    trimestral: bool = False,
+    comprimir: bool = False,
+) -> Tuple[str, bool, str, Dict[str, Dict]]:
+    """Worker do pool (função de módulo para ser serializável pelo ProcessPoolExecutor)."""
+    sucesso, msg, resultados = processar_ticker_classes(ticker, salvar=salvar, trimestral=trimestral, comprimir=comprimir)
+    return ticker, sucesso, msg, resultados
+
+
+def processar_lote(
+    tickers: List[str],
+    salvar: bool = True,
+    workers: Optional[int] = None,
+    verbose: bool = True,
+    trimestral: bool = False,
+    comprimir: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Processa vários tickers em paralelo (um processo por worker).
+
+    Cada ticker é independente (lê apenas a própria pasta e grava apenas os próprios
+    multiplos_<CLASSE>.*), então o trabalho paraleliza sem coordenação.
+
+    Args:
+        tickers: Lista de tickers (seed de cada empresa)
+        salvar: Se True, grava os arquivos por classe (como no modo serial)
+        workers: Nº de processos (None = os.cpu_count(); 1 = execução serial, sem pool)
+        trimestral: Inclui a série trimestral em cada resultado
+        comprimir: Gera .js.gz/.js.br ao lado de cada multiplos_<TICKER>.js
+
+    Returns:
+        {ticker: {"sucesso": bool, "mensagem": str, "resultados": {ticker_classe: resultado}}}
+    """
+    tickers = [t for t in dict.fromkeys((t or "").upper().strip() for t in tickers) if t]
+    saida: Dict[str, Dict[str, Any]] = {}
+
+    def _registrar(ticker: str, sucesso: bool, msg: str, resultados: Dict[str, Dict]) -> None:
+        saida[ticker] = {"sucesso": sucesso, "mensagem": msg, "resultados": resultados}
+        if verbose:
+            print(f"{'✅' if sucesso else '⚠️ '} {ticker}: {msg}")
+
+    n_workers = workers or os.cpu_count() or 1
+    if n_workers <= 1 or len(tickers) <= 1:
+        for t in tickers:
+            _registrar(*_processar_ticker_lote(t, salvar, trimestral, comprimir))
+        return saida
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(tickers))) as executor:
+        futures = {executor.submit(_processar_ticker_lote, t, salvar, trimestral, comprimir): t for t in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                _registrar(*future.result())
+            except Exception as e:
+                _registrar(ticker, False, f"ERRO - {type(e).__name__}: {e}", {})
+
+    # ordem estável (mesma da seleção), independente da ordem de término
+    return {t: saida[t] for t in tickers if t in saida}
+
+
+def montar_painel_multiplos(resultados_lote: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Achata os resultados do lote em formato longo: ticker × múltiplo × período.
+
+    Colunas: ticker, multiplo, periodo ('2024', ..., 'LTM'), periodo_referencia, valor
+    """
+    rows: List[Dict[str, Any]] = []
+    for item in resultados_lote.values():
+        for t_out, resultado in (item.get("resultados") or {}).items():
+            for ano, bloco in (resultado.get("historico_anual") or {}).items():
+                ref = bloco.get("periodo_referencia")
+                for codigo, valor in (bloco.get("multiplos") or {}).items():
+                    rows.append({"ticker": t_out, "multiplo": codigo, "periodo": str(ano),
+                                 "periodo_referencia": ref, "valor": valor})
+            ltm = resultado.get("ltm") or {}
+            for codigo, valor in (ltm.get("multiplos") or {}).items():
+                rows.append({"ticker": t_out, "multiplo": codigo, "periodo": "LTM",
+                             "periodo_referencia": ltm.get("periodo_referencia"), "valor": valor})
+
+    df = pd.DataFrame(rows, columns=["ticker", "multiplo", "periodo", "periodo_referencia", "valor"])
+    df["valor"] = pd.to_numeric(df["valor"], errors="coerce")
+    return df
+
+
+def _ordenar_colunas_painel(periodos: List[str]) -> List[str]:
+    """Anos em ordem crescente e 'LTM' por último."""
+    anos = sorted(p for p in periodos if p != "LTM")
+    return anos + (["LTM"] if "LTM" in periodos else [])
+
+
+def _painel_para_json(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Serializa o painel em formato compacto (colunar):
+
+        {
+          "periodos": ["2015", ..., "LTM"],
+          "multiplos": ["VALOR_MERCADO", "P_L", ...],
+          "tickers": {
+            "ABEV3": {"referencia": ["2015T4", ..., "2025T3"],
+                      "valores": [[...P_L por período...], ...]}   # ordem de "multiplos"
+          }
+        }
+    """
+    periodos = _ordenar_colunas_painel(df["periodo"].unique().tolist())
+    multiplos = list(dict.fromkeys(df["multiplo"].tolist()))
+    idx_periodo = {p: i for i, p in enumerate(periodos)}
+
+    tickers: Dict[str, Any] = {}
+    for t, sub in df.groupby("ticker", sort=True):
+        wide = sub.set_index(["multiplo", "periodo"])["valor"].unstack()
+        valores = wide.reindex(index=multiplos, columns=periodos).to_numpy(dtype=float)
+
+        referencia: List[Optional[str]] = [None] * len(periodos)
+        for p, ref in sub.drop_duplicates("periodo")[["periodo", "periodo_referencia"]].itertuples(index=False):
+            referencia[idx_periodo[p]] = ref
+
+        tickers[t] = {
+            "referencia": referencia,
+            "valores": [[None if not np.isfinite(v) else v for v in linha] for linha in valores],
+        }
+
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "periodos": periodos,
+        "multiplos": multiplos,
+        "tickers": tickers,
+    }
+
+
+def _painel_de_json(payload: Dict[str, Any]) -> pd.DataFrame:
+    """Reconstrói o painel longo a partir do JSON compacto (usado para mesclar execuções parciais)."""
+    periodos = payload.get("periodos") or []
+    multiplos = payload.get("multiplos") or []
+    rows: List[Dict[str, Any]] = []
+    for t, bloco in (payload.get("tickers") or {}).items():
+        referencia = bloco.get("referencia") or [None] * len(periodos)
+        for codigo, linha in zip(multiplos, bloco.get("valores") or []):
+            for p, ref, valor in zip(periodos, referencia, linha):
+                if ref is None:
+                    continue
+                rows.append({"ticker": t, "multiplo": codigo, "periodo": p,
+                             "periodo_referencia": ref, "valor": valor})
+    df = pd.DataFrame(rows, columns=["ticker", "multiplo", "periodo", "periodo_referencia", "valor"])
+    df["valor"] = pd.to_numeric(df["valor"], errors="coerce")
+    return df
+
+
+def salvar_painel_multiplos(painel: pd.DataFrame, pasta: Optional[Path] = None, mesclar: bool = True) -> Path:
+    """
+    Grava o painel consolidado (Parquet + JSON compacto) em balancos/MULTIPLOS/.
+
+    Com mesclar=True, tickers já presentes no painel anterior e não reprocessados nesta
+    execução são preservados (execuções por lista/faixa não apagam o restante do universo).
+
+    O Parquet é opcional (requer pyarrow ou fastparquet); o JSON é sempre gerado. Se só o
+    carimbo "gerado_em" mudaria, nenhum dos dois arquivos é regravado.
+    """
+    pasta = pasta or _pasta_painel()
+    pasta.mkdir(parents=True, exist_ok=True)
+    json_path = pasta / ARQUIVO_PAINEL_JSON
+
+    if mesclar and json_path.exists():
+        try:
+            anterior = _painel_de_json(json.loads(json_path.read_text(encoding="utf-8")))
+            anterior = anterior[~anterior["ticker"].isin(set(painel["ticker"]))]
+            if not anterior.empty:
+                painel = pd.concat([anterior, painel], ignore_index=True)
+        except Exception as e:
+            print(f"⚠️ Painel anterior ignorado ({json_path.name}): {e}")
+
+    painel = painel.sort_values(["ticker", "multiplo", "periodo"], kind="mergesort").reset_index(drop=True)
+
+    payload = _painel_para_json(painel)
+    parquet_path = pasta / ARQUIVO_PAINEL_PARQUET
+
+    # Só "gerado_em" diferente do painel gravado: nada muda (nem JSON nem Parquet)
+    inalterado = False
+    try:
+        anterior = json.loads(json_path.read_text(encoding="utf-8"))
+        inalterado = {k: v for k, v in anterior.items() if k != "gerado_em"} == \
+            {k: v for k, v in payload.items() if k != "gerado_em"}
+    except (OSError, ValueError):
+        pass
+    if inalterado and parquet_path.exists():
+        return json_path
+    if not inalterado:
+        escrever_se_mudou(json_path, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+
+    try:
+        painel.to_parquet(parquet_path, index=False)
+    except ImportError:
+        print("⚠️ pyarrow/fastparquet não instalado: painel salvo apenas em JSON")
+
+    return json_path
+
 
-        payload = json.dumps(resultado, ensure_ascii=False, indent=2)
+# ======================================================================================
+# AGREGADOS SETORIAIS (ATUALIZAÇÃO INCREMENTAL)
+# ======================================================================================
+
+PASTA_SETORES = "setores"
+ARQUIVO_ESTADO_SETORES = "setores_estado.json"
+ESTATISTICAS_SETOR = ["n", "mediana", "p25", "p75", "media_ponderada"]
+
+
+def _slug_setor(setor: str) -> str:
+    """Nome de arquivo estável para o setor (ex.: 'Energia Elétrica' -> 'energia_eletrica')."""
+    import unicodedata
+    s = unicodedata.normalize("NFKD", str(setor)).encode("ascii", "ignore").decode("ascii")
+    s = re.sub(r"[^a-z0-9]+", "_", s.lower()).strip("_")
+    return s or "sem_setor"
+
+
+def _percentil_ordenado(valores: List[Tuple[float, str]], q: float) -> Optional[float]:
+    """Percentil (interpolação linear, como np.percentile) sobre lista já ordenada de (valor, ticker)."""
+    n = len(valores)
+    if n == 0:
+        return None
+    pos = (n - 1) * q
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, n - 1)
+    v = valores[lo][0] + (valores[hi][0] - valores[lo][0]) * (pos - lo)
+    return round(float(v), 4)
+
+
+@dataclass
+class _GrupoSetorial:
+    """
+    Valores de um (setor, período, múltiplo) mantidos ordenados + (valor, peso) por ticker
+    para a média ponderada.
+
+    A média ponderada é recalculada (math.fsum) a partir dos pares guardados sempre que o
+    grupo é publicado, em vez de manter somas correntes com subtrações na remoção (que
+    acumulam erro de ponto flutuante a cada atualização incremental).
+    """
+    valores: List[Tuple[float, str]] = field(default_factory=list)
+    ponderados: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    def inserir(self, ticker: str, valor: float, peso: float, ordenar: bool = True) -> None:
+        import bisect
+        if ordenar:
+            bisect.insort(self.valores, (valor, ticker))
+        else:
+            self.valores.append((valor, ticker))
+        if peso > 0:
+            self.ponderados[ticker] = (valor, peso)
+
+    def remover(self, ticker: str, valor: float, peso: float) -> None:
+        import bisect
+        i = bisect.bisect_left(self.valores, (valor, ticker))
+        if i < len(self.valores) and self.valores[i] == (valor, ticker):
+            del self.valores[i]
+        self.ponderados.pop(ticker, None)
+
+    def media_ponderada(self) -> Optional[float]:
+        import math
+        soma_w = math.fsum(w for _, w in self.ponderados.values())
+        if soma_w <= 0:
+            return None
+        return round(math.fsum(v * w for v, w in self.ponderados.values()) / soma_w, 4)
+
+    def estatisticas(self) -> List[Optional[float]]:
+        return [
+            len(self.valores),
+            _percentil_ordenado(self.valores, 0.50),
+            _percentil_ordenado(self.valores, 0.25),
+            _percentil_ordenado(self.valores, 0.75),
+            self.media_ponderada(),
+        ]
+
+
+class AgregadorSetorial:
+    """
+    Mediana, percentis (p25/p75) e média ponderada por Valor de Mercado dos múltiplos,
+    por setor, para cada ano do histórico e para o LTM.
 
-        js = (
-            "// Arquivo gerado automaticamente por calcular_multiplos.py\n"
-            "(function(){\n"
-            "  window.MONALYTICS = window.MONALYTICS || {};\n"
-            "  window.MONALYTICS.multiplos = window.MONALYTICS.multiplos || {};\n"
-            f"  window.MONALYTICS.multiplos[{json.dumps(t)}] = {payload};\n"
-            "})();\n"
+    Estado persistido em balancos/MULTIPLOS/setores_estado.json com a contribuição de cada
+    ticker (setor, múltiplos por período e peso). Ao reprocessar um ticker, apenas a
+    contribuição antiga dele é removida das listas ordenadas do setor e a nova é inserida
+    (bisect), sem reler a saída dos demais tickers. Só os setores afetados são regravados.
+    """
+
+    def __init__(self, pasta: Optional[Path] = None):
+        self.pasta = pasta or _pasta_painel()
+        self.contribuicoes: Dict[str, Dict[str, Any]] = {}
+        self.grupos: Dict[Tuple[str, str, str], _GrupoSetorial] = {}
+        self.setores_alterados: Set[str] = set()
+        self._carregar_estado()
+
+    # ------------------------------------------------------------------ estado
+    def _carregar_estado(self) -> None:
+        path = self.pasta / ARQUIVO_ESTADO_SETORES
+        if not path.exists():
+            return
+        try:
+            estado = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Estado setorial ignorado ({path.name}): {e}")
+            return
+
+        self.contribuicoes = estado.get("tickers", {})
+        # reconstrução em bloco: append + um sort por grupo (mais barato que insort item a item)
+        for ticker, contrib in self.contribuicoes.items():
+            self._aplicar(ticker, contrib, remover=False, ordenar=False)
+        for grupo in self.grupos.values():
+            grupo.valores.sort()
+        self.setores_alterados.clear()
+
+    def _salvar_estado(self) -> None:
+        path = self.pasta / ARQUIVO_ESTADO_SETORES
+        payload = {"tickers": {t: self.contribuicoes[t] for t in sorted(self.contribuicoes)}}
+        path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+    # ------------------------------------------------------------ contribuição
+    @staticmethod
+    def contribuicao(resultado: Dict[str, Any], setor: str) -> Dict[str, Any]:
+        """Extrai de um resultado de gerar_historico_anualizado() o que entra nos agregados."""
+        valores: Dict[str, Dict[str, float]] = {}
+        pesos: Dict[str, float] = {}
+
+        blocos = [(str(ano), b.get("multiplos") or {}) for ano, b in (resultado.get("historico_anual") or {}).items()]
+        blocos.append(("LTM", (resultado.get("ltm") or {}).get("multiplos") or {}))
+
+        for periodo, multiplos in blocos:
+            vm = multiplos.get("VALOR_MERCADO")
+            if vm is not None and np.isfinite(vm) and vm > 0:
+                pesos[periodo] = float(vm)
+            vals = {
+                cod: float(v) for cod, v in multiplos.items()
+                if cod != "VALOR_MERCADO" and v is not None and np.isfinite(v)
+            }
+            if vals:
+                valores[periodo] = vals
+
+        return {"setor": setor, "valores": valores, "pesos": pesos}
+
+    def _aplicar(self, ticker: str, contrib: Dict[str, Any], remover: bool, ordenar: bool = True) -> None:
+        setor = contrib.get("setor") or "Sem setor"
+        pesos = contrib.get("pesos") or {}
+        for periodo, vals in (contrib.get("valores") or {}).items():
+            peso = float(pesos.get(periodo, 0.0))
+            for cod, v in vals.items():
+                chave = (setor, periodo, cod)
+                grupo = self.grupos.get(chave)
+                if grupo is None:
+                    if remover:
+                        continue
+                    grupo = self.grupos[chave] = _GrupoSetorial()
+                if remover:
+                    grupo.remover(ticker, v, peso)
+                else:
+                    grupo.inserir(ticker, v, peso, ordenar=ordenar)
+        self.setores_alterados.add(setor)
+
+    def atualizar_ticker(self, ticker: str, resultado: Dict[str, Any], setor: str) -> bool:
+        """Substitui a contribuição do ticker. Retorna False se nada mudou."""
+        nova = self.contribuicao(resultado, setor)
+        antiga = self.contribuicoes.get(ticker)
+        if antiga == nova:
+            return False
+        if antiga is not None:
+            self._aplicar(ticker, antiga, remover=True)
+        self._aplicar(ticker, nova, remover=False)
+        self.contribuicoes[ticker] = nova
+        return True
+
+    # --------------------------------------------------------------- publicação
+    def _payload_setor(self, setor: str) -> Dict[str, Any]:
+        chaves = [k for k in self.grupos if k[0] == setor and self.grupos[k].valores]
+        periodos = _ordenar_colunas_painel(list({k[1] for k in chaves}))
+        idx = {p: i for i, p in enumerate(periodos)}
+
+        multiplos: Dict[str, List[Optional[List[Optional[float]]]]] = {}
+        for _, periodo, cod in sorted(chaves, key=lambda k: k[2]):
+            linha = multiplos.setdefault(cod, [None] * len(periodos))
+            linha[idx[periodo]] = self.grupos[(setor, periodo, cod)].estatisticas()
+
+        return {
+            "setor": setor,
+            "tickers": sorted(t for t, c in self.contribuicoes.items() if (c.get("setor") or "Sem setor") == setor),
+            "periodos": periodos,
+            "estatisticas": ESTATISTICAS_SETOR,
+            "multiplos": multiplos,
+        }
+
+    def salvar(self) -> List[str]:
+        """Regrava apenas os setores alterados, o índice e o estado. Retorna os setores publicados."""
+        pasta_setores = self.pasta / PASTA_SETORES
+        pasta_setores.mkdir(parents=True, exist_ok=True)
+
+        publicados: List[str] = []
+        for setor in sorted(self.setores_alterados):
+            path = pasta_setores / f"{_slug_setor(setor)}.json"
+            payload = self._payload_setor(setor)
+            if not payload["tickers"]:
+                path.unlink(missing_ok=True)
+                continue
+            path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            publicados.append(setor)
+
+        indice: Dict[str, Dict[str, Any]] = {}
+        for t, c in self.contribuicoes.items():
+            setor = c.get("setor") or "Sem setor"
+            item = indice.setdefault(setor, {"arquivo": f"{_slug_setor(setor)}.json", "tickers": []})
+            item["tickers"].append(t)
+        for item in indice.values():
+            item["tickers"].sort()
+        (pasta_setores / "index.json").write_text(
+            json.dumps({"setores": dict(sorted(indice.items()))}, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
         )
-        output_path.write_text(js, encoding="utf-8")
-    except Exception as e:
-        print(f"⚠️ Erro ao salvar JS em {output_path}: {e}")
+
+        self._salvar_estado()
+        self.setores_alterados.clear()
+        return publicados
+
+
+def _mapa_setores(df_map: pd.DataFrame) -> Dict[str, str]:
+    """ticker (todas as classes listadas na linha) -> setor, a partir do mapeamento consolidado."""
+    mapa: Dict[str, str] = {}
+    if df_map is None or "setor" not in df_map.columns:
+        return mapa
+    for tickers_str, setor in df_map[["ticker", "setor"]].itertuples(index=False):
+        if pd.isna(tickers_str) or pd.isna(setor):
+            continue
+        for t in str(tickers_str).upper().split(";"):
+            if t.strip():
+                mapa[t.strip()] = str(setor).strip()
+    return mapa
+
+
+def atualizar_agregados_setoriais(resultados_lote: Dict[str, Dict[str, Any]], df_map: pd.DataFrame) -> List[str]:
+    """
+    Atualiza incrementalmente os agregados setoriais com os tickers processados no lote.
+
+    Usa um resultado por empresa (classe seed) para não contar a mesma companhia duas vezes.
+    """
+    setores = _mapa_setores(df_map)
+    agregador = AgregadorSetorial()
+
+    alterados = 0
+    for seed, item in resultados_lote.items():
+        resultados = item.get("resultados") or {}
+        if not item.get("sucesso") or not resultados:
+            continue
+        resultado = resultados.get(seed) or next(iter(resultados.values()))
+        setor = setores.get(seed) or next((setores[t] for t in resultados if t in setores), "Sem setor")
+        if agregador.atualizar_ticker(seed, resultado, setor):
+            alterados += 1
+
+    if alterados == 0:
+        return []
+    return agregador.salvar()
+
+
+# ======================================================================================
+# RANKING DE DIVIDEND YIELD (ATUALIZAÇÃO INCREMENTAL)
+# ======================================================================================
+
+ARQUIVO_RANKING_DY = "ranking_dy.json"
+CAMPOS_RANKING_DY = ["dy", "dy_medio_5a", "payout", "proxima_data_com", "empresa"]
+ANOS_DY_MEDIO = 5
+
+
+def _dy_medio_anos_fechados(resultado: Dict[str, Any], anos: int = ANOS_DY_MEDIO) -> Optional[float]:
+    """Média do DY dos últimos `anos` anos fechados (período de referência T4) do histórico anual."""
+    historico = resultado.get("historico_anual") or {}
+    valores: List[float] = []
+    for ano in sorted(historico, key=int, reverse=True):
+        bloco = historico[ano]
+        if not str(bloco.get("periodo_referencia") or "").endswith("T4"):
+            continue
+        dy = (bloco.get("multiplos") or {}).get("DY")
+        if isinstance(dy, (int, float)) and np.isfinite(dy):
+            valores.append(float(dy))
+        if len(valores) == anos:
+            break
+    return _normalizar_valor(float(np.mean(valores))) if valores else None
+
+
+def _proxima_data_com_empresa(seed: str) -> Optional[str]:
+    """Próxima data COM do dividendos_detalhado.json da empresa (vale para todas as classes)."""
+    path = get_pasta_balanco(seed) / "dividendos_detalhado.json"
+    if not path.exists():
+        return None
+    try:
+        eventos = json.loads(path.read_text(encoding="utf-8")).get("dividendos", [])
+    except Exception:
+        return None
+    return CalendarioTicker(eventos).proxima_data_com()
+
+
+def linhas_ranking_dy(seed: str, resultados: Dict[str, Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Linhas do ranking (ordem de CAMPOS_RANKING_DY) para cada classe de uma empresa."""
+    proxima = _proxima_data_com_empresa(seed)
+    linhas: Dict[str, List[Any]] = {}
+    for t_out, resultado in resultados.items():
+        multiplos_ltm = (resultado.get("ltm") or {}).get("multiplos") or {}
+        linhas[t_out] = [
+            multiplos_ltm.get("DY"),
+            _dy_medio_anos_fechados(resultado),
+            multiplos_ltm.get("PAYOUT"),
+            proxima,
+            seed,
+        ]
+    return linhas
+
+
+def atualizar_ranking_dy(resultados_lote: Dict[str, Dict[str, Any]], pasta: Optional[Path] = None) -> Tuple[Path, int, bool]:
+    """
+    Mescla no balancos/MULTIPLOS/ranking_dy.json as empresas processadas nesta execução.
+
+    Formato compacto (um vetor por classe, na ordem de "campos"):
+
+        {
+          "gerado_em": "...",
+          "campos": ["dy", "dy_medio_5a", "payout", "proxima_data_com", "empresa"],
+          "tickers": {"BBAS3": [9.1, 8.4, 35.2, "2026-11-21", "BBAS3"], ...},
+          "ordem": ["BBAS3", ...]          # DY atual decrescente (sem DY por último)
+        }
+
+    Classes de empresas não reprocessadas são preservadas; as de uma empresa reprocessada
+    são substituídas em bloco (classe que deixou de existir sai do ranking). O arquivo só
+    é regravado quando algo além de "gerado_em" muda.
+
+    Returns:
+        (caminho, total de classes no ranking, gravou)
+    """
+    path = (pasta or _pasta_painel()) / ARQUIVO_RANKING_DY
+    anterior: Dict[str, Any] = {}
+    if path.exists():
+        try:
+            anterior = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Ranking de DY anterior ignorado ({path.name}): {e}")
+
+    linhas: Dict[str, List[Any]] = {}
+    if anterior.get("campos") == CAMPOS_RANKING_DY:
+        linhas = dict(anterior.get("tickers") or {})
+
+    idx_empresa = CAMPOS_RANKING_DY.index("empresa")
+    for seed, item in resultados_lote.items():
+        resultados = item.get("resultados") or {}
+        if not resultados:
+            continue
+        linhas = {t: l for t, l in linhas.items() if l[idx_empresa] != seed}
+        linhas.update(linhas_ranking_dy(seed, resultados))
+
+    def _chave(t: str) -> Tuple[int, float, str]:
+        dy = linhas[t][0]
+        return (0, -dy, t) if isinstance(dy, (int, float)) else (1, 0.0, t)
+
+    payload = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "campos": CAMPOS_RANKING_DY,
+        "tickers": {t: linhas[t] for t in sorted(linhas)},
+        "ordem": sorted(linhas, key=_chave),
+    }
+
+    if {k: v for k, v in anterior.items() if k != "gerado_em"} == \
+            {k: v for k, v in payload.items() if k != "gerado_em"}:
+        return path, len(linhas), False
+
+    gravou = escrever_se_mudou(path, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+    return path, len(linhas), gravou
 
 
 def main():
@@ -3097,6 +4056,14 @@ def main():
     parser.add_argument("--faixa", default="1-50")
     parser.add_argument("--no-save", action="store_true", 
                        help="Não salvar arquivos de saída")
+    parser.add_argument("--lote", action="store_true",
+                       help="Processa em paralelo (pool de processos) e gera o painel consolidado")
+    parser.add_argument("--workers", type=int, default=0,
+                       help="Nº de processos no modo lote (0 = nº de CPUs)")
+    parser.add_argument("--trimestral", action="store_true",
+                       help="Inclui série trimestral (historico_trimestral) nos multiplos_<TICKER>.js")
+    parser.add_argument("--comprimir", action="store_true",
+                       help="Gera também multiplos_<TICKER>.js.gz (e .br, se brotli instalado)")
     args = parser.parse_args()
     
     df = load_mapeamento_consolidado()
@@ -3126,6 +4093,8 @@ def main():
     print(f"Modo: {args.modo} | Selecionadas: {len(df_sel)}")
     print(f"Empresas: 22 múltiplos | Bancos: 8 | Holdings Seguros: 10 | Seguradoras: 10")
     print(f"Saída: balancos/<TICKER>/multiplos_<TICKER>.js + multiplos_<TICKER>.csv (por classe)")
+    if args.lote:
+        print(f"Lote: {args.workers or os.cpu_count()} processo(s) | Painel: balancos/{PASTA_PAINEL}/{ARQUIVO_PAINEL_JSON}")
     print(f"{'='*70}\n")
     
     ok_count = 0
@@ -3133,13 +4102,55 @@ def main():
     err_count = 0
     
     salvar = not args.no_save
+
+    if args.lote:
+        tickers = []
+        for ticker_str in df_sel["ticker"].astype(str).str.upper().str.strip():
+            tickers.append(ticker_str.split(';')[0] if ';' in ticker_str else ticker_str)
+
+        resultados_lote = processar_lote(
+            tickers, salvar=salvar, workers=args.workers or None,
+            trimestral=args.trimestral, comprimir=args.comprimir,
+        )
+        for r in resultados_lote.values():
+            if r["sucesso"]:
+                ok_count += 1
+            elif "seguradora" in r["mensagem"].lower() or "holding" in r["mensagem"].lower():
+                skip_count += 1
+            else:
+                err_count += 1
+
+        if salvar:
+            painel = montar_painel_multiplos(resultados_lote)
+            if not painel.empty:
+                destino = salvar_painel_multiplos(painel)
+                print(f"\n📦 Painel consolidado: {destino} ({painel['ticker'].nunique()} tickers)")
+
+            setores_publicados = atualizar_agregados_setoriais(resultados_lote, df)
+            if setores_publicados:
+                print(f"🏭 Agregados setoriais atualizados: {len(setores_publicados)} setor(es)")
+
+            alterados = registrar_atualizacao_multiplos(resultados_lote)
+            print(f"📝 Conteúdo alterado: {alterados} classe(s)")
+
+            destino, total, gravou = atualizar_ranking_dy(resultados_lote)
+            print(f"💰 Ranking de DY ({'atualizado' if gravou else 'sem mudança'}): {total} classe(s) → {destino}")
+
+        print(f"\n{'='*70}")
+        print(f"RESUMO: OK={ok_count} | SKIP(Seguradoras)={skip_count} | ERRO={err_count}")
+        print(f"{'='*70}\n")
+        return
     
+    resultados_serial: Dict[str, Dict[str, Any]] = {}
     for _, row in df_sel.iterrows():
         ticker_str = str(row["ticker"]).upper().strip()
         ticker = ticker_str.split(';')[0] if ';' in ticker_str else ticker_str
         
         try:
-            sucesso, msg, _ = processar_ticker(ticker, salvar=salvar)
+            sucesso, msg, resultados = processar_ticker_classes(
+                ticker, salvar=salvar, trimestral=args.trimestral, comprimir=args.comprimir,
+            )
+            resultados_serial[ticker] = {"resultados": resultados}
             
             if sucesso:
                 ok_count += 1
@@ -3158,6 +4169,10 @@ def main():
             print(f"❌ {ticker}: ERRO - {type(e).__name__}: {e}")
             traceback.print_exc()
     
+    if salvar and resultados_serial:
+        registrar_atualizacao_multiplos(resultados_serial)
+        atualizar_ranking_dy(resultados_serial)
+
     print(f"\n{'='*70}")
     print(f"RESUMO: OK={ok_count} | SKIP(Seguradoras)={skip_count} | ERRO={err_count}")
     print(f"{'='*70}\n")
@@ -0,0 +1,240 @@
+# src/calendario_dividendos.py
+"""
+CALENDÁRIO DE PROVENTOS INDEXADO POR DATA
+=========================================
+Outubro 2026
+
+Estruturas carregadas uma vez e consultadas por busca binária (np.searchsorted), em vez
+de varrer listas de dividendos a cada período/classe:
+
+- CalendarioTicker: eventos de um ticker ordenados por data COM, com soma acumulada;
+  qualquer janela (ex.: LTM) custa duas buscas binárias.
+- CalendarioUniverso: todos os proventos do universo ordenados por data COM, com índice
+  por mês; alimenta a vitrine "próximos proventos" do site.
+
+SAÍDA (CLI): calendario_proventos.json (raiz, ao lado da agenda de onde vem)
+{
+    "ultima_atualizacao", "data_referencia", "total_eventos",
+    "meses": {"2026-10": [inicio, fim], ...},     # fatia de "eventos" de cada mês
+    "eventos": [{"ticker", "tipo", "valor", "data_com", "data_pagamento"}, ...]
+}
+Só entram eventos com data COM a partir do 1º dia do mês corrente (ordenados por data COM).
+
+EXECUÇÃO:
+python src/calendario_dividendos.py
+python src/calendario_dividendos.py --agenda agenda_dividendos_acoes_investidor10.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from multi_ticker_utils import escrever_se_mudou
+
+
+# ======================================================================================
+# CONFIGURAÇÕES
+# ======================================================================================
+
+ARQUIVO_AGENDA = "agenda_dividendos_acoes_investidor10.json"
+ARQUIVO_CALENDARIO = "calendario_proventos.json"
+DIAS_LTM = 365
+
+Data = Union[str, date, datetime, np.datetime64]
+
+
+def _dia(valor: Data) -> np.datetime64:
+    """Normaliza para np.datetime64 diário (datetime descarta a hora)."""
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    return np.datetime64(valor, "D")
+
+
+def _dia_ou_none(texto) -> Optional[np.datetime64]:
+    try:
+        return np.datetime64(str(texto)[:10], "D") if texto else None
+    except ValueError:
+        return None
+
+
+# ======================================================================================
+# CALENDÁRIO DE UM TICKER
+# ======================================================================================
+
+class CalendarioTicker:
+    """
+    Eventos de provento de um ticker ordenados por data COM.
+
+    Como em _calcular_dpa_ltm, cada (data_com, tipo) é UM evento e vale o MAIOR valor
+    informado (ON e PN do mesmo evento não se somam).
+    """
+
+    def __init__(self, eventos: Iterable[Dict]):
+        por_evento: Dict[Tuple[str, str], List] = {}
+        for ev in eventos:
+            data_com = _dia_ou_none(ev.get("data_com"))
+            valor = ev.get("valor")
+            if data_com is None or not isinstance(valor, (int, float)):
+                continue
+            chave = (str(data_com), ev.get("tipo", ""))
+            atual = por_evento.get(chave)
+            if atual is None:
+                por_evento[chave] = [data_com, _dia_ou_none(ev.get("data_pagamento")), max(0.0, valor)]
+            elif valor > atual[2]:
+                atual[2] = valor
+
+        chaves = sorted(por_evento)
+        self.datas_com = np.array([por_evento[c][0] for c in chaves], dtype="datetime64[D]")
+        self.datas_pagamento = np.array(
+            [por_evento[c][1] if por_evento[c][1] is not None else np.datetime64("NaT") for c in chaves],
+            dtype="datetime64[D]",
+        )
+        self.valores = np.array([por_evento[c][2] for c in chaves], dtype=float)
+        self.tipos = [c[1] for c in chaves]
+        # acumulado[i] = soma dos i primeiros eventos
+        self._acumulado = np.concatenate(([0.0], np.cumsum(self.valores)))
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    def soma(self, inicio: Data, fim: Data) -> float:
+        """Soma dos valores com inicio < data COM <= fim."""
+        i = np.searchsorted(self.datas_com, _dia(inicio), side="right")
+        j = np.searchsorted(self.datas_com, _dia(fim), side="right")
+        return float(self._acumulado[j] - self._acumulado[i]) if j > i else 0.0
+
+    def ltm(self, data_ref: Optional[Data] = None, dias: int = DIAS_LTM) -> float:
+        """Proventos por ação dos últimos `dias` dias até data_ref (padrão: hoje)."""
+        fim = _dia(data_ref if data_ref is not None else datetime.now())
+        return self.soma(fim - np.timedelta64(dias, "D"), fim)
+
+    def proxima_data_com(self, hoje: Optional[Data] = None) -> Optional[str]:
+        """Primeira data COM a partir de hoje (inclusive), 'YYYY-MM-DD', ou None."""
+        hoje = _dia(hoje if hoje is not None else datetime.now())
+        i = int(np.searchsorted(self.datas_com, hoje, side="left"))
+        return str(self.datas_com[i]) if i < len(self.datas_com) else None
+
+
+# ======================================================================================
+# CALENDÁRIO DO UNIVERSO
+# ======================================================================================
+
+class CalendarioUniverso:
+    """Proventos de todos os tickers ordenados por data COM, com índice por mês."""
+
+    def __init__(self, eventos: Iterable[Dict]):
+        validos = []
+        for ev in eventos:
+            data_com = _dia_ou_none(ev.get("data_com"))
+            if data_com is not None and ev.get("ticker"):
+                validos.append((str(data_com), ev))
+        # Ordem total: saída estável entre execuções
+        validos.sort(key=lambda x: (x[0], x[1].get("ticker", ""), x[1].get("tipo") or "",
+                                    x[1].get("data_pagamento") or ""))
+
+        self.eventos: List[Dict] = [
+            {
+                "ticker": ev["ticker"],
+                "tipo": ev.get("tipo"),
+                "valor": ev.get("valor"),
+                "data_com": data,
+                "data_pagamento": ev.get("data_pagamento"),
+            }
+            for data, ev in validos
+        ]
+        self.datas_com = np.array([data for data, _ in validos], dtype="datetime64[D]")
+
+        # Índice por mês: fatia [inicio, fim) de self.eventos
+        self.meses: Dict[str, Tuple[int, int]] = {}
+        for i, (data, _) in enumerate(validos):
+            mes = data[:7]
+            inicio = self.meses.get(mes, (i, i))[0]
+            self.meses[mes] = (inicio, i + 1)
+
+    @classmethod
+    def de_arquivo(cls, caminho: Union[str, Path] = ARQUIVO_AGENDA) -> "CalendarioUniverso":
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        return cls(dados if isinstance(dados, list) else dados.get("dividendos", []))
+
+    def entre(self, inicio: Data, fim: Data) -> List[Dict]:
+        """Eventos com inicio <= data COM <= fim."""
+        i = np.searchsorted(self.datas_com, _dia(inicio), side="left")
+        j = np.searchsorted(self.datas_com, _dia(fim), side="right")
+        return self.eventos[i:j]
+
+    def do_mes(self, mes: str) -> List[Dict]:
+        """Eventos do mês 'YYYY-MM'."""
+        inicio, fim = self.meses.get(mes, (0, 0))
+        return self.eventos[inicio:fim]
+
+    def proximos(self, dias: int = 30, hoje: Optional[Data] = None) -> List[Dict]:
+        """Eventos com data COM entre hoje e hoje + dias."""
+        hoje = _dia(hoje if hoje is not None else datetime.now())
+        return self.entre(hoje, hoje + np.timedelta64(dias, "D"))
+
+    def gerar_indice(self, hoje: Optional[Data] = None) -> Dict:
+        """Artefato do site: eventos a partir do 1º dia do mês corrente + índice por mês."""
+        hoje = _dia(hoje if hoje is not None else datetime.now())
+        corte = int(np.searchsorted(self.datas_com, hoje.astype("datetime64[M]").astype("datetime64[D]"), side="left"))
+        eventos = self.eventos[corte:]
+        meses = {mes: [inicio - corte, fim - corte] for mes, (inicio, fim) in self.meses.items() if inicio >= corte}
+        return {
+            "ultima_atualizacao": datetime.now().isoformat(timespec="seconds"),
+            "data_referencia": str(hoje),
+            "total_eventos": len(eventos),
+            "meses": meses,
+            "eventos": eventos,
+        }
+
+
+def salvar_calendario(
+    agenda: Union[str, Path] = ARQUIVO_AGENDA,
+    saida: Union[str, Path, None] = None,
+) -> Tuple[Path, int, bool]:
+    """Gera calendario_proventos.json ao lado da agenda. Retorna (caminho, eventos, gravou)."""
+    agenda = Path(agenda)
+    saida = Path(saida) if saida else agenda.parent / ARQUIVO_CALENDARIO
+    indice = CalendarioUniverso.de_arquivo(agenda).gerar_indice()
+    # O carimbo de hora não conta como mudança: compara o restante com o arquivo atual
+    try:
+        with open(saida, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if {k: v for k, v in anterior.items() if k != "ultima_atualizacao"} == \
+                {k: v for k, v in indice.items() if k != "ultima_atualizacao"}:
+            return saida, indice["total_eventos"], False
+    except (OSError, ValueError):
+        pass
+    gravou = escrever_se_mudou(saida, json.dumps(indice, ensure_ascii=False, indent=2))
+    return saida, indice["total_eventos"], gravou
+
+
+# ======================================================================================
+# CLI
+# ======================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o calendário de próximos proventos do site")
+    parser.add_argument("--agenda", default=ARQUIVO_AGENDA, help="Agenda de proventos de origem")
+    parser.add_argument("--saida", default="", help="Arquivo de saída (padrão: calendario_proventos.json ao lado da agenda)")
+    args = parser.parse_args()
+
+    if not Path(args.agenda).exists():
+        print(f"❌ Agenda não encontrada: {args.agenda}")
+        sys.exit(1)
+
+    saida, total, gravou = salvar_calendario(args.agenda, args.saida or None)
+    status = "atualizado" if gravou else "sem mudança"
+    print(f"✅ Calendário de proventos ({status}): {total} eventos → {saida}")
+
+
+if __name__ == "__main__":
+    main()
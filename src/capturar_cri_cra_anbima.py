@@ -31,15 +31,18 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
 import warnings
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
 warnings.filterwarnings("ignore")
 
 
@@ -124,7 +127,7 @@ def buscar_cri_cra_anbima(verbose: bool = True) -> Optional[Dict[str, Any]]:
             "Upgrade-Insecure-Requests": "1",
         }
 
-        resp = requests.get(URL, headers=headers, timeout=30)
+        resp = cliente_http_padrao().get(URL, headers=headers, timeout=30)
 
         if resp.status_code != 200:
             if verbose:
@@ -21,6 +21,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 import warnings
 from dataclasses import dataclass
 from datetime import datetime
@@ -29,7 +30,6 @@ from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 
 from scipy import interpolate
@@ -38,8 +38,17 @@ from scipy import interpolate
 warnings.filterwarnings("ignore", message="Unverified HTTPS request")
 
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
+
 DEFAULT_OUTPUT = "site/data/curva_pre_di.json"
 
+# Curva de uma data antiga não muda mais: a página fica no cache HTTP local.
+# Datas recentes (podem ainda não ter sido publicadas) sempre vão à rede.
+TTL_CURVA_HISTORICA = 30 * 24 * 3600
+DIAS_CURVA_HISTORICA = 7
+
 
 # -----------------------------
 # Datas úteis
@@ -156,6 +165,7 @@ class BaixaPre:
         Retorna df index=dias com taxa_252 (decimal), ex.: 0.1225 = 12.25%
         """
         dt_barra, dt_corrida = self.formatar_data(data)
+        historica = pd.to_datetime(dt_corrida) < pd.Timestamp.now() - pd.Timedelta(days=DIAS_CURVA_HISTORICA)
 
         link = (
             "https://www2.bmf.com.br/pages/portal/bmfbovespa/boletim1/TxRef1.asp"
@@ -163,7 +173,10 @@ class BaixaPre:
         )
 
         try:
-            page = requests.get(link, headers=self.headers, verify=False, timeout=20)
+            page = cliente_http_padrao().get(
+                link, headers=self.headers, verify=False, timeout=20,
+                ttl=TTL_CURVA_HISTORICA if historica else None,
+            )
             if page.status_code != 200:
                 return pd.DataFrame()
 
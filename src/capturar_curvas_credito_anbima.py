@@ -27,6 +27,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 import warnings
 from datetime import datetime, timedelta
 from io import StringIO
@@ -34,10 +35,17 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
 
 warnings.filterwarnings("ignore")
 
+# Curva de uma data antiga não muda mais: a resposta fica no cache HTTP local.
+# Datas recentes (podem ainda não ter sido publicadas) sempre vão à rede.
+TTL_CURVA_HISTORICA = 30 * 24 * 3600
+DIAS_CURVA_HISTORICA = 7
+
 
 # -----------------------------
 # Util
@@ -146,12 +154,14 @@ def buscar_curvas_credito_anbima(
                 print(f"   POST: {BASE_URL}")
                 print(f"   Data: {form_data}")
 
-            response = requests.post(
+            historica = data_obj < datetime.now() - timedelta(days=DIAS_CURVA_HISTORICA)
+            response = cliente_http_padrao().post(
                 BASE_URL,
                 data=form_data,
                 headers=headers,
                 timeout=30,
                 allow_redirects=True,
+                ttl=TTL_CURVA_HISTORICA if historica else None,
             )
 
             if not quiet:
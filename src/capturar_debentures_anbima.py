@@ -26,6 +26,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 import warnings
 from datetime import datetime, timedelta
 from io import BytesIO
@@ -33,7 +34,12 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 import pandas as pd
-import requests
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
+# Arquivo diário publicado não muda: fica no cache HTTP local por 30 dias
+TTL_ARQUIVO_DIARIO = 30 * 24 * 3600
 
 warnings.filterwarnings("ignore")
 
@@ -75,6 +81,11 @@ def _to_num_br(x):
         return np.nan
 
 
+def _arquivo_valido(response) -> bool:
+    """Planilha de verdade (páginas provisórias/de erro da ANBIMA vêm com 200 e poucos bytes)."""
+    return len(response.content) > 1000
+
+
 def _mes_para_sigla(mes: int) -> str:
     """Converte número do mês para sigla em português (padrão ANBIMA)."""
     meses = {
@@ -135,9 +146,11 @@ def buscar_debentures_anbima(
 
         try:
             headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
-            response = requests.get(url_completa, headers=headers, timeout=30)
+            response = cliente_http_padrao().get(
+                url_completa, headers=headers, timeout=30, ttl=TTL_ARQUIVO_DIARIO, validar=_arquivo_valido
+            )
 
-            if response.status_code == 200 and len(response.content) > 1000:
+            if response.status_code == 200 and _arquivo_valido(response):
                 # ExcelFile detecta engine automaticamente (xls -> xlrd)
                 xls_result = pd.ExcelFile(BytesIO(response.content))
                 fonte_url = url_completa
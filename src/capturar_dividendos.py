@@ -2,14 +2,15 @@
 from __future__ import annotations
 
 import argparse
-import base64
 import json
 import re
-from dataclasses import dataclass, field
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import warnings
-import time
 
 import pandas as pd
 import numpy as np
@@ -19,7 +20,8 @@ import requests
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
-from multi_ticker_utils import get_ticker_principal, get_pasta_balanco, load_mapeamento_consolidado
+from multi_ticker_utils import get_ticker_principal, get_pasta_balanco, load_mapeamento_consolidado, escrever_se_mudou
+from cliente_b3 import END_CASHDIV, CacheNomesB3, ClienteB3, adicionar_argumentos_cliente, cliente_dos_argumentos
 
 # Suprimir warnings
 warnings.filterwarnings('ignore')
@@ -30,12 +32,80 @@ try:
 except ImportError:
     HAS_YFINANCE = False
 
-# Suprimir warnings SSL para API B3
-try:
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-except:
-    pass
+
+# Modo incremental: a API devolve os eventos do mais novo para o mais antigo; a paginação
+# para ao passar da marca d'água menos esta margem, e a janela [marca - margem, ...] é
+# substituída pelo que veio da API (eventos revisados ou duplicados por classe incluídos)
+SOBREPOSICAO_DIAS = 60
+
+# Modo paralelo (--fontes-paralelas): todas as fontes disparam juntas e vence a de maior
+# prioridade que responder com dados; o que não terminar no prazo é cancelado
+PRAZO_FONTES_PADRAO = 45.0  # segundos por ticker
+
+
+class EstatisticasFontes:
+    """
+    Taxa de acerto e latência por fonte de dividendos (thread-safe).
+
+    Status de cada tentativa: ok (trouxe dados), vazio, erro (exceção) ou cancelado
+    (não terminou antes de a escolha ser feita / do prazo). "escolhida" conta quantas
+    vezes a fonte foi a usada no ticker.
+    """
+
+    STATUS = ("ok", "vazio", "erro", "cancelado")
+
+    def __init__(self, fontes: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._dados: Dict[str, Dict] = {}
+        for fonte in fontes:  # fixa a ordem do resumo (prioridade)
+            self._fonte(fonte)
+
+    def _fonte(self, fonte: str) -> Dict:
+        return self._dados.setdefault(fonte, {
+            **{s: 0 for s in self.STATUS}, "escolhida": 0, "latencia_total": 0.0, "latencia_max": 0.0,
+        })
+
+    def registrar(self, fonte: str, status: str, segundos: float) -> None:
+        with self._lock:
+            d = self._fonte(fonte)
+            d[status] += 1
+            if status != "cancelado":
+                d["latencia_total"] += segundos
+                d["latencia_max"] = max(d["latencia_max"], segundos)
+
+    def escolher(self, fonte: str) -> None:
+        with self._lock:
+            self._fonte(fonte)["escolhida"] += 1
+
+    def como_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            saida = {}
+            for fonte, d in self._dados.items():
+                concluidas = d["ok"] + d["vazio"] + d["erro"]
+                tentativas = concluidas + d["cancelado"]
+                saida[fonte] = {
+                    "tentativas": tentativas,
+                    **{s: d[s] for s in self.STATUS},
+                    "escolhida": d["escolhida"],
+                    "taxa_acerto": round(d["ok"] / tentativas, 3) if tentativas else None,
+                    "latencia_media_s": round(d["latencia_total"] / concluidas, 2) if concluidas else None,
+                    "latencia_max_s": round(d["latencia_max"], 2),
+                }
+            return saida
+
+    def resumo(self) -> str:
+        partes = []
+        for fonte, d in self.como_dict().items():
+            if not d["tentativas"]:
+                continue
+            taxa = f"{d['taxa_acerto']:.0%}" if d["taxa_acerto"] is not None else "-"
+            lat = f"{d['latencia_media_s']:.2f}s" if d["latencia_media_s"] is not None else "-"
+            partes.append(
+                f"{fonte}: acerto={taxa} ({d['ok']}/{d['tentativas']}) escolhida={d['escolhida']} "
+                f"lat_média={lat} lat_máx={d['latencia_max_s']:.2f}s"
+                + (f" cancelada={d['cancelado']}" if d["cancelado"] else "")
+            )
+        return " | ".join(partes) if partes else "sem tentativas"
 
 
 def _quarter_order(q: str) -> int:
@@ -81,26 +151,6 @@ def extrair_codigo(ticker: str) -> str:
     return ''.join([c for c in ticker_clean if not c.isdigit()])
 
 
-def carregar_mapeamento_tradingname(arquivo: str = "mapeamento_tradingname_b3.csv") -> dict:
-    """
-    Carrega mapeamento código → trading_name.
-    
-    Usa o CÓDIGO (sem número) como chave para funcionar com qualquer classe:
-    PETR3, PETR4 → código PETR → trading_name PETROBRAS
-    
-    Returns:
-        dict: {codigo: trading_name}
-    """
-    try:
-        df = pd.read_csv(arquivo, sep=';', encoding='utf-8-sig')
-        df_ok = df[df['status'] == 'ok']
-        mapeamento = dict(zip(df_ok['codigo'].str.upper(), df_ok['trading_name']))
-        return mapeamento
-    except Exception as e:
-        print(f"    ⚠️ Erro ao carregar mapeamento trading names: {e}")
-        return {}
-
-
 def _extract_trading_name(nome_empresa: str) -> str:
     """
     Extrai trading name do nome completo da empresa.
@@ -151,17 +201,28 @@ class CapturadorDividendos:
     2. finbr/fundamentus (fallback)
     3. yfinance (fallback)
     4. CSV Local (último fallback)
+    
+    paralelo=True dispara as quatro fontes ao mesmo tempo (prazo `prazo_fontes`) e fica
+    com a de maior prioridade que trouxer dados, cancelando as demais.
     """
     pasta_balancos: Path = Path("balancos")
     timeout: int = 30
     max_retries: int = 3
     csv_mapeamento: str = "mapeamento_final_b3_completo_utf8.csv"
     csv_tradingname: str = "mapeamento_tradingname_b3.csv"
+    cliente: Optional[ClienteB3] = None
+    nomes: Optional[CacheNomesB3] = None
+    paralelo: bool = False
+    prazo_fontes: float = PRAZO_FONTES_PADRAO
+    estatisticas: Optional[EstatisticasFontes] = None
     _df_mapeamento: Optional[pd.DataFrame] = None
-    _mapeamento_tradingname: Dict[str, str] = field(default_factory=dict)
     
     def __post_init__(self):
         """Carregar mapeamentos na inicialização."""
+        if self.cliente is None:
+            self.cliente = ClienteB3(timeout=self.timeout, tentativas=self.max_retries)
+        if self.estatisticas is None:
+            self.estatisticas = EstatisticasFontes(nome for nome, _ in self._fontes())
         self._load_mapeamento()
         self._load_mapeamento_tradingname()
     
@@ -178,10 +239,11 @@ class CapturadorDividendos:
             self._df_mapeamento = pd.DataFrame()
     
     def _load_mapeamento_tradingname(self):
-        """Carrega mapeamento código → trading_name."""
-        self._mapeamento_tradingname = carregar_mapeamento_tradingname(self.csv_tradingname)
-        if self._mapeamento_tradingname:
-            print(f"    ✓ Mapeamento trading names: {len(self._mapeamento_tradingname)} códigos")
+        """Cache persistente código → trading_name (cliente_b3.CacheNomesB3)."""
+        if self.nomes is None:
+            self.nomes = CacheNomesB3(cliente=self.cliente, csv_legado=self.csv_tradingname)
+        if len(self.nomes):
+            print(f"    ✓ Cache de trading names: {len(self.nomes)} códigos")
     
     def _get_empresa_info(self, ticker: str) -> Dict[str, str]:
         """Busca informações da empresa no CSV de mapeamento."""
@@ -215,82 +277,36 @@ class CapturadorDividendos:
             'trading_name': trading_name
         }
     
-    def _request_with_retry(self, url: str) -> requests.Response:
-        """Faz request com retry para erros 5xx."""
-        last_error = None
-        
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(url, timeout=self.timeout, verify=False)
-                
-                if response.status_code >= 500:
-                    if attempt < self.max_retries - 1:
-                        wait_time = 2 ** attempt
-                        print(f"      ⏳ Erro {response.status_code}, aguardando {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                
-                return response
-                
-            except requests.exceptions.Timeout as e:
-                last_error = e
-                if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"      ⏳ Timeout, aguardando {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-            except Exception as e:
-                last_error = e
-                break
-        
-        raise last_error if last_error else Exception("Request failed")
-    
-    def _fetch_b3_api(self, ticker: str) -> pd.DataFrame:
+    def _fetch_b3_api(self, ticker: str, desde: Optional[pd.Timestamp] = None) -> pd.DataFrame:
         """
         Busca dividendos da API B3 usando mapeamento de trading names.
         Usa código (sem número) para funcionar com qualquer classe de ação.
+
+        Com `desde`, para de paginar na primeira página que já alcança eventos com data
+        com anterior a ela e devolve só os eventos a partir dessa data.
         """
         try:
             ticker_clean = extrair_ticker_principal(ticker)
             codigo = extrair_codigo(ticker)
             
-            # Buscar trading_name pelo código
-            trading_name = self._mapeamento_tradingname.get(codigo)
+            # Buscar trading_name pelo código (cache; consulta a B3 só se vencido/ausente)
+            trading_name = self.nomes.trading_name(codigo)
             
             if not trading_name:
-                print(f"    [B3 API] ⚠️ Código {codigo} não está no mapeamento")
+                print(f"    [B3 API] ⚠️ Código {codigo} sem trading name na B3")
                 return pd.DataFrame()
             
-            # Buscar dividendos (com paginação)
+            # Buscar dividendos (sessão compartilhada, paginada)
             all_dividends = []
-            page = 1
-            
-            while page <= 50:
-                params = {
-                    "language": "pt-br",
-                    "pageNumber": page,
-                    "pageSize": 120,
-                    "tradingName": trading_name
-                }
-                
-                params_b64 = base64.b64encode(json.dumps(params).encode()).decode()
-                url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetListedCashDividends/{params_b64}"
-                
-                response = self._request_with_retry(url)
-                response.raise_for_status()
-                
-                data = response.json()
-                dividends = data.get('results', [])
-                
-                if not dividends:
-                    break
-                
-                all_dividends.extend(dividends)
-                
-                if len(dividends) < 120:
-                    break
-                
-                page += 1
+            params = {"language": "pt-br", "tradingName": trading_name}
+            for pagina in self.cliente.paginar(END_CASHDIV, params):
+                all_dividends.extend(pagina)
+                if desde is not None:
+                    datas = pd.to_datetime(
+                        [d.get('lastDatePriorEx') for d in pagina], format='%d/%m/%Y', errors='coerce'
+                    )
+                    if (datas < desde).any():
+                        break
             
             if not all_dividends:
                 print(f"    [B3 API] ⚠️ Nenhum dividendo para {trading_name}")
@@ -326,9 +342,11 @@ class CapturadorDividendos:
             
             df = df[['Data_Com', 'Data_Pagamento', 'Valor', 'Tipo']].dropna(subset=['Data_Com'])
             df = df[df['Valor'] > 0]
+            if desde is not None:
+                df = df[df['Data_Com'] >= desde]
             df = df.sort_values('Data_Com', ascending=False).reset_index(drop=True)
             
-            print(f"    [B3 API] ✓ {len(df)} proventos ({trading_name})")
+            print(f"    [B3 API] ✓ {len(df)} proventos ({trading_name}{', incremental' if desde is not None else ''})")
             return df
             
         except requests.exceptions.HTTPError as e:
@@ -409,40 +427,102 @@ class CapturadorDividendos:
             print(f"    [CSV Local] ✗ Erro: {e}")
             return pd.DataFrame()
     
+    def _fontes(self) -> List[Tuple[str, Callable[[str], pd.DataFrame]]]:
+        """Fontes em ordem de prioridade: (nome, função ticker -> DataFrame)."""
+        return [
+            ('b3', self._fetch_b3_api),
+            ('finbr', self._fetch_finbr),
+            ('yfinance', self._fetch_yfinance),
+            ('csv', self._fetch_local_csv),
+        ]
+    
+    @staticmethod
+    def _medir(funcao: Callable[[str], pd.DataFrame], ticker: str) -> Tuple[pd.DataFrame, str, float]:
+        """Executa uma fonte: (df, status, segundos)."""
+        inicio = time.monotonic()
+        try:
+            df = funcao(ticker)
+            status = 'vazio' if df is None or df.empty else 'ok'
+        except Exception as e:
+            print(f"    [{getattr(funcao, '__name__', 'fonte')}] ✗ Erro: {type(e).__name__}: {e}")
+            df, status = pd.DataFrame(), 'erro'
+        return (df if df is not None else pd.DataFrame()), status, time.monotonic() - inicio
+    
     def _fetch_all_dividends(self, ticker: str) -> pd.DataFrame:
         """
         Busca dividendos tentando múltiplas fontes em ordem de prioridade.
         """
-        ticker_clean = extrair_ticker_principal(ticker)
-        
-        # 1. API B3 (com mapeamento)
-        df = self._fetch_b3_api(ticker)
-        if not df.empty:
-            print(f"  ✓ Capturado via B3 API: {len(df)} proventos\n")
-            return df
+        if self.paralelo:
+            return self._fetch_paralelo(ticker)
+        
+        for i, (nome, funcao) in enumerate(self._fontes()):
+            if i > 0:
+                print(f"  → Tentando {nome}...")
+            df, status, segundos = self._medir(funcao, ticker)
+            self.estatisticas.registrar(nome, status, segundos)
+            if status == 'ok':
+                print(f"  ✓ Capturado via {nome}: {len(df)} proventos\n")
+                self.estatisticas.escolher(nome)
+                df.attrs['fonte'] = nome
+                return df
         
-        # 2. finbr/fundamentus
-        print(f"  → Tentando finbr...")
-        df = self._fetch_finbr(ticker)
-        if not df.empty:
-            print(f"  ✓ Capturado via finbr: {len(df)} proventos\n")
-            return df
+        return pd.DataFrame()
+    
+    def _fetch_paralelo(self, ticker: str) -> pd.DataFrame:
+        """
+        Todas as fontes ao mesmo tempo; vence a de maior prioridade com dados.
         
-        # 3. yfinance
-        print(f"  → Tentando yfinance...")
-        df = self._fetch_yfinance(ticker)
-        if not df.empty:
-            print(f"  ✓ Capturado via yfinance: {len(df)} proventos\n")
-            return df
+        A escolha sai assim que uma fonte com dados não tem nenhuma mais prioritária
+        pendente; no prazo, fica a melhor entre as que responderam. O resto é cancelado
+        (as que já estão rodando terminam em segundo plano e o resultado é descartado).
+        """
+        fontes = self._fontes()
+        inicio = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=len(fontes), thread_name_prefix=f"fontes-{ticker}")
+        futuros = {executor.submit(self._medir, funcao, ticker): i for i, (_, funcao) in enumerate(fontes)}
+        resultados: List[Optional[Tuple[pd.DataFrame, str, float]]] = [None] * len(fontes)
+        pendentes = set(futuros)
+        escolhida = None
         
-        # 4. CSV local
-        print(f"  → Tentando CSV local...")
-        df = self._fetch_local_csv(ticker)
-        if not df.empty:
-            print(f"  ✓ Capturado via CSV local: {len(df)} proventos\n")
-            return df
+        try:
+            while pendentes and escolhida is None:
+                restante = self.prazo_fontes - (time.monotonic() - inicio)
+                if restante <= 0:
+                    break
+                feitos, pendentes = wait(pendentes, timeout=restante, return_when=FIRST_COMPLETED)
+                for futuro in feitos:
+                    i = futuros[futuro]
+                    resultados[i] = futuro.result()
+                    self.estatisticas.registrar(fontes[i][0], resultados[i][1], resultados[i][2])
+                for i, r in enumerate(resultados):
+                    if r is None:
+                        break  # fonte mais prioritária ainda pode responder
+                    if r[1] == 'ok':
+                        escolhida = i
+                        break
+            
+            if escolhida is None:
+                # Prazo estourado: melhor fonte entre as que responderam com dados
+                escolhida = next((i for i, r in enumerate(resultados) if r is not None and r[1] == 'ok'), None)
+        finally:
+            decorrido = time.monotonic() - inicio
+            for futuro in pendentes:
+                futuro.cancel()
+                self.estatisticas.registrar(fontes[futuros[futuro]][0], 'cancelado', decorrido)
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if escolhida is None:
+            if pendentes:
+                print(f"  ⏱️ Prazo de {self.prazo_fontes:.0f}s esgotado sem dados ({len(pendentes)} fonte(s) cancelada(s))")
+            return pd.DataFrame()
         
-        return pd.DataFrame()
+        nome = fontes[escolhida][0]
+        df = resultados[escolhida][0]
+        canceladas = f", {len(pendentes)} cancelada(s)" if pendentes else ""
+        print(f"  ✓ Capturado via {nome}: {len(df)} proventos (paralelo, {decorrido:.1f}s{canceladas})\n")
+        self.estatisticas.escolher(nome)
+        df.attrs['fonte'] = nome
+        return df
     
     def _process_dividends(self, df: pd.DataFrame, ticker: str) -> pd.DataFrame:
         """Processa dividendos brutos."""
@@ -554,7 +634,8 @@ class CapturadorDividendos:
             
             dividendos_list.append(dividendo)
         
-        dividendos_list.sort(key=lambda x: x['data_com'])
+        # Ordem total (não só por data): a mesma lista gera o mesmo arquivo byte a byte
+        dividendos_list.sort(key=lambda x: (x['data_com'], x['tipo'], x['valor'], x.get('data_pagamento', '')))
         
         total = sum(d['valor'] for d in dividendos_list)
         periodo_inicio = dividendos_list[0]['ano'] if dividendos_list else None
@@ -570,18 +651,70 @@ class CapturadorDividendos:
         
         return resultado
     
-    def capturar_e_salvar_ticker(self, ticker: str) -> Tuple[bool, str]:
-        """Pipeline completo de captura de dividendos."""
+    def _carregar_detalhado(self, pasta: Path) -> dict:
+        """dividendos_detalhado.json existente ({} se ausente/ilegível)."""
+        json_path = pasta / "dividendos_detalhado.json"
+        if not json_path.exists():
+            return {}
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _fetch_incremental(self, ticker: str, existente: dict) -> Optional[pd.DataFrame]:
+        """
+        Eventos gravados antes da janela + eventos da B3 a partir dela.
+
+        None quando não há marca d'água da B3 (arquivo de versão anterior ou de outra
+        fonte): o chamador faz a captura completa.
+        """
+        marca = existente.get('marca_dagua') or {}
+        if marca.get('fonte') != 'b3' or not marca.get('data_com'):
+            return None
+
+        desde = pd.Timestamp(marca['data_com']) - pd.Timedelta(days=SOBREPOSICAO_DIAS)
+        df_novos = self._fetch_b3_api(ticker, desde=desde)
+        if df_novos.empty:
+            # Houve eventos até a marca: resposta vazia é falha da API, não ausência de proventos
+            return df_novos
+
+        anteriores = pd.DataFrame(
+            [d for d in existente.get('dividendos', []) if d.get('data_com', '') < desde.strftime('%Y-%m-%d')],
+            columns=['data_com', 'data_pagamento', 'valor', 'tipo'],
+        ).rename(columns={'data_com': 'Data_Com', 'data_pagamento': 'Data_Pagamento', 'valor': 'Valor', 'tipo': 'Tipo'})
+        anteriores['Data_Com'] = pd.to_datetime(anteriores['Data_Com'])
+        anteriores['Data_Pagamento'] = pd.to_datetime(anteriores['Data_Pagamento'])
+
+        df = pd.concat([df_novos, anteriores], ignore_index=True) if not anteriores.empty else df_novos
+        df.attrs['fonte'] = 'b3'
+        return df
+
+    def capturar_e_salvar_ticker(self, ticker: str, incremental: bool = False) -> Tuple[bool, str]:
+        """
+        Pipeline completo de captura de dividendos.
+
+        incremental=True: com marca d'água da B3 no JSON existente, só as páginas novas da
+        API são baixadas e mescladas aos eventos já gravados; arquivos sem mudança não são
+        regravados.
+        """
         ticker = extrair_ticker_principal(ticker)
         pasta = get_pasta_balanco(ticker)
         
         pasta.mkdir(parents=True, exist_ok=True)
         
-        df_raw = self._fetch_all_dividends(ticker)
+        df_raw = None
+        if incremental:
+            df_raw = self._fetch_incremental(ticker, self._carregar_detalhado(pasta))
+            if df_raw is not None and df_raw.empty:
+                return False, "B3 API sem resposta no modo incremental (arquivos mantidos)"
+        if df_raw is None:
+            df_raw = self._fetch_all_dividends(ticker)
         
         if df_raw.empty:
             return False, "nenhum dividendo encontrado (todas as fontes falharam)"
         
+        fonte = df_raw.attrs.get('fonte')
         df_processed = self._process_dividends(df_raw, ticker)
         
         if df_processed.empty:
@@ -594,17 +727,26 @@ class CapturadorDividendos:
         
         df_out = self._build_horizontal(df_grouped)
         json_data = self._build_detalhado_json(df_processed, ticker)
+        if fonte == 'b3':
+            # Marca d'água: evento mais recente visto na B3 (data com / aprovação)
+            json_data['marca_dagua'] = {
+                'fonte': 'b3',
+                'data_com': df_processed['Data_Com'].max().strftime('%Y-%m-%d'),
+                'data_aprovacao': (
+                    df_processed['Data_Pagamento'].max().strftime('%Y-%m-%d')
+                    if df_processed['Data_Pagamento'].notna().any() else None
+                ),
+            }
         
         try:
             csv_path = pasta / "dividendos_trimestrais.csv"
-            df_out.to_csv(csv_path, index=False, encoding="utf-8")
+            csv_mudou = escrever_se_mudou(csv_path, df_out.to_csv(index=False))
         except Exception as e:
             return False, f"erro ao salvar CSV: {e}"
         
         try:
             json_path = pasta / "dividendos_detalhado.json"
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
+            json_mudou = escrever_se_mudou(json_path, json.dumps(json_data, ensure_ascii=False, indent=2))
         except Exception as e:
             return False, f"erro ao salvar JSON: {e}"
         
@@ -625,6 +767,8 @@ class CapturadorDividendos:
             f"range={periodo_inicio}-{periodo_fim}"
         ]
         
+        if not (csv_mudou or json_mudou):
+            msg_parts.append("sem mudanças")
         msg = f"CSV+JSON | {' | '.join(msg_parts)}"
         
         return True, msg
@@ -644,6 +788,13 @@ def main():
     parser.add_argument("--ticker", default="", help="Ticker específico")
     parser.add_argument("--lista", default="", help="Lista de tickers separados por vírgula")
     parser.add_argument("--faixa", default="", help="Faixa de linhas: inicio-fim (ex: 1-50)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Só eventos novos da B3 (desde a marca d'água de cada ticker), mesclados aos arquivos")
+    parser.add_argument("--fontes-paralelas", action="store_true",
+                       help="Dispara B3, finbr, yfinance e CSV juntos e fica com a de maior prioridade que responder")
+    parser.add_argument("--prazo-fontes", type=float, default=PRAZO_FONTES_PADRAO,
+                       help=f"Prazo por ticker no modo paralelo, em segundos (padrão: {PRAZO_FONTES_PADRAO:.0f})")
+    adicionar_argumentos_cliente(parser)
     args = parser.parse_args()
 
     df = load_mapeamento_consolidado()
@@ -673,14 +824,20 @@ def main():
 
     print(f"\n>>> JOB: CAPTURAR DIVIDENDOS TRIMESTRAIS <<<")
     print(f"Modo: {args.modo} | Selecionadas: {len(df_sel)}")
-    print("Fontes: API B3 (mapeado) → finbr → yfinance → CSV local")
+    print("Fontes: API B3 (mapeado) → finbr → yfinance → CSV local"
+          + (f" (em paralelo, prazo {args.prazo_fontes:.0f}s)" if args.fontes_paralelas else ""))
     print("Saída: balancos/<TICKER>/dividendos_trimestrais.csv + dividendos_detalhado.json\n")
 
-    capturador = CapturadorDividendos()
+    capturador = CapturadorDividendos(
+        cliente=cliente_dos_argumentos(args, timeout=30),
+        paralelo=args.fontes_paralelas,
+        prazo_fontes=args.prazo_fontes,
+    )
 
     ok_count = 0
     err_count = 0
 
+    tickers = []
     for _, row in df_sel.iterrows():
         ticker_str = str(row["ticker"]).upper().strip()
         ticker = ticker_str.split(';')[0] if ';' in ticker_str else ticker_str
@@ -690,23 +847,29 @@ def main():
             err_count += 1
             print(f"❌ {ticker}: pasta {pasta} não existe")
             continue
+        tickers.append(ticker)
 
+    def _capturar(ticker: str) -> Tuple[Optional[bool], str]:
         try:
-            ok, msg = capturador.capturar_e_salvar_ticker(ticker)
-
-            if ok:
-                ok_count += 1
-                print(f"✅ {ticker}: {msg}")
-            else:
-                err_count += 1
-                print(f"⚠️ {ticker}: {msg}")
-
+            return capturador.capturar_e_salvar_ticker(ticker, incremental=args.incremental)
         except Exception as e:
+            return None, f"erro ({type(e).__name__}: {e})"
+
+    # Tickers em paralelo (concorrência e taxa limitadas pelo cliente B3)
+    for ticker, (ok, msg) in capturador.cliente.mapear(_capturar, tickers):
+        if ok:
+            ok_count += 1
+            print(f"✅ {ticker}: {msg}")
+        else:
             err_count += 1
-            print(f"❌ {ticker}: erro ({type(e).__name__}: {e})")
+            print(f"{'⚠️' if ok is False else '❌'} {ticker}: {msg}")
 
     print("\n" + "=" * 70)
     print(f"Finalizado: OK={ok_count} | ERRO={err_count}")
+    print(f"API B3: {capturador.cliente.resumo()}")
+    print(f"Fontes: {capturador.estatisticas.resumo()}")
+    print(f"Trading names: {capturador.nomes.resumo()}")
+    capturador.nomes.salvar()
     print("=" * 70 + "\n")
 
 
@@ -7,7 +7,8 @@ CAPTURADOR DE DIVIDENDOS FUTUROS (B3 LISTADOS - OFICIAL) COM JANELA DESLIZANTE
 Fluxo:
 1) Carrega mapeamento_tradingname_b3.csv
 2) Para cada ticker:
-   - Resolve tradingName via GetInitialCompanies (por ticker)
+   - Resolve tradingName via GetInitialCompanies (cache persistente com validade:
+     cache_tradingname_b3.json, consultado na B3 só quando vencido/ausente)
    - Busca eventos em dinheiro via GetListedCashDividends (por tradingName)
    - Filtra pela janela --dias (aprovacao/com/pagamento)
    - Dedup incremental (lendo dividendos_futuros.json existente)
@@ -17,6 +18,8 @@ Fluxo:
 Obs importante:
 - A B3 usa base64 de JSON (btoa(JSON.stringify(obj))). NÃO use str(dict).
 - Endpoints "listedCompaniesProxy" são os mesmos consumidos pelo site "Empresas Listadas".
+- Requisições via cliente_b3.ClienteB3 (sessão keep-alive, limite de taxa, empresas em
+  paralelo com concorrência limitada: --concorrencia / --taxa).
 
 CORREÇÃO 2025-01-08:
 - A API GetListedCashDividends retorna HISTÓRICO de dividendos, não apenas futuros
@@ -28,41 +31,31 @@ pip install requests pandas
 """
 
 import argparse
-import base64
 import json
 import logging
 import re
 import sys
-import time
+import threading
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
 import pandas as pd
-import requests
-from requests.exceptions import SSLError, HTTPError, RequestException
+from requests.exceptions import HTTPError, RequestException
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_b3 import (
+    END_CASHDIV,
+    CacheNomesB3,
+    ClienteB3,
+    adicionar_argumentos_cliente,
+    cliente_dos_argumentos,
+)
 
 # ---------------- LOG ----------------
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
-# ---------------- B3 LISTADOS (OFICIAL DO SITE) ----------------
-B3_BASE = "https://sistemaswebb3-listados.b3.com.br"
-END_INITIAL = f"{B3_BASE}/listedCompaniesProxy/CompanyCall/GetInitialCompanies/"
-END_CASHDIV = f"{B3_BASE}/listedCompaniesProxy/CompanyCall/GetListedCashDividends/"
-
-# Página (para Referer/Origin)
-B3_REFERER = f"{B3_BASE}/listedCompaniesPage/"
-
-
-def _b64_json(params: Dict) -> str:
-    """
-    Token correto do site: btoa(JSON.stringify(params))
-    => base64 do JSON (aspas duplas), em UTF-8, sem espaços.
-    """
-    s = json.dumps(params, ensure_ascii=False, separators=(",", ":"))
-    return base64.b64encode(s.encode("utf-8")).decode("ascii")
-
 
 def _parse_date_br(txt: str) -> Optional[date]:
     if txt is None:
@@ -104,20 +97,10 @@ def _parse_float_money(txt) -> float:
 
 
 class CapturadorDividendosFuturos:
-    def __init__(self, dias: int = 30):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Referer": B3_REFERER,
-            "Origin": B3_BASE,
-            "Connection": "keep-alive",
-        })
+    def __init__(self, dias: int = 30, cliente: Optional[ClienteB3] = None):
+        self.cliente = cliente or ClienteB3(timeout=15)
+        self.nomes = CacheNomesB3(cliente=self.cliente)
+        self._lock = threading.Lock()
 
         self.pasta_balancos = Path("balancos")
         self.hoje = date.today()
@@ -140,23 +123,26 @@ class CapturadorDividendosFuturos:
             logger.warning("⚠️  Nenhuma empresa selecionada.")
             return
 
-        for i, empresa in enumerate(empresas, start=1):
-            print("\n" + "=" * 78)
-            print(f"({i}/{len(empresas)}) 🔮 {empresa['ticker']} | trading_name={empresa.get('trading_name','')}")
-            print("=" * 78)
+        def _processar(empresa: Dict) -> None:
             try:
                 self._processar_empresa(empresa)
             except Exception as e:
                 logger.warning(f"⚠️  Falha em {empresa['ticker']}: {e}")
-            time.sleep(1.2)  # rate limiting leve
+
+        # Empresas em paralelo: o ritmo é dado pelo limitador de taxa do cliente B3
+        for i, (empresa, _) in enumerate(self.cliente.mapear(_processar, empresas), start=1):
+            logger.info(f"({i}/{len(empresas)}) 🔮 {empresa['ticker']} concluído")
 
         if self.dividendos_anunciados:
             self._salvar_dividendos_anunciados()
+        self.nomes.salvar()
 
         print("\n" + "=" * 78)
         print(f"✅ FINALIZADO: {self.total_novos} novos proventos encontrados na janela")
         print(f"📆 Dividendos com pagamento futuro: {self.total_futuros}")
         print(f"📦 Compilado diário: {len(self.dividendos_anunciados)} itens (somente novos)")
+        print(f"🌐 API B3: {self.cliente.resumo()}")
+        print(f"🏷️  Trading names: {self.nomes.resumo()}")
         print("=" * 78)
 
     # ---------------- CORE ----------------
@@ -195,17 +181,17 @@ class CapturadorDividendosFuturos:
         ticker = empresa["ticker"]
 
         existentes = self._carregar_proventos_existentes(ticker)
-        logger.info(f"📌 Já capturados: {len(existentes)} itens (dedup)")
+        logger.info(f"📌 {ticker}: já capturados {len(existentes)} itens (dedup)")
 
         # 1) resolve tradingName oficial via B3 (se falhar, tenta do CSV)
         trading_name_oficial = self._resolver_trading_name(ticker) or empresa.get("trading_name", "").strip()
         if not trading_name_oficial:
-            logger.warning("⚠️  tradingName vazio (não foi possível resolver). Pulando.")
+            logger.warning(f"⚠️  {ticker}: tradingName vazio (não foi possível resolver). Pulando.")
             return
 
         # 2) busca eventos em dinheiro
         eventos = self._buscar_cash_dividends(trading_name_oficial)
-        logger.info(f"📥 {len(eventos)} eventos retornados pela API")
+        logger.info(f"📥 {ticker}: {len(eventos)} eventos retornados pela API")
 
         # 3) filtra janela
         ini = self.hoje - timedelta(days=self.dias_janela)
@@ -269,111 +255,56 @@ class CapturadorDividendosFuturos:
             novos.append(item)
 
         if not novos:
-            logger.info("✅ Sem novos dividendos nesta janela")
+            logger.info(f"✅ {ticker}: sem novos dividendos nesta janela")
             return
 
         # 4) salva incremental (antigos + novos)
         self._salvar_dividendos_incremental(ticker, novos)
-        self.total_novos += len(novos)
-        self.total_futuros += futuros_empresa
 
         # 5) agregado diário = só novos com pagamento futuro (para agenda)
-        for x in novos:
-            # Inclui todos no agregado, mas marca status
-            self.dividendos_anunciados.append({
-                k: x[k] for k in [
-                    "ticker", "trading_name", "tipo", "valor_bruto",
-                    "data_com", "data_aprovacao", "data_pagamento", "status", "fonte"
-                ]
-            })
+        with self._lock:
+            self.total_novos += len(novos)
+            self.total_futuros += futuros_empresa
+            for x in novos:
+                # Inclui todos no agregado, mas marca status
+                self.dividendos_anunciados.append({
+                    k: x[k] for k in [
+                        "ticker", "trading_name", "tipo", "valor_bruto",
+                        "data_com", "data_aprovacao", "data_pagamento", "status", "fonte"
+                    ]
+                })
 
         logger.info(f"✅ {ticker}: {len(novos)} novos proventos ({futuros_empresa} com pagamento futuro)")
 
     # ---------------- B3 REQUESTS ----------------
-    def _get_json_b3(self, url: str, params: Dict, timeout: int = 15) -> Dict:
-        token = _b64_json(params)
-        full = url + token
-
+    def _b3(self, funcao, endpoint: str, *args):
+        """Chama o cliente B3 convertendo falhas em RuntimeError com contexto."""
         try:
-            r = self.session.get(full, timeout=timeout, verify=True)
-            r.raise_for_status()
-            return r.json()
-        except SSLError:
-            # fallback em ambientes que reclamam de SSL (alguns runners)
-            logger.warning("⚠️  SSL falhou (verify=True). Tentando verify=False...")
-            r = self.session.get(full, timeout=timeout, verify=False)
-            r.raise_for_status()
-            return r.json()
+            return funcao(*args)
         except HTTPError as e:
             # log detalhado
             status = getattr(e.response, "status_code", None)
             text = getattr(e.response, "text", "")[:300]
-            raise RuntimeError(f"HTTP {status} em {full} | {text}") from e
+            raise RuntimeError(f"HTTP {status} em {endpoint} {args} | {text}") from e
         except RequestException as e:
-            raise RuntimeError(f"Falha request em {full}: {e}") from e
+            raise RuntimeError(f"Falha request em {endpoint} {args}: {e}") from e
         except ValueError as e:
-            raise RuntimeError(f"Resposta não-JSON em {full}: {e}") from e
+            raise RuntimeError(f"Resposta não-JSON em {endpoint} {args}: {e}") from e
 
     def _resolver_trading_name(self, ticker: str) -> str:
         """
-        Resolve tradingName via GetInitialCompanies (busca por ticker).
-        Preferimos isso pois é o que o próprio site usa.
+        Resolve tradingName via GetInitialCompanies (busca pelo código de negociação).
+        Preferimos isso pois é o que o próprio site usa; o resultado fica no cache de
+        nomes, compartilhado com os demais coletores.
         """
-        params = {"language": "pt-br", "pageNumber": 1, "pageSize": 50, "company": ticker}
-        data = self._get_json_b3(END_INITIAL, params)
-
-        results = data.get("results") or []
-        if not results:
-            return ""
-
-        # tenta achar a linha exata do ticker em otherCodes/code
-        ticker_u = ticker.upper()
-        best = None
-        for it in results:
-            code = str(it.get("code", "")).upper()
-            if code == ticker_u:
-                best = it
-                break
-            other = it.get("otherCodes") or []
-            if any(str(o.get("code", "")).upper() == ticker_u for o in other):
-                best = it
-                break
-
-        if not best:
-            best = results[0]
-
-        trading = str(best.get("tradingName", "")).strip()
-        # site remove "/" e "." no tradingName para chamadas
-        trading = trading.replace("/", "").replace(".", "")
-        return trading
+        return self.nomes.trading_name(ticker)
 
     def _buscar_cash_dividends(self, trading_name: str) -> List[Dict]:
         """
         Busca eventos corporativos em dinheiro (cash dividends) via B3 Listados.
-        Faz paginação até esgotar.
+        Faz paginação até esgotar (cliente_b3.ClienteB3.paginar).
         """
-        all_results: List[Dict] = []
-        page = 1
-
-        while True:
-            params = {
-                "language": "pt-br",
-                "pageNumber": page,
-                "pageSize": 120,
-                "tradingName": trading_name
-            }
-            data = self._get_json_b3(END_CASHDIV, params)
-            results = data.get("results") or []
-            if not results:
-                break
-            all_results.extend(results)
-            page += 1
-
-            # safety: evita loop infinito se algo mudar
-            if page > 50:
-                break
-
-        return all_results
+        return self._b3(self.cliente.cash_dividends, END_CASHDIV, trading_name)
 
     # ---------------- DEDUP / SAVE ----------------
     def _chave_dedup(self, item: Dict) -> str:
@@ -478,10 +409,11 @@ def main():
     parser.add_argument("--lista", default="", help="Lista de tickers (vírgula)")
     parser.add_argument("--quantidade", type=int, default=10, help="Qtd empresas (modo quantidade)")
     parser.add_argument("--dias", type=int, default=30, help="Dias para janela deslizante (dedup + filtro por anúncio/com/pagamento)")
+    adicionar_argumentos_cliente(parser)
 
     args = parser.parse_args()
 
-    capturador = CapturadorDividendosFuturos(dias=args.dias)
+    capturador = CapturadorDividendosFuturos(dias=args.dias, cliente=cliente_dos_argumentos(args, timeout=15))
     capturador.executar(args.modo, args.ticker, args.lista, args.quantidade, args.dias)
 
 
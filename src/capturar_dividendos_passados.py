@@ -12,7 +12,7 @@ python src/capturar_dividendos_passados.py --modo completo
 """
 
 import json
-import base64
+import threading
 import pandas as pd
 import requests
 from pathlib import Path
@@ -20,14 +20,12 @@ from datetime import datetime
 import argparse
 import sys
 import warnings
-import time
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_b3 import CacheNomesB3, ClienteB3, adicionar_argumentos_cliente, cliente_dos_argumentos
 
 warnings.filterwarnings('ignore')
-try:
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-except:
-    pass
 
 
 def extrair_ticker_principal(ticker_raw: str) -> str:
@@ -41,28 +39,6 @@ def extrair_ticker_principal(ticker_raw: str) -> str:
     return ticker.strip().upper()
 
 
-def carregar_mapeamento_tradingname(arquivo: str = "mapeamento_tradingname_b3.csv") -> dict:
-    """
-    Carrega mapeamento código → trading_name.
-    
-    Usa o CÓDIGO (sem número) como chave para funcionar com qualquer classe:
-    PETR3, PETR4 → código PETR → trading_name PETROBRAS
-    
-    Returns:
-        dict: {codigo: trading_name}
-    """
-    try:
-        df = pd.read_csv(arquivo, sep=';', encoding='utf-8-sig')
-        # Filtrar apenas os que têm status 'ok'
-        df_ok = df[df['status'] == 'ok']
-        # Usar código (sem número) como chave
-        mapeamento = dict(zip(df_ok['codigo'].str.upper(), df_ok['trading_name']))
-        return mapeamento
-    except Exception as e:
-        print(f"⚠️ Erro ao carregar mapeamento: {e}")
-        return {}
-
-
 def extrair_codigo(ticker: str) -> str:
     """
     Extrai código de negociação (sem número).
@@ -77,49 +53,21 @@ class CapturadorDividendosHistoricos:
     Captura dividendos históricos usando API B3 com mapeamento pré-gerado.
     """
     
-    def __init__(self, pasta_output: str = "balancos"):
+    def __init__(self, pasta_output: str = "balancos", cliente: Optional[ClienteB3] = None):
         self.pasta_output = Path(pasta_output)
         self.empresas_processadas = 0
         self.dividendos_totais = 0
         self.timeout = 15
         self.max_retries = 3
+        self.cliente = cliente or ClienteB3(timeout=self.timeout, tentativas=self.max_retries)
+        self._lock = threading.Lock()
         
-        # Carregar mapeamento
-        self.mapeamento = carregar_mapeamento_tradingname()
-        if self.mapeamento:
-            print(f"✓ Mapeamento carregado: {len(self.mapeamento)} códigos de negociação")
+        # Cache persistente código → trading_name (consulta a B3 só se vencido/ausente)
+        self.nomes = CacheNomesB3(cliente=self.cliente)
+        if len(self.nomes):
+            print(f"✓ Cache de trading names: {len(self.nomes)} códigos de negociação")
         else:
-            print("⚠️ Mapeamento não encontrado")
-    
-    def _request_with_retry(self, url: str) -> requests.Response:
-        """Faz request com retry para erros 5xx."""
-        last_error = None
-        
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(url, timeout=self.timeout, verify=False)
-                
-                if response.status_code >= 500:
-                    if attempt < self.max_retries - 1:
-                        wait_time = 2 ** attempt
-                        print(f"      ⏳ Erro {response.status_code}, aguardando {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                
-                return response
-                
-            except requests.exceptions.Timeout as e:
-                last_error = e
-                if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"      ⏳ Timeout, aguardando {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-            except Exception as e:
-                last_error = e
-                break
-        
-        raise last_error if last_error else Exception("Request failed")
+            print("⚠️ Cache de trading names vazio (resolvendo na B3 sob demanda)")
     
     def _fetch_b3_api(self, ticker: str) -> pd.DataFrame:
         """
@@ -131,42 +79,14 @@ class CapturadorDividendosHistoricos:
             codigo = extrair_codigo(ticker)
             
             # Buscar trading_name pelo código (não pelo ticker completo)
-            trading_name = self.mapeamento.get(codigo)
+            trading_name = self.nomes.trading_name(codigo)
             
             if not trading_name:
-                print(f"    [B3 API] ⚠️ Código {codigo} (de {ticker_clean}) não está no mapeamento")
+                print(f"    [B3 API] ⚠️ Código {codigo} (de {ticker_clean}) sem trading name na B3")
                 return pd.DataFrame()
             
-            # Buscar dividendos (paginado)
-            all_dividends = []
-            page = 1
-            
-            while page <= 50:
-                params = {
-                    "language": "pt-br",
-                    "pageNumber": page,
-                    "pageSize": 120,
-                    "tradingName": trading_name
-                }
-                
-                params_b64 = base64.b64encode(json.dumps(params).encode()).decode()
-                url = f"https://sistemaswebb3-listados.b3.com.br/listedCompaniesProxy/CompanyCall/GetListedCashDividends/{params_b64}"
-                
-                response = self._request_with_retry(url)
-                response.raise_for_status()
-                
-                data = response.json()
-                dividends = data.get('results', [])
-                
-                if not dividends:
-                    break
-                
-                all_dividends.extend(dividends)
-                
-                if len(dividends) < 120:
-                    break
-                
-                page += 1
+            # Buscar dividendos (sessão compartilhada, paginada)
+            all_dividends = self.cliente.cash_dividends(trading_name)
             
             if not all_dividends:
                 print(f"    [B3 API] ⚠️ Nenhum dividendo para {trading_name}")
@@ -271,8 +191,9 @@ class CapturadorDividendosHistoricos:
         print(f"     Total histórico: R$ {total_bruto:.2f}")
         print(f"     Últimos 12M: R$ {resultado['estatisticas']['total_ultimos_12m']:.2f}")
         
-        self.empresas_processadas += 1
-        self.dividendos_totais += len(dividendos)
+        with self._lock:
+            self.empresas_processadas += 1
+            self.dividendos_totais += len(dividendos)
         
         return resultado
     
@@ -309,8 +230,9 @@ class CapturadorDividendosHistoricos:
         print(f"{'='*70}")
         print(f"Total de tickers: {len(tickers)}")
         
-        for ticker in tickers:
-            self.processar_ticker(ticker)
+        # Tickers em paralelo (concorrência e taxa limitadas pelo cliente B3)
+        for ticker, dados in self.cliente.mapear(self.capturar_dividendos, tickers):
+            self.salvar_json(ticker, dados)
         
         self.imprimir_resumo()
     
@@ -321,6 +243,8 @@ class CapturadorDividendosHistoricos:
         print(f"{'='*70}")
         print(f"✅ Empresas processadas: {self.empresas_processadas}")
         print(f"✅ Total de dividendos: {self.dividendos_totais}")
+        print(f"🌐 API B3: {self.cliente.resumo()}")
+        print(f"🏷️  Trading names: {self.nomes.resumo()}")
 
 
 def carregar_mapeamento_empresas(arquivo: str = "mapeamento_b3_consolidado.csv") -> list:
@@ -345,10 +269,11 @@ def main():
     parser.add_argument('--quantidade', type=int, default=10)
     parser.add_argument('--ticker', type=str)
     parser.add_argument('--lista', type=str)
+    adicionar_argumentos_cliente(parser)
     
     args = parser.parse_args()
     
-    capturador = CapturadorDividendosHistoricos()
+    capturador = CapturadorDividendosHistoricos(cliente=cliente_dos_argumentos(args, timeout=15))
     
     if args.modo == 'ticker':
         if not args.ticker:
@@ -377,6 +302,8 @@ def main():
             print("❌ Erro: Não foi possível carregar lista de tickers")
             sys.exit(1)
         capturador.processar_lista(tickers)
+    
+    capturador.nomes.salvar()
 
 
 if __name__ == "__main__":
@@ -8,10 +8,12 @@ Captura histórico de preços ajustados dos últimos 5 anos e calcula:
 - Estatísticas: máxima, mínima, variação
 
 CLASSES SUPORTADAS: 3, 4, 11 + IBOVESPA (^BVSP)
-SAÍDA: balancos/{TICKER}/historico_precos.json
+SAÍDA: balancos/{TICKER}/historico_precos_{TICKER}.json (registros legíveis)
+       balancos/{TICKER}/historico_precos_{TICKER}.min.json (colunar compacto, usado pelo site)
 
 EXECUÇÃO:
 python src/capturar_historico_precos.py --modo lista --lista "PETR4,VALE3,BBDC4"
+python src/capturar_historico_precos.py --modo todos --incremental   # só acrescenta os pregões novos
 """
 
 from __future__ import annotations
@@ -26,6 +28,11 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 import re
+from bisect import bisect_left
+
+sys.path.insert(0, str(Path(__file__).parent))
+from armazem_precos import ArmazemPrecos
+from multi_ticker_utils import escrever_se_mudou
 
 try:
     import yfinance as yf
@@ -132,23 +139,45 @@ def get_pasta_balanco(ticker: str) -> Path:
 
 ANOS_HISTORICO = 5
 PERIODOS_MM = [20, 50, 200]  # Médias móveis
+SOBREPOSICAO_DIAS = 10  # Modo incremental: pregões já salvos rebaixados para detectar reajustes
+
+
+def _inicio_janela(anos: int) -> datetime:
+    """Primeiro dia da janela de histórico (+30 dias de margem)."""
+    return datetime.now() - timedelta(days=anos * 365 + 30)
 
 
 # ======================================================================================
 # CAPTURA DE DADOS
 # ======================================================================================
 
-def capturar_historico_ticker(ticker: str, anos: int = ANOS_HISTORICO) -> Optional[pd.DataFrame]:
+def capturar_historico_ticker(
+    ticker: str,
+    anos: int = ANOS_HISTORICO,
+    armazem: Optional[ArmazemPrecos] = None,
+    inicio: Optional[str] = None,
+) -> Optional[pd.DataFrame]:
     """
     Captura histórico de preços ajustados via yfinance.
 
+    Com armazém local (armazem_precos.py), baixa só os dias que faltam e lê a janela de lá;
+    se o armazém não tiver dados do ticker, cai no download direto.
+
     Args:
         ticker: Código B3 (ex: PETR4) ou ^BVSP para Ibovespa
         anos: Anos de histórico (padrão: 5)
+        armazem: Armazém local de preços (opcional)
+        inicio: Data inicial "YYYY-MM-DD" (modo incremental); se omitida, usa a janela de `anos`
 
     Returns:
         DataFrame com OHLCV ou None
     """
+    if armazem is not None:
+        armazem.atualizar(ticker)
+        hist = armazem.historico(ticker, inicio=inicio) if inicio else armazem.historico_anos(ticker, anos)
+        if len(hist) > 0:
+            return hist
+
     if not HAS_YFINANCE:
         return None
 
@@ -160,7 +189,7 @@ def capturar_historico_ticker(ticker: str, anos: int = ANOS_HISTORICO) -> Option
 
     # Período
     end_date = datetime.now()
-    start_date = end_date - timedelta(days=anos * 365 + 30)  # +30 dias de margem
+    start_date = _inicio_janela(anos) if inicio is None else pd.Timestamp(inicio)
 
     try:
         hist = yf.download(
@@ -355,26 +384,23 @@ def calcular_estatisticas(df: pd.DataFrame) -> Dict:
             except Exception:
                 volume_medio = 0
 
-    # ANÁLISE DE TENDÊNCIA (último dia com médias válidas)
+    # ANÁLISE DE TENDÊNCIA (último dia com médias válidas, localizado pelo índice)
     tendencia = "indefinida"
     try:
-        # Pegar último registro com todas as médias válidas
-        ultimos_validos = df[
-            df['mm20'].notna() & 
-            df['mm50'].notna() & 
-            df['mm200'].notna()
-        ]
+        medias = [df[c] for c in ('mm20', 'mm50', 'mm200')]
+        medias = [m.iloc[:, 0] if isinstance(m, pd.DataFrame) else m for m in medias]
+        validos = np.flatnonzero(
+            medias[0].notna().to_numpy() & medias[1].notna().to_numpy() & medias[2].notna().to_numpy()
+        )
         
-        if len(ultimos_validos) > 0:
-            ultimo = ultimos_validos.iloc[-1]
-            
-            # Extrair valores (garantindo que são float)
-            preco = float(ultimo['fechamento']) if isinstance(ultimo['fechamento'], (int, float, np.number)) else float(ultimo['fechamento'].iloc[0])
-            mm20 = float(ultimo['mm20']) if isinstance(ultimo['mm20'], (int, float, np.number)) else float(ultimo['mm20'].iloc[0])
-            mm50 = float(ultimo['mm50']) if isinstance(ultimo['mm50'], (int, float, np.number)) else float(ultimo['mm50'].iloc[0])
-            mm200 = float(ultimo['mm200']) if isinstance(ultimo['mm200'], (int, float, np.number)) else float(ultimo['mm200'].iloc[0])
-            
-            tendencia = calcular_tendencia(preco, mm20, mm50, mm200)
+        if len(validos) > 0:
+            i = validos[-1]
+            tendencia = calcular_tendencia(
+                float(fechamento.iloc[i]),
+                float(medias[0].iloc[i]),
+                float(medias[1].iloc[i]),
+                float(medias[2].iloc[i]),
+            )
     except Exception:
         tendencia = "indefinida"
 
@@ -394,6 +420,65 @@ def calcular_estatisticas(df: pd.DataFrame) -> Dict:
 # CONVERSÃO PARA JSON
 # ======================================================================================
 
+def _registros_json(df: pd.DataFrame) -> List[Dict]:
+    """Converte o DataFrame (índice de datas + OHLCV + médias) em registros diários do JSON."""
+    # Resetar índice para ter 'data' como coluna
+    df = df.reset_index()
+    
+    # Tentar diferentes nomes de coluna de data
+    if 'Date' in df.columns:
+        df['data'] = df['Date'].dt.strftime('%Y-%m-%d')
+    elif df.index.name == 'Date' or isinstance(df.index, pd.DatetimeIndex):
+        df['data'] = df.index.strftime('%Y-%m-%d')
+    else:
+        # Se não encontrar coluna de data, usar o índice resetado
+        df['data'] = pd.to_datetime(df.index).strftime('%Y-%m-%d')
+    
+    # Conversão coluna a coluna (arredonda/mascara NaN por coluna e só então monta os registros)
+    n = len(df)
+
+    def _coluna(col: str, casas: Optional[int] = 2) -> List:
+        if col not in df.columns:
+            return [0 if casas is None else None] * n
+        serie = df[col]
+        if isinstance(serie, pd.DataFrame):
+            serie = serie.iloc[:, 0]
+        valores = pd.to_numeric(serie, errors='coerce').tolist()
+        if casas is None:
+            return [int(v) if v == v else 0 for v in valores]
+        return [round(float(v), casas) if v == v else None for v in valores]
+
+    colunas = {
+        "abertura": _coluna('abertura'),
+        "maxima": _coluna('maxima'),
+        "minima": _coluna('minima'),
+        "fechamento": _coluna('fechamento'),
+        "volume": _coluna('volume', casas=None),
+        "mm20": _coluna('mm20'),
+        "mm50": _coluna('mm50'),
+        "mm200": _coluna('mm200'),
+    }
+    chaves = ["data"] + list(colunas)
+    return [dict(zip(chaves, linha)) for linha in zip(df['data'].tolist(), *colunas.values())]
+
+
+def _estatisticas_registros(dados: List[Dict]) -> Dict:
+    """
+    Estatísticas sobre os registros publicados (preços e médias já arredondados), para que
+    o modo completo e o incremental cheguem ao mesmo resultado.
+    """
+    return calcular_estatisticas(pd.DataFrame(dados))
+
+
+def _estado_rolagem(fechamentos: List[float]) -> Dict:
+    """
+    Estado para o modo incremental: só a cauda de fechamentos que as médias precisam,
+    sem arredondamento (não vai para o site; arredondada, as médias derivariam).
+    """
+    cauda = fechamentos[-(max(PERIODOS_MM) - 1):]
+    return {"periodos": list(PERIODOS_MM), "fechamentos": [float(v) for v in cauda]}
+
+
 def df_para_json(df: pd.DataFrame, ticker: str) -> Dict:
     """
     Converte DataFrame em estrutura JSON otimizada para gráficos.
@@ -404,39 +489,18 @@ def df_para_json(df: pd.DataFrame, ticker: str) -> Dict:
             "ultima_atualizacao": "2025-01-02T10:00:00",
             "periodo": {"inicio": "2020-01-02", "fim": "2025-01-02"},
             "dados": [...],
-            "estatisticas": {...}
+            "estatisticas": {...},
+            "estado": {...}   # usado por atualizar_json_incremental
         }
     """
     if len(df) == 0:
         return {}
     
-    # Resetar índice para ter 'data' como coluna
-    df = df.reset_index()
-    
-    # Tentar diferentes nomes de coluna de data
-    if 'Date' in df.columns:
-        df['data'] = df['Date'].dt.strftime('%Y-%m-%d')
-    elif df.index.name == 'Date' or isinstance(df.index, pd.DatetimeIndex):
-        df['data'] = df.index.strftime('%Y-%m-%d')
-    else:
-        # Se não encontrar coluna de data, usar o índice resetado
-        df['data'] = pd.to_datetime(df.index).strftime('%Y-%m-%d')
-    
-    # Converter para lista de dicts
-    dados = []
-    for _, row in df.iterrows():
-        ponto = {
-            "data": row['data'],
-            "abertura": round(float(row['abertura']), 2) if 'abertura' in row and pd.notna(row['abertura']) else None,
-            "maxima": round(float(row['maxima']), 2) if 'maxima' in row and pd.notna(row['maxima']) else None,
-            "minima": round(float(row['minima']), 2) if 'minima' in row and pd.notna(row['minima']) else None,
-            "fechamento": round(float(row['fechamento']), 2) if 'fechamento' in row and pd.notna(row['fechamento']) else None,
-            "volume": int(row['volume']) if 'volume' in row and pd.notna(row['volume']) else 0,
-            "mm20": round(float(row['mm20']), 2) if 'mm20' in row and pd.notna(row['mm20']) else None,
-            "mm50": round(float(row['mm50']), 2) if 'mm50' in row and pd.notna(row['mm50']) else None,
-            "mm200": round(float(row['mm200']), 2) if 'mm200' in row and pd.notna(row['mm200']) else None
-        }
-        dados.append(ponto)
+    dados = _registros_json(df)
+
+    fechamento = df['fechamento']
+    if isinstance(fechamento, pd.DataFrame):
+        fechamento = fechamento.iloc[:, 0]
     
     # Estrutura final
     return {
@@ -447,17 +511,167 @@ def df_para_json(df: pd.DataFrame, ticker: str) -> Dict:
             "fim": dados[-1]['data'] if dados else None
         },
         "dados": dados,
-        "estatisticas": calcular_estatisticas(df)
+        "estatisticas": _estatisticas_registros(dados),
+        "estado": _estado_rolagem(pd.to_numeric(fechamento, errors='coerce').tolist()),
+    }
+
+
+# ======================================================================================
+# ATUALIZAÇÃO INCREMENTAL
+# ======================================================================================
+
+def atualizar_json_incremental(dados_json: Dict, novos: pd.DataFrame, anos: int = ANOS_HISTORICO) -> Optional[Dict]:
+    """
+    Acrescenta a um histórico salvo apenas os pregões posteriores ao último dia gravado.
+
+    As médias dos pregões novos saem da cauda de fechamentos guardada em "estado"
+    (os últimos max(PERIODOS_MM) - 1 valores); depois a janela é aparada para `anos`,
+    com as médias do início anuladas como no cálculo completo, e as estatísticas refeitas
+    sobre os registros.
+
+    Args:
+        dados_json: JSON salvo (saída de df_para_json)
+        novos: OHLCV baixado a partir de alguns pregões antes do último salvo
+        anos: Tamanho da janela
+
+    Returns:
+        JSON atualizado; o próprio dados_json se não houver pregões novos;
+        None se for preciso refazer do zero (sem estado, lacuna ou preços reajustados).
+    """
+    dados = dados_json.get("dados") or []
+    estado = dados_json.get("estado") or {}
+    # Aceita também estados antigos com a janela inteira: só a cauda é usada
+    tamanho_cauda = min(len(dados), max(PERIODOS_MM) - 1)
+    fechamentos = (estado.get("fechamentos") or [])[-tamanho_cauda:]
+    if not dados or estado.get("periodos") != list(PERIODOS_MM) or len(fechamentos) != tamanho_cauda:
+        return None
+
+    novos = novos.copy()
+    if isinstance(novos.get('fechamento'), pd.DataFrame):
+        novos['fechamento'] = novos['fechamento'].iloc[:, 0]
+    novos.index = pd.to_datetime(novos.index)
+    datas = novos.index.strftime('%Y-%m-%d')
+    fech_novos = pd.to_numeric(novos['fechamento'], errors='coerce').to_numpy(dtype=float)
+
+    # Sobreposição com os últimos pregões salvos: sem ela há lacuna; se diverge,
+    # o Yahoo reajustou a série (proventos/desdobramentos) e tudo precisa ser refeito
+    salvos = {r['data']: r['fechamento'] for r in dados[-SOBREPOSICAO_DIAS:]}
+    sobrepostos = [(d, f) for d, f in zip(datas, fech_novos) if d in salvos]
+    if not sobrepostos or any(round(float(f), 2) != salvos[d] for d, f in sobrepostos):
+        return None
+
+    novos = novos[datas > dados[-1]['data']]
+    if len(novos) == 0:
+        return dados_json
+    fech_novos = fech_novos[-len(novos):]
+
+    # Médias móveis dos pregões novos a partir da cauda guardada
+    cauda = pd.Series(fechamentos + fech_novos.tolist())
+    for periodo in PERIODOS_MM:
+        novos[f"mm{periodo}"] = cauda.rolling(window=periodo, min_periods=periodo).mean().iloc[-len(novos):].to_numpy()
+
+    dados = dados + _registros_json(novos)
+    fechamentos = fechamentos + fech_novos.tolist()
+
+    # Aparar o início para manter a janela de `anos`
+    inicio = _inicio_janela(anos).strftime('%Y-%m-%d')
+    corte = bisect_left([r['data'] for r in dados], inicio)
+    if corte > 0:
+        dados = [dict(r) for r in dados[corte:]]
+        for periodo in PERIODOS_MM:
+            for r in dados[:periodo - 1]:
+                r[f"mm{periodo}"] = None
+
+    return {
+        "ticker": dados_json.get("ticker"),
+        "ultima_atualizacao": datetime.now().isoformat(),
+        "periodo": {"inicio": dados[0]['data'], "fim": dados[-1]['data']},
+        "dados": dados,
+        "estatisticas": _estatisticas_registros(dados),
+        "estado": _estado_rolagem(fechamentos),
+    }
+
+
+# ======================================================================================
+# FORMATO COLUNAR COMPACTO
+# ======================================================================================
+
+ESCALA_COLUNAR = 100  # preços em centavos (df_para_json já arredonda em 2 casas)
+
+
+def _centavos(valores: List) -> np.ndarray:
+    """Lista de preços (None = ausente) -> centavos em float (NaN = ausente)."""
+    arr = np.array([np.nan if v is None else v for v in valores], dtype=float)
+    return np.rint(arr * ESCALA_COLUNAR)
+
+
+def _lista_inteiros(arr: np.ndarray) -> List[Optional[int]]:
+    return [int(v) if v == v else None for v in arr.tolist()]
+
+
+def _delta(arr: np.ndarray) -> List[Optional[int]]:
+    """Delta em relação ao último valor presente; ausentes continuam null."""
+    out = np.full(len(arr), np.nan)
+    ok = np.isfinite(arr)
+    out[ok] = np.diff(arr[ok], prepend=0)
+    return _lista_inteiros(out)
+
+
+def json_para_colunar(dados_json: Dict) -> Dict:
+    """
+    Converte a saída de df_para_json no formato colunar compacto do site.
+
+    Em "colunas", cada campo é um array paralelo com um item por pregão:
+        dias        dias desde "base" (delta entre pregões consecutivos)
+        fechamento  centavos, delta em relação ao fechamento anterior
+        abertura/maxima/minima  centavos relativos ao fechamento do dia
+        volume      inteiro
+        mm20/mm50/mm200  centavos, delta em relação ao último valor não-nulo (null mantido)
+
+    Decodificação: soma acumulada dos deltas / escala. Como os preços já vêm
+    arredondados em 2 casas, a ida e volta é exata.
+    """
+    if not dados_json:
+        return {}
+
+    dados = dados_json["dados"]
+    datas = pd.to_datetime([r["data"] for r in dados])
+    base = datas[0]
+    dias = np.asarray((datas - base).days, dtype=np.int64)
+
+    fechamento = _centavos([r["fechamento"] for r in dados])
+    colunas = {
+        "dias": np.diff(dias, prepend=0).tolist(),
+        "fechamento": _delta(fechamento),
     }
+    for campo in ("abertura", "maxima", "minima"):
+        colunas[campo] = _lista_inteiros(_centavos([r[campo] for r in dados]) - fechamento)
+    colunas["volume"] = [r["volume"] for r in dados]
+    for campo in ("mm20", "mm50", "mm200"):
+        colunas[campo] = _delta(_centavos([r[campo] for r in dados]))
+
+    colunar = {k: v for k, v in dados_json.items() if k not in ("dados", "estado")}
+    colunar.update(base=base.strftime("%Y-%m-%d"), escala=ESCALA_COLUNAR, colunas=colunas)
+    return colunar
 
 
 # ======================================================================================
 # PROCESSADOR PRINCIPAL
 # ======================================================================================
 
-def processar_ticker(ticker: str, anos: int = ANOS_HISTORICO) -> Tuple[bool, str]:
+def processar_ticker(
+    ticker: str,
+    anos: int = ANOS_HISTORICO,
+    armazem: Optional[ArmazemPrecos] = None,
+    comprimir: bool = False,
+    incremental: bool = False,
+) -> Tuple[bool, str]:
     """
     Processa um ticker: baixa histórico, calcula médias, salva JSON.
+
+    Grava o JSON legível e o .min.json colunar (com .gz/.br ao lado se comprimir=True).
+    Com incremental=True, parte do JSON salvo e só acrescenta os pregões novos
+    (atualizar_json_incremental); se não for possível, refaz a janela completa.
     
     Returns:
         (sucesso, mensagem)
@@ -471,29 +685,55 @@ def processar_ticker(ticker: str, anos: int = ANOS_HISTORICO) -> Tuple[bool, str
         
         pasta.mkdir(parents=True, exist_ok=True)
         
-        # Baixar histórico
-        df = capturar_historico_ticker(ticker, anos)
-        
-        # Verificação corrigida para evitar erro de ambiguidade
-        if df is None:
-            return False, "sem dados disponíveis"
-        
-        if not isinstance(df, pd.DataFrame):
-            return False, "formato de dados inválido"
-        
-        if len(df) == 0:
-            return False, "sem dados disponíveis"
+        # ✅ CORREÇÃO: Salvar com nome específico incluindo a classe
+        arquivo = pasta / f"historico_precos_{ticker}.json"
         
-        # Calcular médias móveis
-        df = calcular_medias_moveis(df, PERIODOS_MM)
+        # Modo incremental: só os pregões novos sobre o JSON salvo
+        dados_json = None
+        modo = "completo"
+        if incremental and arquivo.exists():
+            with open(arquivo, encoding='utf-8') as f:
+                salvo = json.load(f)
+            registros = salvo.get('dados') or []
+            if registros:
+                inicio = registros[-min(SOBREPOSICAO_DIAS, len(registros))]['data']
+                novos = capturar_historico_ticker(ticker, anos, armazem=armazem, inicio=inicio)
+                if isinstance(novos, pd.DataFrame) and len(novos) > 0:
+                    dados_json = atualizar_json_incremental(salvo, novos, anos)
+                    if dados_json is salvo:
+                        return True, f"sem pregões novos → {pasta.name}/{arquivo.name}"
+                    if dados_json is not None:
+                        modo = "incremental"
         
-        # Converter para JSON
-        dados_json = df_para_json(df, ticker)
+        if dados_json is None:
+            # Baixar histórico
+            df = capturar_historico_ticker(ticker, anos, armazem=armazem)
+            
+            # Verificação corrigida para evitar erro de ambiguidade
+            if df is None:
+                return False, "sem dados disponíveis"
+            
+            if not isinstance(df, pd.DataFrame):
+                return False, "formato de dados inválido"
+            
+            if len(df) == 0:
+                return False, "sem dados disponíveis"
+            
+            # Calcular médias móveis
+            df = calcular_medias_moveis(df, PERIODOS_MM)
+            
+            # Converter para JSON
+            dados_json = df_para_json(df, ticker)
         
-        # ✅ CORREÇÃO: Salvar com nome específico incluindo a classe
-        arquivo = pasta / f"historico_precos_{ticker}.json"
         with open(arquivo, 'w', encoding='utf-8') as f:
             json.dump(dados_json, f, ensure_ascii=False, indent=2)
+
+        # Versão colunar minificada (consumida pelo site)
+        escrever_se_mudou(
+            pasta / f"historico_precos_{ticker}.min.json",
+            json.dumps(json_para_colunar(dados_json), ensure_ascii=False, separators=(",", ":")),
+            comprimir=comprimir,
+        )
         
         # Estatísticas para log
         stats = dados_json.get('estatisticas', {})
@@ -501,7 +741,7 @@ def processar_ticker(ticker: str, anos: int = ANOS_HISTORICO) -> Tuple[bool, str
         preco_atual = stats.get('preco_atual', 0)
         variacao = stats.get('variacao_periodo', 0)
         
-        msg = f"{total_dias} dias | R$ {preco_atual} | Δ {variacao:+.1f}% → {pasta.name}/{arquivo.name}"
+        msg = f"{total_dias} dias | R$ {preco_atual} | Δ {variacao:+.1f}% | {modo} → {pasta.name}/{arquivo.name}"
         
         return True, msg
         
@@ -514,9 +754,17 @@ def processar_ticker(ticker: str, anos: int = ANOS_HISTORICO) -> Tuple[bool, str
 # PROCESSADOR EM LOTE
 # ======================================================================================
 
-def processar_lote(tickers: List[str], anos: int = ANOS_HISTORICO) -> Tuple[int, int]:
+def processar_lote(
+    tickers: List[str],
+    anos: int = ANOS_HISTORICO,
+    armazem: Optional[ArmazemPrecos] = None,
+    comprimir: bool = False,
+    incremental: bool = False,
+) -> Tuple[int, int]:
     """
     Processa múltiplos tickers em sequência.
+
+    Com armazém, os downloads incrementais de todos os tickers são feitos antes, em paralelo.
     
     Returns:
         (sucessos, erros)
@@ -528,6 +776,12 @@ def processar_lote(tickers: List[str], anos: int = ANOS_HISTORICO) -> Tuple[int,
     print(f"Médias móveis: {', '.join(f'MM{p}' for p in PERIODOS_MM)}")
     print(f"{'='*70}\n")
     
+    if armazem is not None:
+        status = armazem.atualizar_lote(tickers)
+        reajustados = sum(1 for st in status.values() if st["reajustado"])
+        print(f"🗄️  Armazém atualizado: {sum(1 for st in status.values() if st['baixado'])} download(s) | "
+              f"{reajustados} reajuste(s)\n")
+    
     ok_count = 0
     err_count = 0
     
@@ -535,7 +789,9 @@ def processar_lote(tickers: List[str], anos: int = ANOS_HISTORICO) -> Tuple[int,
         print(f"[{i}/{len(tickers)}] {ticker}...", end=" ")
         
         try:
-            ok, msg = processar_ticker(ticker, anos)
+            ok, msg = processar_ticker(
+                ticker, anos, armazem=armazem, comprimir=comprimir, incremental=incremental
+            )
             
             if ok:
                 ok_count += 1
@@ -573,6 +829,12 @@ def main():
                        help="Anos de histórico (padrão: 5)")
     parser.add_argument("--incluir-ibov", action="store_true",
                        help="Incluir IBOVESPA no processamento")
+    parser.add_argument("--sem-armazem", action="store_true",
+                       help="Baixa direto do Yahoo, sem usar o armazém local de preços")
+    parser.add_argument("--comprimir", action="store_true",
+                       help="Gera também historico_precos_<TICKER>.min.json.gz (e .br, se brotli instalado)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Acrescenta só os pregões novos ao histórico salvo (refaz tudo se houver reajuste)")
     args = parser.parse_args()
     
     if not HAS_YFINANCE:
@@ -628,7 +890,13 @@ def main():
         tickers.insert(0, "IBOV")
     
     # Processar
-    processar_lote(tickers, args.anos)
+    processar_lote(
+        tickers,
+        args.anos,
+        armazem=None if args.sem_armazem else ArmazemPrecos(),
+        comprimir=args.comprimir,
+        incremental=args.incremental,
+    )
 
 
 if __name__ == "__main__":
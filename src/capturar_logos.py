@@ -18,9 +18,9 @@ IMPORTANTE:
 - Formato final: logo.png
 """
 
-import requests
 from bs4 import BeautifulSoup
 import re
+import sys
 from pathlib import Path
 from datetime import datetime
 import argparse
@@ -28,6 +28,12 @@ import time
 from PIL import Image
 from io import BytesIO
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
+# Imagens de logo raramente mudam: ficam no cache HTTP local por 30 dias
+TTL_IMAGEM_LOGO = 30 * 24 * 3600
+
 
 # ============================================================================
 # UTILITÁRIOS MULTI-TICKER
@@ -134,6 +140,7 @@ class CapturadorLogos:
         
         self.timeout = 30
         self.delay = 1  # Delay entre requests (respeitar servidor)
+        self.http = cliente_http_padrao()
     
     # ----------------------- DOWNLOAD E PARSING -----------------------
     
@@ -143,7 +150,7 @@ class CapturadorLogos:
         url = f"https://investidor10.com.br/acoes/{ticker_lower}/"
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.http.get(url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             
             return BeautifulSoup(response.content, 'html.parser')
@@ -235,7 +242,7 @@ class CapturadorLogos:
             url = 'https://investidor10.com.br' + url
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
+            response = self.http.get(url, headers=self.headers, timeout=self.timeout, ttl=TTL_IMAGEM_LOGO)
             response.raise_for_status()
             
             return response.content
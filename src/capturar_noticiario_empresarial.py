@@ -32,10 +32,12 @@ from pathlib import Path
 from typing import Optional, List, Dict, Tuple
 from urllib.parse import urlparse, parse_qs
 
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
 
 # =============================================================================
 # Utils
@@ -406,7 +408,7 @@ def buscar_noticias_scraping_google(ticker: str, max_itens: int = 30) -> List[Di
         "ceid": "BR:pt-419",
     }
 
-    resp = requests.get(
+    resp = cliente_http_padrao().get(
         "https://news.google.com/rss/search",
         params=params,
         headers=headers,
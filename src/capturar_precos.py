@@ -2,9 +2,9 @@
 from __future__ import annotations
 
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import warnings
 import re
 
@@ -15,6 +15,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 from multi_ticker_utils import get_ticker_principal, get_pasta_balanco, load_mapeamento_consolidado
+from armazem_precos import ArmazemPrecos, precos_asof
+from provedores_precos import normalizar_ohlcv, ticker_armazem
 
 # yfinance pode gerar warnings, vamos suprimir
 warnings.filterwarnings('ignore')
@@ -58,6 +60,12 @@ class CapturadorPrecos:
     """
     pasta_balancos: Path = Path("balancos")
     max_days_lookback: int = 10  # Busca até 10 dias úteis antes se não houver dados
+    # Armazém local de OHLCV (armazem_precos.py); None = baixa direto do Yahoo
+    armazem: Optional[ArmazemPrecos] = None
+    # Cache de históricos diários: símbolo -> (início, fim, série de fechamentos)
+    _historicos: Dict[str, Tuple[pd.Timestamp, pd.Timestamp, pd.Series]] = field(
+        default_factory=dict, repr=False
+    )
 
     def _get_ticker_symbol(self, ticker: str) -> str:
         """Converte ticker brasileiro para formato yfinance (.SA)."""
@@ -149,6 +157,59 @@ class CapturadorPrecos:
         
         return pd.DataFrame(columns=["periodo", "ano", "trimestre", "data_fim"])
 
+    def _baixar_historicos(self, ticker_symbols: List[str], inicio: pd.Timestamp, fim: pd.Timestamp) -> None:
+        """
+        Baixa em UMA chamada ao yf.download o histórico diário (fechamento ajustado) de um ou
+        mais símbolos no intervalo [inicio, fim) e guarda em cache.
+
+        Símbolos cujo cache já cobre o intervalo não são baixados de novo.
+        """
+        pendentes = []
+        for sym in dict.fromkeys(ticker_symbols):
+            cache = self._historicos.get(sym)
+            if cache is None or cache[0] > inicio or cache[1] < fim:
+                pendentes.append(sym)
+        if not pendentes:
+            return
+
+        if self.armazem is not None:
+            # Armazém: só os dias que faltam são baixados (uma vez por dia por ticker)
+            self.armazem.atualizar_lote(pendentes)
+            for sym in pendentes:
+                fechamento = self.armazem.historico(ticker_armazem(sym), inicio=inicio.strftime("%Y-%m-%d"))["fechamento"]
+                self._historicos[sym] = (inicio, fim, fechamento[fechamento.index < fim])
+            return
+
+        try:
+            data = yf.download(
+                pendentes if len(pendentes) > 1 else pendentes[0],
+                start=inicio.strftime("%Y-%m-%d"),
+                end=fim.strftime("%Y-%m-%d"),
+                progress=False,
+                auto_adjust=True,  # Retorna preços ajustados
+                group_by="ticker",
+                threads=True,
+            )
+        except Exception as e:
+            print(f"    ⚠️ Erro ao baixar histórico ({', '.join(pendentes)}): {e}")
+            data = pd.DataFrame()
+
+        for sym in pendentes:
+            self._historicos[sym] = (inicio, fim, normalizar_ohlcv(data, sym)["fechamento"])
+
+    def _historico(self, ticker_symbol: str, inicio: pd.Timestamp, fim: pd.Timestamp) -> pd.Series:
+        """Série de fechamentos do símbolo cobrindo [inicio, fim) (baixa se necessário)."""
+        self._baixar_historicos([ticker_symbol], inicio, fim)
+        return self._historicos[ticker_symbol][2]
+
+    def _janela_download(self, datas: Iterable[pd.Timestamp]) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """Intervalo único de download que cobre todas as datas (com o lookback)."""
+        datas = pd.DatetimeIndex(list(datas))
+        return (
+            datas.min() - pd.Timedelta(days=self.max_days_lookback),
+            datas.max() + pd.Timedelta(days=1),
+        )
+
     def _fetch_price_for_date(
         self, 
         ticker_symbol: str, 
@@ -158,49 +219,29 @@ class CapturadorPrecos:
         Busca preço de fechamento ajustado para uma data específica.
         
         Se não houver negociação na data exata, busca o último preço disponível
-        nos últimos max_days_lookback dias.
+        nos últimos max_days_lookback dias. Usa o histórico em cache quando já baixado.
         """
-        try:
-            # Período de busca: target_date - lookback até target_date + 1 dia
-            start_date = target_date - pd.Timedelta(days=self.max_days_lookback)
-            end_date = target_date + pd.Timedelta(days=1)
-            
-            # Download dados
-            data = yf.download(
-                ticker_symbol,
-                start=start_date.strftime("%Y-%m-%d"),
-                end=end_date.strftime("%Y-%m-%d"),
-                progress=False,
-                auto_adjust=True  # Retorna preços ajustados
-            )
-            
-            if data.empty:
-                return None
-            
-            # yfinance retorna Close como preço ajustado quando auto_adjust=True
-            if "Close" not in data.columns:
-                return None
-            
-            # Buscar preço na data exata
-            if target_date in data.index:
-                price = float(data.loc[target_date, "Close"])
-                if np.isfinite(price) and price > 0:
-                    return price
-            
-            # Se não encontrou na data exata, buscar o último disponível antes
-            data = data[data.index <= target_date]
-            if data.empty:
-                return None
-            
-            price = float(data["Close"].iloc[-1])
-            if np.isfinite(price) and price > 0:
-                return price
-            
-            return None
-            
-        except Exception as e:
-            print(f"    ⚠️ Erro ao buscar preço: {e}")
-            return None
+        inicio, fim = self._janela_download([target_date])
+        serie = self._historico(ticker_symbol, inicio, fim)
+        price = precos_asof(serie, [target_date], self.max_days_lookback)[0]
+        return float(price) if np.isfinite(price) else None
+
+    def baixar_historicos_classes(self, tickers: List[str], pasta_base: Optional[Path] = None) -> None:
+        """
+        Pré-carrega numa única chamada o histórico de todas as classes de uma empresa
+        (mesma pasta => mesmas datas de fim de trimestre).
+        """
+        if not tickers:
+            return
+        dates_df = self._extract_quarter_dates_from_padronizado(tickers[0], pasta_base=pasta_base)
+        if dates_df.empty:
+            return
+        inicio, fim = self._janela_download(dates_df["data_fim"])
+        self._baixar_historicos([self._ticker_to_yahoo_symbol(t) for t in tickers], inicio, fim)
+
+    def limpar_cache(self) -> None:
+        """Descarta os históricos em cache."""
+        self._historicos.clear()
 
     def _build_horizontal(self, prices_data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -256,41 +297,18 @@ class CapturadorPrecos:
         # 2) Determinar símbolo para o Yahoo (ex.: BBDC3.SA)
         ticker_symbol = self._ticker_to_yahoo_symbol(ticker)
 
-        # 3) Buscar preço para cada data (fim de trimestre)
-        results = []
-        precos_ok = 0
-        precos_fail = 0
-        tem_t4 = False
-
-        for _, row in dates_df.iterrows():
-            target_date = row["data_fim"]
-            trimestre = row["trimestre"]
-            periodo = row["periodo"]
-            ano = row["ano"]
-
-            if trimestre == "T4":
-                tem_t4 = True
-
-            price = self._fetch_price_for_date(ticker_symbol, target_date)
-
-            if price is not None:
-                results.append({
-                    "periodo": periodo,
-                    "ano": ano,
-                    "trimestre": trimestre,
-                    "data_fim": target_date,
-                    "preco_fechamento_ajustado": round(float(price), 2),
-                })
-                precos_ok += 1
-            else:
-                results.append({
-                    "periodo": periodo,
-                    "ano": ano,
-                    "trimestre": trimestre,
-                    "data_fim": target_date,
-                    "preco_fechamento_ajustado": np.nan,
-                })
-                precos_fail += 1
+        # 3) Baixar o histórico diário uma única vez e resolver todos os fins de trimestre (as-of)
+        inicio, fim = self._janela_download(dates_df["data_fim"])
+        serie = self._historico(ticker_symbol, inicio, fim)
+        precos = precos_asof(serie, dates_df["data_fim"], self.max_days_lookback)
+
+        df_res = dates_df[["periodo", "ano", "trimestre", "data_fim"]].copy()
+        df_res["preco_fechamento_ajustado"] = np.round(precos, 2)
+        results = df_res.to_dict("records")
+
+        precos_ok = int(np.isfinite(precos).sum())
+        precos_fail = len(precos) - precos_ok
+        tem_t4 = bool((dates_df["trimestre"] == "T4").any())
 
         if not results:
             return False, "nenhum resultado gerado"
@@ -374,6 +392,8 @@ def main():
     parser.add_argument("--ticker", default="", help="Ticker específico")
     parser.add_argument("--lista", default="", help="Lista de tickers separados por vírgula")
     parser.add_argument("--faixa", default="", help="Faixa de linhas: inicio-fim (ex: 1-50)")
+    parser.add_argument("--sem-armazem", action="store_true",
+                        help="Baixa direto do Yahoo, sem usar o armazém local de preços")
     args = parser.parse_args()
 
     # Tentar carregar mapeamento consolidado, fallback para original
@@ -407,7 +427,7 @@ def main():
     print("Fonte: arquivos *_padronizado.csv (prioridade)")
     print("Saída: balancos/<TICKER>/precos_trimestrais.csv\n")
 
-    capturador = CapturadorPrecos()
+    capturador = CapturadorPrecos(armazem=None if args.sem_armazem else ArmazemPrecos())
 
     ok_count = 0
     err_count = 0
@@ -434,11 +454,13 @@ def main():
             # Captura trimestral: salva TODAS as classes no mesmo precos_trimestrais.csv (uma linha por ticker/classe)
             ok_all = True
             msgs = []
+            capturador.baixar_historicos_classes(tickers, pasta_base=pasta)
             for t in tickers:
                 ok_t, msg_t = capturador.capturar_e_salvar_ticker(t, merge_multiclasses=True, pasta_base=pasta)
                 ok_all = ok_all and ok_t
                 msgs.append(f"{t}: {msg_t}")
             ok, msg = ok_all, " ; ".join(msgs)
+            capturador.limpar_cache()
 
 
             if ok:
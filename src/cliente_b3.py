@@ -0,0 +1,467 @@
+# src/cliente_b3.py
+"""
+CLIENTE DA API B3 "EMPRESAS LISTADAS" (listedCompaniesProxy)
+============================================================
+
+Cliente único usado pelos coletores de proventos (capturar_dividendos.py,
+capturar_dividendos_passados.py, capturar_dividendos_futuros.py):
+
+- requests.Session com pool de conexões keep-alive (sem novo handshake TLS por página)
+- Limitador de taxa (token bucket, cliente_http.LimitadorTaxa) compartilhado entre as
+  threads; em HTTP 429 a taxa cai pela metade
+- Concorrência limitada entre tickers (mapear)
+- Retry com backoff exponencial (jitter) para 429/5xx/timeout, respeitando Retry-After
+- Paginação consistente: para na página vazia, na última página informada pela API
+  (page.totalPages) ou na página incompleta
+
+Os parâmetros vão no path como btoa(JSON.stringify(params)) -> _b64_json.
+
+CacheNomesB3: resolução persistente código de negociação (PETR) -> tradingName, código CVM
+e issuingCompany (GetInitialCompanies), com validade (TTL) e cache negativo para códigos
+não encontrados. Arquivo cache_tradingname_b3.json na raiz, compartilhado pelos coletores
+e pelo gerar_mapeamento_b3_tradingname.py (que só consulta entradas vencidas/ausentes).
+
+EXECUÇÃO (teste rápido):
+python src/cliente_b3.py --trading-name PETROBRAS
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import SSLError, Timeout, ConnectionError as RequestsConnectionError
+
+from cliente_http import LimitadorTaxa
+from multi_ticker_utils import escrever_se_mudou
+
+# Suprimir warnings SSL (fallback verify=False em runners sem a cadeia da B3)
+try:
+    import urllib3
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+except ImportError:
+    pass
+
+
+# ======================================================================================
+# CONFIGURAÇÕES
+# ======================================================================================
+
+B3_BASE = "https://sistemaswebb3-listados.b3.com.br"
+END_INITIAL = f"{B3_BASE}/listedCompaniesProxy/CompanyCall/GetInitialCompanies/"
+END_CASHDIV = f"{B3_BASE}/listedCompaniesProxy/CompanyCall/GetListedCashDividends/"
+B3_REFERER = f"{B3_BASE}/listedCompaniesPage/"
+
+TAXA_PADRAO = 4.0          # requisições/segundo (somando todas as threads)
+RAJADA_PADRAO = 4          # capacidade do balde
+CONCORRENCIA_PADRAO = 4    # tickers em paralelo
+TAMANHO_PAGINA = 120
+MAX_PAGINAS = 50
+
+ARQUIVO_CACHE_NOMES = "cache_tradingname_b3.json"
+CSV_MAPEAMENTO_NOMES = "mapeamento_tradingname_b3.csv"
+TTL_NOME_DIAS = 30         # validade de uma resolução bem-sucedida
+TTL_NEGATIVO_DIAS = 7      # validade de "código não encontrado"
+STATUS_NEGATIVOS = ("nao_encontrado", "nao_encontrado_exato")
+
+CABECALHOS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Referer": B3_REFERER,
+    "Origin": B3_BASE,
+    "Connection": "keep-alive",
+}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _b64_json(params: Dict) -> str:
+    """
+    Token do site: btoa(JSON.stringify(params))
+    => base64 do JSON (aspas duplas), em UTF-8, sem espaços.
+    """
+    s = json.dumps(params, ensure_ascii=False, separators=(",", ":"))
+    return base64.b64encode(s.encode("utf-8")).decode("ascii")
+
+
+# ======================================================================================
+# CLIENTE
+# ======================================================================================
+
+class ClienteB3:
+    """
+    Sessão compartilhada com a API da B3 (thread-safe para uso via mapear).
+
+    Args:
+        taxa: Requisições por segundo (todas as threads)
+        rajada: Requisições que podem sair de uma vez após ociosidade
+        concorrencia: Tickers processados em paralelo em mapear() (= tamanho do pool)
+        timeout: Timeout por requisição (segundos)
+        tentativas: Tentativas por requisição (429/5xx/timeout/conexão)
+        espera_base: Base do backoff exponencial (segundos)
+        verify: Verificação TLS; após um SSLError passa a False (e fica assim)
+    """
+
+    def __init__(
+        self,
+        taxa: float = TAXA_PADRAO,
+        rajada: int = RAJADA_PADRAO,
+        concorrencia: int = CONCORRENCIA_PADRAO,
+        timeout: float = 30,
+        tentativas: int = 3,
+        espera_base: float = 1.0,
+        verify: bool = True,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        self.concorrencia = max(1, int(concorrencia))
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.verify = verify
+        self.dormir = dormir
+        self.limitador = LimitadorTaxa(taxa, rajada, dormir=dormir)
+        self.estatisticas: Dict[str, float] = {"requisicoes": 0, "retentativas": 0, "limitadas": 0, "espera_taxa": 0.0}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update(CABECALHOS)
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.concorrencia)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    def _contar(self, chave: str, valor: float = 1) -> None:
+        with self._lock:
+            self.estatisticas[chave] += valor
+
+    def _esperar(self, tentativa: int, resposta: Optional[requests.Response] = None) -> None:
+        segundos = self.espera_base * (2 ** tentativa) * (1.0 + 0.25 * random.random())
+        if resposta is not None:
+            try:
+                segundos = max(segundos, float(resposta.headers.get("Retry-After", 0)))
+            except ValueError:
+                pass
+        self.dormir(segundos)
+
+    def get(self, url: str, timeout: Optional[float] = None) -> requests.Response:
+        """
+        GET com limite de taxa e retry. Devolve a última resposta (mesmo 4xx/5xx: quem
+        chama decide com raise_for_status); timeout/erro de conexão persistente é relançado.
+        """
+        timeout = timeout or self.timeout
+        for tentativa in range(self.tentativas):
+            self._contar("espera_taxa", self.limitador.adquirir())
+            self._contar("requisicoes")
+            try:
+                resposta = self.session.get(url, timeout=timeout, verify=self.verify)
+            except SSLError:
+                if not self.verify:
+                    raise
+                print("      ⚠️  SSL falhou (verify=True). Seguindo com verify=False...")
+                self.verify = False
+                continue
+            except (Timeout, RequestsConnectionError) as e:
+                if tentativa == self.tentativas - 1:
+                    raise
+                self._contar("retentativas")
+                print(f"      ⏳ {type(e).__name__}, nova tentativa...")
+                self._esperar(tentativa)
+                continue
+
+            if resposta.status_code == 429 or resposta.status_code >= 500:
+                if tentativa == self.tentativas - 1:
+                    return resposta
+                self._contar("retentativas")
+                if resposta.status_code == 429:
+                    self._contar("limitadas")
+                    self.limitador.reduzir()
+                print(f"      ⏳ Erro {resposta.status_code}, nova tentativa...")
+                self._esperar(tentativa, resposta)
+                continue
+            return resposta
+
+        raise RequestsConnectionError(f"Sem resposta após {self.tentativas} tentativa(s): {url}")
+
+    def get_json(self, endpoint: str, params: Dict, timeout: Optional[float] = None) -> Dict:
+        """GET em endpoint + token base64 dos parâmetros; HTTPError em 4xx/5xx."""
+        resposta = self.get(endpoint + _b64_json(params), timeout=timeout)
+        resposta.raise_for_status()
+        return resposta.json()
+
+    def paginar(
+        self,
+        endpoint: str,
+        params: Dict,
+        tamanho_pagina: int = TAMANHO_PAGINA,
+        max_paginas: int = MAX_PAGINAS,
+    ) -> Iterator[List[Dict]]:
+        """
+        Gera os `results` de cada página, na ordem da API.
+
+        Para na página vazia, na última página informada (page.totalPages) ou na página
+        com menos de `tamanho_pagina` itens. Quem consome pode interromper a iteração.
+        """
+        for pagina in range(1, max_paginas + 1):
+            dados = self.get_json(endpoint, {**params, "pageNumber": pagina, "pageSize": tamanho_pagina})
+            resultados = dados.get("results") or []
+            if not resultados:
+                return
+            yield resultados
+
+            total_paginas = (dados.get("page") or {}).get("totalPages")
+            if len(resultados) < tamanho_pagina or (total_paginas and pagina >= int(total_paginas)):
+                return
+
+    def cash_dividends(self, trading_name: str) -> List[Dict]:
+        """Todos os eventos em dinheiro (GetListedCashDividends) do tradingName."""
+        eventos: List[Dict] = []
+        for pagina in self.paginar(END_CASHDIV, {"language": "pt-br", "tradingName": trading_name}):
+            eventos.extend(pagina)
+        return eventos
+
+    def initial_companies(self, busca: str, tamanho_pagina: int = 50) -> List[Dict]:
+        """Primeira página de GetInitialCompanies para a busca (ticker/código/nome)."""
+        params = {"language": "pt-br", "pageNumber": 1, "pageSize": tamanho_pagina, "company": busca}
+        return self.get_json(END_INITIAL, params).get("results") or []
+
+    def mapear(self, funcao: Callable[[T], R], itens: Iterable[T]) -> Iterator[Tuple[T, R]]:
+        """
+        (item, funcao(item)) para cada item, na ordem de entrada, com no máximo
+        `concorrencia` execuções simultâneas. Exceções de funcao são relançadas.
+        """
+        itens = list(itens)
+        if self.concorrencia == 1 or len(itens) <= 1:
+            for item in itens:
+                yield item, funcao(item)
+            return
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+            yield from zip(itens, executor.map(funcao, itens))
+
+    def resumo(self) -> str:
+        e = self.estatisticas
+        return (
+            f"{int(e['requisicoes'])} requisições | {int(e['retentativas'])} retentativas | "
+            f"{int(e['limitadas'])} x 429 | espera de taxa {e['espera_taxa']:.1f}s | "
+            f"taxa final {self.limitador.taxa:g}/s"
+        )
+
+
+_cliente_padrao: Optional[ClienteB3] = None
+_cliente_lock = threading.Lock()
+
+
+def cliente_b3_padrao() -> ClienteB3:
+    """Instância compartilhada no processo (mesmo pool e mesmo limitador para todos)."""
+    global _cliente_padrao
+    with _cliente_lock:
+        if _cliente_padrao is None:
+            _cliente_padrao = ClienteB3()
+        return _cliente_padrao
+
+
+# ======================================================================================
+# CACHE DE NOMES (CÓDIGO -> TRADING NAME)
+# ======================================================================================
+
+def codigo_negociacao(ticker: str) -> str:
+    """PETR4 → PETR, VALE3 → VALE, TAEE11 → TAEE (aceita "A;B", ".SA")."""
+    t = str(ticker or "").strip().strip('"').strip("'").upper().replace(".SA", "").split(";")[0].strip()
+    return "".join(c for c in t if not c.isdigit())
+
+
+def escolher_empresa(resultados: List[Dict], codigo: str) -> Optional[Dict]:
+    """Linha de GetInitialCompanies do código: issuingCompany exato, senão code/otherCodes."""
+    codigo = codigo.upper()
+    for emp in resultados:
+        if str(emp.get("issuingCompany", "")).upper() == codigo:
+            return emp
+    for emp in resultados:
+        codigos = [emp.get("code", "")] + [o.get("code", "") for o in emp.get("otherCodes") or []]
+        if any(codigo_negociacao(c) == codigo for c in codigos if c):
+            return emp
+    return None
+
+
+class CacheNomesB3:
+    """
+    Código de negociação -> {trading_name, issuing_company, codigo_cvm, status, atualizado_em}.
+
+    - Entradas "ok" valem `ttl_dias`; "nao_encontrado*" valem `ttl_negativo_dias` (cache
+      negativo); falhas transitórias (timeout, 5xx) não são gravadas.
+    - Entrada vencida continua sendo usada se a nova consulta falhar.
+    - Sem arquivo de cache, parte do mapeamento_tradingname_b3.csv (entradas vencidas:
+      valem até a primeira consulta).
+    - Thread-safe; salvar() grava só se mudou.
+    """
+
+    def __init__(
+        self,
+        cliente: Optional[ClienteB3] = None,
+        caminho: Optional[Path] = None,
+        ttl_dias: int = TTL_NOME_DIAS,
+        ttl_negativo_dias: int = TTL_NEGATIVO_DIAS,
+        csv_legado: Optional[str] = CSV_MAPEAMENTO_NOMES,
+    ):
+        self.cliente = cliente
+        self.caminho = Path(caminho) if caminho is not None else Path(ARQUIVO_CACHE_NOMES)
+        self.ttl_dias = ttl_dias
+        self.ttl_negativo_dias = ttl_negativo_dias
+        self.estatisticas: Dict[str, int] = {"acertos": 0, "consultas": 0, "falhas": 0}
+        self._lock = threading.Lock()
+        self._entradas: Dict[str, Dict] = self._carregar(csv_legado)
+
+    def _carregar(self, csv_legado: Optional[str]) -> Dict[str, Dict]:
+        if self.caminho.exists():
+            try:
+                with open(self.caminho, encoding="utf-8") as f:
+                    return json.load(f).get("codigos", {})
+            except (OSError, ValueError) as e:
+                print(f"    ⚠️ Cache de trading names ilegível ({e}); recomeçando")
+
+        entradas: Dict[str, Dict] = {}
+        if csv_legado and Path(csv_legado).exists():
+            import pandas as pd
+
+            df = pd.read_csv(csv_legado, sep=";", encoding="utf-8-sig", dtype=str).fillna("")
+            for _, row in df.iterrows():
+                codigo = (row.get("codigo") or codigo_negociacao(row.get("ticker", ""))).upper()
+                if codigo and row.get("status") in ("ok",) + STATUS_NEGATIVOS:
+                    entradas[codigo] = {
+                        "trading_name": row.get("trading_name", ""),
+                        "issuing_company": row.get("issuing_company", ""),
+                        "codigo_cvm": "",
+                        "status": row["status"],
+                        "atualizado_em": None,
+                    }
+        return entradas
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def consultar(self, codigo: str) -> Optional[Dict]:
+        """Entrada gravada (vencida ou não), sem acessar a rede."""
+        with self._lock:
+            entrada = self._entradas.get(codigo.upper())
+            return dict(entrada) if entrada else None
+
+    def vencido(self, codigo: str, hoje: Optional[date] = None) -> bool:
+        entrada = self.consultar(codigo)
+        if not entrada or not entrada.get("atualizado_em"):
+            return True
+        ttl = self.ttl_dias if entrada.get("status") == "ok" else self.ttl_negativo_dias
+        return date.fromisoformat(entrada["atualizado_em"]) + timedelta(days=ttl) < (hoje or date.today())
+
+    def _consultar_b3(self, codigo: str) -> Dict:
+        """Uma consulta a GetInitialCompanies (status "erro:..." em falha transitória)."""
+        cliente = self.cliente or cliente_b3_padrao()
+        try:
+            resultados = cliente.initial_companies(codigo, tamanho_pagina=100)
+        except Exception as e:
+            return {"status": f"erro:{type(e).__name__}"}
+
+        if not resultados:
+            return {"status": "nao_encontrado"}
+        emp = escolher_empresa(resultados, codigo)
+        if emp is None:
+            opcoes = [f"{e.get('issuingCompany')}:{e.get('tradingName')}" for e in resultados[:5]]
+            return {"status": "nao_encontrado_exato", "opcoes": "|".join(opcoes)}
+        return {
+            # O site remove "/" e "." do tradingName nas chamadas
+            "trading_name": str(emp.get("tradingName", "")).strip().replace("/", "").replace(".", ""),
+            "issuing_company": str(emp.get("issuingCompany", "")),
+            "codigo_cvm": str(emp.get("codeCVM", "") or ""),
+            "status": "ok",
+        }
+
+    def resolver(self, ticker: str, forcar: bool = False) -> Dict:
+        """Entrada do código do ticker; consulta a B3 só se vencida/ausente (ou forcar)."""
+        codigo = codigo_negociacao(ticker)
+        if not codigo:
+            return {"status": "codigo_vazio"}
+        if not forcar and not self.vencido(codigo):
+            with self._lock:
+                self.estatisticas["acertos"] += 1
+            return self.consultar(codigo)
+
+        nova = self._consultar_b3(codigo)
+        with self._lock:
+            self.estatisticas["consultas"] += 1
+            if nova["status"].startswith("erro"):
+                self.estatisticas["falhas"] += 1
+                anterior = self._entradas.get(codigo)
+                return dict(anterior) if anterior else nova
+            nova.setdefault("trading_name", "")
+            nova.setdefault("issuing_company", "")
+            nova.setdefault("codigo_cvm", "")
+            nova["atualizado_em"] = date.today().isoformat()
+            self._entradas[codigo] = nova
+            return dict(nova)
+
+    def trading_name(self, ticker: str) -> str:
+        """tradingName do ticker ("" se não encontrado)."""
+        entrada = self.resolver(ticker)
+        return entrada.get("trading_name", "") if entrada.get("status") == "ok" else ""
+
+    def atualizar(self, tickers: Iterable[str], forcar: bool = False) -> Dict[str, Dict]:
+        """Resolve os códigos dos tickers em paralelo (só vencidos/ausentes, salvo forcar)."""
+        codigos = list(dict.fromkeys(c for c in (codigo_negociacao(t) for t in tickers) if c))
+        cliente = self.cliente or cliente_b3_padrao()
+        return dict(cliente.mapear(lambda c: self.resolver(c, forcar=forcar), codigos))
+
+    def salvar(self) -> bool:
+        """Grava o cache (ordenado por código) se mudou; True se gravou."""
+        with self._lock:
+            dados = {"codigos": dict(sorted(self._entradas.items()))}
+        return escrever_se_mudou(self.caminho, json.dumps(dados, ensure_ascii=False, indent=2))
+
+    def resumo(self) -> str:
+        e = self.estatisticas
+        return f"{len(self)} códigos | {e['acertos']} do cache | {e['consultas']} consultas | {e['falhas']} falhas"
+
+
+def adicionar_argumentos_cliente(parser: argparse.ArgumentParser) -> None:
+    """Flags comuns dos coletores B3 (--concorrencia, --taxa)."""
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA_PADRAO,
+                        help=f"Tickers em paralelo na API B3 (padrão: {CONCORRENCIA_PADRAO})")
+    parser.add_argument("--taxa", type=float, default=TAXA_PADRAO,
+                        help=f"Requisições por segundo à API B3 (padrão: {TAXA_PADRAO:g})")
+
+
+def cliente_dos_argumentos(args: argparse.Namespace, timeout: float = 30) -> ClienteB3:
+    return ClienteB3(taxa=args.taxa, rajada=max(1, int(args.taxa)), concorrencia=args.concorrencia, timeout=timeout)
+
+
+# ======================================================================================
+# CLI
+# ======================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste do cliente da API B3 (Empresas Listadas)")
+    parser.add_argument("--trading-name", default="PETROBRAS", help="tradingName para GetListedCashDividends")
+    adicionar_argumentos_cliente(parser)
+    args = parser.parse_args()
+
+    cliente = cliente_dos_argumentos(args)
+    inicio = time.monotonic()
+    eventos = cliente.cash_dividends(args.trading_name)
+    print(f"✅ {args.trading_name}: {len(eventos)} eventos em {time.monotonic() - inicio:.1f}s")
+    print(f"   {cliente.resumo()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+# src/cliente_http.py
+"""
+CLIENTE HTTP COMPARTILHADO DOS COLETORES
+========================================
+
+Camada única de HTTP dos coletores que não falam com a API B3 de empresas listadas
+(esses usam cliente_b3.py): capturar_logos, capturar_noticiario_empresarial,
+capturar_debentures_anbima, capturar_cri_cra_anbima, capturar_curvas_credito_anbima,
+capturar_curva_pre_di, coletar_fluxo_estrangeiros, expectativa_selic e preencher_balancos.
+
+- requests.Session única com pool de conexões keep-alive por host (HTTPAdapter/urllib3)
+- Limitador de taxa (token bucket) por host; em HTTP 429 a taxa do host cai pela metade
+- Retry com backoff exponencial (jitter) para 429/5xx/timeout/conexão, respeitando Retry-After
+- Cache em disco com semântica HTTP: Cache-Control (max-age, no-cache, no-store), Expires,
+  revalidação condicional (ETag -> If-None-Match, Last-Modified -> If-Modified-Since; 304
+  reaproveita o corpo gravado) e TTL explícito por chamada (ttl=segundos)
+- Gravação/reprodução: MONALYTICS_HTTP_MODO=gravar salva toda resposta (qualquer método
+  e status) em gravacoes_http/; MONALYTICS_HTTP_MODO=reproduzir responde só a partir das
+  gravações, sem rede (benchmark offline do pipeline). Requisição sem gravação levanta
+  ErroReproducao.
+
+A chave de cache/gravação é método + URL final (com params) + corpo; cabeçalhos da
+requisição (ex.: Authorization) não entram na chave nem são gravados. Vary é ignorado.
+
+VARIÁVEIS DE AMBIENTE (lidas por cliente_http_padrao):
+    MONALYTICS_HTTP_MODO        rede (padrão) | gravar | reproduzir
+    MONALYTICS_HTTP_CACHE       pasta do cache (padrão .cache_http; vazio desliga o cache)
+    MONALYTICS_HTTP_GRAVACOES   pasta das gravações (padrão gravacoes_http)
+
+EXECUÇÃO (teste rápido):
+python src/cliente_http.py https://olinda.bcb.gov.br/olinda/servico/Expectativas/versao/v1/odata/
+python src/cliente_http.py <URL> --ttl 3600 --repetir 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import Timeout, ConnectionError as RequestsConnectionError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+# ======================================================================================
+# CONFIGURAÇÕES
+# ======================================================================================
+
+MODO_REDE = "rede"
+MODO_GRAVAR = "gravar"
+MODO_REPRODUZIR = "reproduzir"
+MODOS = (MODO_REDE, MODO_GRAVAR, MODO_REPRODUZIR)
+
+PASTA_CACHE_PADRAO = ".cache_http"
+PASTA_GRAVACOES_PADRAO = "gravacoes_http"
+
+TAXA_HOST_PADRAO = 2.0     # requisições/segundo por host
+RAJADA_HOST_PADRAO = 2     # capacidade do balde por host
+TAXA_MINIMA = 0.5          # piso da taxa após sucessivos 429
+HOSTS_POOL = 16            # hosts com pool de conexões mantido (LRU do urllib3)
+CONEXOES_POR_HOST = 8
+
+# (taxa, rajada) por host; demais hosts usam TAXA_HOST_PADRAO/RAJADA_HOST_PADRAO
+LIMITES_HOST: Dict[str, Tuple[float, int]] = {
+    "investidor10.com.br": (1.0, 1),
+    "news.google.com": (2.0, 4),
+    "www.anbima.com.br": (1.0, 2),
+    "www2.bmf.com.br": (2.0, 2),
+    "sistemaswebb3-listados.b3.com.br": (2.0, 2),
+    "olinda.bcb.gov.br": (2.0, 2),
+    "brapi.dev": (2.0, 2),
+}
+
+# Não vão para o disco: segredos e cabeçalhos que não descrevem o corpo já decodificado
+CABECALHOS_NAO_GRAVADOS = {"set-cookie", "content-encoding", "content-length", "transfer-encoding", "connection"}
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class ErroReproducao(RequestsConnectionError):
+    """Modo reproduzir sem gravação para a requisição (tratada como falha de conexão)."""
+
+
+def _agora() -> float:
+    return time.time()
+
+
+def _gravar_atomico(path: Path, dados: bytes) -> None:
+    """Arquivo temporário + os.replace (seguro com várias threads/processos)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(dados)
+    os.replace(tmp, path)
+
+
+def _chave_requisicao(preparada: requests.PreparedRequest) -> str:
+    """SHA-256 de método + URL final + corpo."""
+    h = hashlib.sha256(f"{preparada.method} {preparada.url}\n".encode("utf-8"))
+    corpo = preparada.body
+    if corpo:
+        h.update(corpo if isinstance(corpo, bytes) else str(corpo).encode("utf-8"))
+    return h.hexdigest()
+
+
+# ======================================================================================
+# LIMITADOR DE TAXA
+# ======================================================================================
+
+class LimitadorTaxa:
+    """
+    Token bucket thread-safe: `taxa` fichas por segundo, até `capacidade` acumuladas.
+
+    adquirir() bloqueia até haver uma ficha; reduzir() divide a taxa (após HTTP 429).
+    """
+
+    def __init__(
+        self,
+        taxa: float = TAXA_HOST_PADRAO,
+        capacidade: int = RAJADA_HOST_PADRAO,
+        relogio: Callable[[], float] = time.monotonic,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self.relogio = relogio
+        self.dormir = dormir
+        self._fichas = float(capacidade)
+        self._ultimo = relogio()
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> float:
+        """Consome uma ficha; devolve quantos segundos esperou."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = self.relogio()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._fichas >= 1.0:
+                    self._fichas -= 1.0
+                    return esperado
+                falta = (1.0 - self._fichas) / self.taxa
+            self.dormir(falta)
+            esperado += falta
+
+    def reduzir(self, fator: float = 0.5, minimo: float = TAXA_MINIMA) -> None:
+        with self._lock:
+            self.taxa = max(minimo, self.taxa * fator)
+
+
+# ======================================================================================
+# ARMAZÉM EM DISCO (CACHE E GRAVAÇÕES)
+# ======================================================================================
+
+class ArmazemRespostas:
+    """
+    Respostas em disco: <pasta>/<chave[:2]>/<chave>.json (metadados) + <chave>.bin (corpo).
+
+    Usado tanto pelo cache HTTP quanto pelas gravações (mesmo formato, pastas diferentes).
+    """
+
+    def __init__(self, pasta: Path):
+        self.pasta = Path(pasta)
+
+    def _caminhos(self, chave: str) -> Tuple[Path, Path]:
+        base = self.pasta / chave[:2] / chave
+        return base.with_suffix(".json"), base.with_suffix(".bin")
+
+    def ler(self, chave: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        meta_path, corpo_path = self._caminhos(chave)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return meta, corpo_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+
+    def gravar(self, chave: str, meta: Dict[str, Any], corpo: Optional[bytes]) -> None:
+        """Grava corpo e metadados; corpo=None atualiza só os metadados (revalidação 304)."""
+        meta_path, corpo_path = self._caminhos(chave)
+        if corpo is not None:
+            _gravar_atomico(corpo_path, corpo)
+        _gravar_atomico(meta_path, json.dumps(meta, ensure_ascii=False, indent=1).encode("utf-8"))
+
+
+def _meta_da_resposta(resposta: requests.Response, metodo: str) -> Dict[str, Any]:
+    return {
+        "metodo": metodo,
+        "url": resposta.url,
+        "status": resposta.status_code,
+        "reason": resposta.reason,
+        "headers": {k: v for k, v in resposta.headers.items() if k.lower() not in CABECALHOS_NAO_GRAVADOS},
+        "salvo_em": _agora(),
+    }
+
+
+def _resposta_do_disco(meta: Dict[str, Any], corpo: bytes, origem: str) -> requests.Response:
+    """requests.Response equivalente à gravada (json()/text/content/raise_for_status funcionam)."""
+    resposta = requests.Response()
+    resposta.status_code = int(meta.get("status", 200))
+    resposta.reason = meta.get("reason") or ""
+    resposta.url = meta.get("url") or ""
+    resposta.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    resposta.encoding = get_encoding_from_headers(resposta.headers)
+    resposta._content = corpo
+    resposta.origem = origem
+    return resposta
+
+
+def _diretivas_cache(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Cache-Control -> {diretiva: valor|None} (nomes em minúsculas)."""
+    diretivas: Dict[str, Optional[str]] = {}
+    for parte in str(CaseInsensitiveDict(headers).get("Cache-Control") or "").split(","):
+        nome, _, valor = parte.strip().partition("=")
+        if nome:
+            diretivas[nome.lower()] = valor.strip('"') or None
+    return diretivas
+
+
+def _validade_segundos(meta: Dict[str, Any], ttl: Optional[float]) -> float:
+    """Por quanto tempo a resposta gravada é fresca: ttl explícito > max-age > Expires > 0."""
+    if ttl is not None:
+        return float(ttl)
+    headers = meta.get("headers") or {}
+    diretivas = _diretivas_cache(headers)
+    if "no-cache" in diretivas:
+        return 0.0
+    if diretivas.get("max-age"):
+        try:
+            return float(diretivas["max-age"])
+        except ValueError:
+            return 0.0
+    expires = CaseInsensitiveDict(headers).get("Expires")
+    if expires:
+        try:
+            return email.utils.parsedate_to_datetime(expires).timestamp() - float(meta.get("salvo_em", 0))
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+def _validadores(meta: Dict[str, Any]) -> Dict[str, str]:
+    """Cabeçalhos condicionais para revalidar a resposta gravada."""
+    headers = CaseInsensitiveDict(meta.get("headers") or {})
+    condicionais: Dict[str, str] = {}
+    if headers.get("ETag"):
+        condicionais["If-None-Match"] = headers["ETag"]
+    if headers.get("Last-Modified"):
+        condicionais["If-Modified-Since"] = headers["Last-Modified"]
+    return condicionais
+
+
+# ======================================================================================
+# CLIENTE
+# ======================================================================================
+
+class ClienteHTTP:
+    """
+    Sessão HTTP compartilhada (thread-safe) com limite por host, retry e cache em disco.
+
+    Args:
+        modo: rede | gravar | reproduzir
+        pasta_cache: Pasta do cache HTTP (None desliga o cache)
+        pasta_gravacoes: Pasta das gravações (modos gravar/reproduzir)
+        timeout: Timeout padrão por requisição (segundos)
+        tentativas: Tentativas por requisição (429/5xx/timeout/conexão)
+        espera_base: Base do backoff exponencial (segundos)
+        limites_host: {host: (taxa, rajada)} além de LIMITES_HOST
+    """
+
+    def __init__(
+        self,
+        modo: str = MODO_REDE,
+        pasta_cache: Optional[Path] = Path(PASTA_CACHE_PADRAO),
+        pasta_gravacoes: Path = Path(PASTA_GRAVACOES_PADRAO),
+        timeout: float = 30,
+        tentativas: int = 3,
+        espera_base: float = 1.0,
+        limites_host: Optional[Dict[str, Tuple[float, int]]] = None,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        if modo not in MODOS:
+            raise ValueError(f"Modo HTTP inválido: {modo!r} (use {', '.join(MODOS)})")
+        self.modo = modo
+        self.cache = ArmazemRespostas(pasta_cache) if pasta_cache else None
+        self.gravacoes = ArmazemRespostas(pasta_gravacoes)
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.dormir = dormir
+        self.limites_host = {**LIMITES_HOST, **(limites_host or {})}
+        self.estatisticas: Dict[str, float] = {
+            "requisicoes": 0, "cache": 0, "revalidadas": 0, "retentativas": 0,
+            "limitadas": 0, "gravadas": 0, "reproduzidas": 0, "espera_taxa": 0.0,
+        }
+        self._limitadores: Dict[str, LimitadorTaxa] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        adaptador = HTTPAdapter(pool_connections=HOSTS_POOL, pool_maxsize=CONEXOES_POR_HOST)
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    # ------------------------------------------------------------------ suporte
+    def _contar(self, chave: str, valor: float = 1) -> None:
+        with self._lock:
+            self.estatisticas[chave] += valor
+
+    def limitador(self, host: str) -> LimitadorTaxa:
+        """Limitador do host (criado na primeira requisição ao host)."""
+        with self._lock:
+            if host not in self._limitadores:
+                taxa, rajada = self.limites_host.get(host, (TAXA_HOST_PADRAO, RAJADA_HOST_PADRAO))
+                self._limitadores[host] = LimitadorTaxa(taxa, rajada, dormir=self.dormir)
+            return self._limitadores[host]
+
+    def _esperar(self, tentativa: int, resposta: Optional[requests.Response] = None) -> None:
+        segundos = self.espera_base * (2 ** tentativa) * (1.0 + 0.25 * random.random())
+        if resposta is not None:
+            try:
+                segundos = max(segundos, float(resposta.headers.get("Retry-After", 0)))
+            except ValueError:
+                pass
+        self.dormir(segundos)
+
+    # ------------------------------------------------------------------ rede
+    def _enviar(
+        self,
+        preparada: requests.PreparedRequest,
+        timeout: float,
+        verify: Optional[bool],
+        allow_redirects: bool,
+    ) -> requests.Response:
+        """Envio com limite do host e retry; devolve a última resposta (mesmo 4xx/5xx)."""
+        limitador = self.limitador(urlsplit(preparada.url).hostname or "")
+        ambiente = self.session.merge_environment_settings(preparada.url, {}, None, verify, None)
+
+        for tentativa in range(self.tentativas):
+            self._contar("espera_taxa", limitador.adquirir())
+            self._contar("requisicoes")
+            try:
+                resposta = self.session.send(
+                    preparada, timeout=timeout, allow_redirects=allow_redirects, **ambiente
+                )
+            except (Timeout, RequestsConnectionError) as e:
+                if tentativa == self.tentativas - 1:
+                    raise
+                self._contar("retentativas")
+                print(f"      ⏳ {type(e).__name__} em {urlsplit(preparada.url).hostname}, nova tentativa...")
+                self._esperar(tentativa)
+                continue
+
+            if resposta.status_code == 429 or resposta.status_code >= 500:
+                if tentativa == self.tentativas - 1:
+                    return resposta
+                self._contar("retentativas")
+                if resposta.status_code == 429:
+                    self._contar("limitadas")
+                    limitador.reduzir()
+                self._esperar(tentativa, resposta)
+                continue
+            return resposta
+
+        raise RequestsConnectionError(f"Sem resposta após {self.tentativas} tentativa(s): {preparada.url}")
+
+    # ------------------------------------------------------------------ API
+    def requisitar(
+        self,
+        metodo: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        verify: Optional[bool] = None,
+        allow_redirects: bool = True,
+        ttl: Optional[float] = None,
+        validar: Optional[Callable[[requests.Response], bool]] = None,
+    ) -> requests.Response:
+        """
+        Requisição com cache/gravação conforme o modo. Devolve requests.Response com o
+        atributo extra `origem`: rede | cache | revalidada | reproduzida.
+
+        Cache (modo rede): GET com status 200 é guardado quando há validade (ttl, max-age,
+        Expires) ou validadores (ETag/Last-Modified), exceto com no-store. Outros métodos
+        só entram no cache com ttl explícito. Com `validar`, só respostas aprovadas entram
+        no cache (ex.: página provisória com 200 antes de o arquivo do dia ser publicado)
+        e entradas gravadas reprovadas são ignoradas.
+        """
+        preparada = self.session.prepare_request(
+            requests.Request(metodo.upper(), url, params=params, data=data, headers=headers)
+        )
+        chave = _chave_requisicao(preparada)
+        timeout = timeout or self.timeout
+
+        if self.modo == MODO_REPRODUZIR:
+            gravada = self.gravacoes.ler(chave)
+            if gravada is None:
+                raise ErroReproducao(f"Sem gravação para {preparada.method} {preparada.url}")
+            self._contar("reproduzidas")
+            return _resposta_do_disco(*gravada, origem="reproduzida")
+
+        if self.modo == MODO_GRAVAR:
+            resposta = self._enviar(preparada, timeout, verify, allow_redirects)
+            self.gravacoes.gravar(chave, _meta_da_resposta(resposta, preparada.method), resposta.content)
+            self._contar("gravadas")
+            resposta.origem = "rede"
+            return resposta
+
+        cacheavel = self.cache is not None and (preparada.method == "GET" or ttl is not None)
+        anterior = self.cache.ler(chave) if cacheavel else None
+        if anterior is not None and validar is not None and \
+                not validar(_resposta_do_disco(*anterior, origem="cache")):
+            anterior = None
+        if anterior is not None:
+            meta, corpo = anterior
+            if _agora() - float(meta.get("salvo_em", 0)) < _validade_segundos(meta, ttl):
+                self._contar("cache")
+                return _resposta_do_disco(meta, corpo, origem="cache")
+            preparada.headers.update(_validadores(meta))
+
+        resposta = self._enviar(preparada, timeout, verify, allow_redirects)
+
+        if anterior is not None and resposta.status_code == 304:
+            meta, corpo = anterior
+            meta["headers"].update(
+                {k: v for k, v in resposta.headers.items() if k.lower() not in CABECALHOS_NAO_GRAVADOS}
+            )
+            meta["salvo_em"] = _agora()
+            self.cache.gravar(chave, meta, None)
+            self._contar("revalidadas")
+            return _resposta_do_disco(meta, corpo, origem="revalidada")
+
+        if cacheavel and resposta.status_code == 200 and (validar is None or validar(resposta)):
+            meta = _meta_da_resposta(resposta, preparada.method)
+            if "no-store" not in _diretivas_cache(meta["headers"]) and (
+                _validade_segundos(meta, ttl) > 0 or _validadores(meta)
+            ):
+                self.cache.gravar(chave, meta, resposta.content)
+
+        resposta.origem = "rede"
+        return resposta
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET (mesmos argumentos nomeados de requisitar)."""
+        return self.requisitar("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST (mesmos argumentos nomeados de requisitar)."""
+        return self.requisitar("POST", url, **kwargs)
+
+    def resumo(self) -> str:
+        e = self.estatisticas
+        return (
+            f"modo {self.modo} | {int(e['requisicoes'])} requisições | {int(e['cache'])} do cache | "
+            f"{int(e['revalidadas'])} revalidadas (304) | {int(e['retentativas'])} retentativas | "
+            f"{int(e['limitadas'])} x 429 | {int(e['gravadas'])} gravadas | "
+            f"{int(e['reproduzidas'])} reproduzidas | espera de taxa {e['espera_taxa']:.1f}s"
+        )
+
+
+_cliente_padrao: Optional[ClienteHTTP] = None
+_cliente_lock = threading.Lock()
+
+
+def cliente_http_padrao() -> ClienteHTTP:
+    """Instância compartilhada no processo, configurada pelas variáveis MONALYTICS_HTTP_*."""
+    global _cliente_padrao
+    with _cliente_lock:
+        if _cliente_padrao is None:
+            pasta_cache = os.environ.get("MONALYTICS_HTTP_CACHE", PASTA_CACHE_PADRAO)
+            _cliente_padrao = ClienteHTTP(
+                modo=os.environ.get("MONALYTICS_HTTP_MODO", MODO_REDE).strip().lower() or MODO_REDE,
+                pasta_cache=Path(pasta_cache) if pasta_cache else None,
+                pasta_gravacoes=Path(os.environ.get("MONALYTICS_HTTP_GRAVACOES", PASTA_GRAVACOES_PADRAO)),
+            )
+        return _cliente_padrao
+
+
+# ======================================================================================
+# CLI
+# ======================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste do cliente HTTP compartilhado")
+    parser.add_argument("url", help="URL para GET")
+    parser.add_argument("--ttl", type=float, default=None, help="Validade explícita no cache (segundos)")
+    parser.add_argument("--repetir", type=int, default=1, help="Quantas vezes repetir o GET")
+    parser.add_argument("--modo", choices=MODOS, default=None, help="Sobrepõe MONALYTICS_HTTP_MODO")
+    args = parser.parse_args()
+
+    if args.modo:
+        os.environ["MONALYTICS_HTTP_MODO"] = args.modo
+    cliente = cliente_http_padrao()
+    for _ in range(max(1, args.repetir)):
+        inicio = time.monotonic()
+        resposta = cliente.get(args.url, ttl=args.ttl)
+        print(f"{resposta.status_code} {resposta.origem:<10} {len(resposta.content):>9} bytes "
+              f"em {time.monotonic() - inicio:.2f}s")
+    print(f"   {cliente.resumo()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 import pandas as pd
-import requests
 import locale
+import sys
 from datetime import datetime
 import re
 from pathlib import Path
 import json
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
 # ==========================
 # UTILITÁRIOS
 # ==========================
@@ -49,7 +52,7 @@ def baixar_dados_b3():
     }
 
     try:
-        resp = requests.get(url, headers=headers, timeout=30)
+        resp = cliente_http_padrao().get(url, headers=headers, timeout=30)
         if resp.status_code == 200:
             return resp.text
         print(f"⚠️ Erro HTTP ao baixar CSV: {resp.status_code}")
@@ -8,16 +8,36 @@ SAÍDA:
 - balancos/agenda_dividendos.json (feed único completo)
 - balancos/agenda_dividendos_mes.json (organizado por mês)
 - balancos/estatisticas_dividendos.json (análises)
+- balancos/agenda_dividendos_manifesto.json (controle incremental)
+
+INCREMENTAL:
+O manifesto guarda, por ticker, a assinatura dos arquivos de dividendos (tamanho e
+hash) e a contribuição do ticker às estatísticas. Tickers sem mudança reaproveitam os
+eventos da agenda anterior (já ordenados) sem reler os JSONs; o feed é a intercalação
+(heapq.merge) das listas ordenadas de cada ticker e as estatísticas somam as contribuições.
 
 USO:
 python src/consolidar_dividendos.py
+python src/consolidar_dividendos.py --completo   # ignora o manifesto
 """
 
+import argparse
+import hashlib
+import heapq
 import json
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict, Counter
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+
+# Arquivo por empresa -> status atribuído aos seus eventos
+ARQUIVOS_EMPRESA = (
+    ("dividendos_historico.json", "pago"),
+    ("dividendos_futuros.json", "provisionado"),
+)
+ARQUIVO_MANIFESTO = "agenda_dividendos_manifesto.json"
+VERSAO_MANIFESTO = 2
 
 
 class ConsolidadorDividendos:
@@ -25,11 +45,15 @@ class ConsolidadorDividendos:
     Consolida dividendos históricos e futuros em agenda única.
     """
     
-    def __init__(self, pasta_balancos: str = "balancos"):
+    def __init__(self, pasta_balancos: str = "balancos", incremental: bool = True):
         self.pasta_balancos = Path(pasta_balancos)
+        self.incremental = incremental
         self.empresas_processadas = 0
+        self.empresas_reaproveitadas = 0
         self.dividendos_historicos = 0
         self.dividendos_futuros = 0
+        self.contribuicoes: Dict[str, Dict] = {}
+        self._manifesto: Dict[str, Dict] = {}
     
     def carregar_dividendos_empresa(self, ticker: str) -> Dict:
         """
@@ -42,33 +66,25 @@ class ConsolidadorDividendos:
         
         dividendos = []
         
-        # Carregar histórico
-        arquivo_historico = pasta_ticker / "dividendos_historico.json"
-        if arquivo_historico.exists():
-            try:
-                with open(arquivo_historico, 'r', encoding='utf-8') as f:
-                    historico = json.load(f)
-                    for div in historico.get('dividendos', []):
-                        div['ticker'] = ticker
-                        div['status'] = 'pago'
-                        dividendos.append(div)
-                    self.dividendos_historicos += len(historico.get('dividendos', []))
-            except Exception as e:
-                print(f"⚠️  Erro ao carregar histórico de {ticker}: {e}")
-        
-        # Carregar futuros
-        arquivo_futuros = pasta_ticker / "dividendos_futuros.json"
-        if arquivo_futuros.exists():
+        # Carregar histórico (pago) e futuros (provisionado)
+        for nome_arquivo, status in ARQUIVOS_EMPRESA:
+            arquivo = pasta_ticker / nome_arquivo
+            if not arquivo.exists():
+                continue
             try:
-                with open(arquivo_futuros, 'r', encoding='utf-8') as f:
-                    futuros = json.load(f)
-                    for div in futuros.get('dividendos', []):
-                        div['ticker'] = ticker
-                        div['status'] = 'provisionado'
-                        dividendos.append(div)
-                    self.dividendos_futuros += len(futuros.get('dividendos', []))
+                with open(arquivo, 'r', encoding='utf-8') as f:
+                    conteudo = json.load(f)
+                for div in conteudo.get('dividendos', []):
+                    div['ticker'] = ticker
+                    div['status'] = status
+                    dividendos.append(div)
+                if status == 'pago':
+                    self.dividendos_historicos += len(conteudo.get('dividendos', []))
+                else:
+                    self.dividendos_futuros += len(conteudo.get('dividendos', []))
             except Exception as e:
-                print(f"⚠️  Erro ao carregar futuros de {ticker}: {e}")
+                rotulo = "histórico" if status == 'pago' else "futuros"
+                print(f"⚠️  Erro ao carregar {rotulo} de {ticker}: {e}")
         
         if not dividendos:
             return None
@@ -88,18 +104,115 @@ class ConsolidadorDividendos:
         """
         return dividendo.get('data_pagamento') or dividendo.get('data') or '1900-01-01'
     
+    # ------------------------------------------------------------------
+    # Manifesto (controle incremental)
+    # ------------------------------------------------------------------
+    
+    def _assinatura(self, pasta_ticker: Path) -> Dict[str, List]:
+        """
+        {arquivo: [tamanho, sha1]} dos arquivos de dividendos da pasta.
+        
+        Só conteúdo: o manifesto é versionado e o mtime muda a cada checkout do CI.
+        """
+        assinatura = {}
+        for nome_arquivo, _ in ARQUIVOS_EMPRESA:
+            arquivo = pasta_ticker / nome_arquivo
+            if not arquivo.exists():
+                continue
+            conteudo = arquivo.read_bytes()
+            assinatura[nome_arquivo] = [len(conteudo), hashlib.sha1(conteudo).hexdigest()]
+        return assinatura
+    
+    @staticmethod
+    def _mesmo_conteudo(a: Optional[Dict], b: Dict) -> bool:
+        return a == b
+    
+    def _carregar_estado(self) -> Tuple[Dict[str, Dict], Dict[str, List[Dict]]]:
+        """(manifesto por ticker, eventos da agenda anterior por ticker) ou ({}, {})."""
+        arquivo_manifesto = self.pasta_balancos / ARQUIVO_MANIFESTO
+        arquivo_agenda = self.pasta_balancos / "agenda_dividendos.json"
+        if not (arquivo_manifesto.exists() and arquivo_agenda.exists()):
+            return {}, {}
+        try:
+            with open(arquivo_manifesto, 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+            if manifesto.get('versao') != VERSAO_MANIFESTO:
+                return {}, {}
+            with open(arquivo_agenda, 'r', encoding='utf-8') as f:
+                agenda = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Manifesto/agenda anterior ilegível ({e}): consolidação completa")
+            return {}, {}
+        
+        # A agenda está ordenada: a subsequência de cada ticker também está
+        por_ticker = defaultdict(list)
+        for div in agenda.get('dividendos', []):
+            por_ticker[div.get('ticker')].append(div)
+        return manifesto.get('tickers', {}), por_ticker
+    
+    def _contribuicao(self, dividendos: List[Dict]) -> Dict:
+        """Agregados de um ticker; as estatísticas globais são a soma das contribuições."""
+        empresa = {
+            'historicos': 0,
+            'futuros': 0,
+            'total_valor': 0,
+            'ultimo_pagamento': None,
+            'proximo_pagamento': None
+        }
+        por_mes = Counter()
+        total_pago = total_provisionado = valor_pagador = 0
+        com_valor = False
+        
+        for div in dividendos:
+            valor = div.get('valor', 0)
+            data = self._get_data_ordenacao(div)
+            if data and len(data) >= 7:
+                por_mes[data[:7]] += 1
+            if div.get('valor'):
+                com_valor = True
+                valor_pagador += div['valor']
+            empresa['total_valor'] += valor
+            
+            if div.get('status') == 'pago':
+                total_pago += valor
+                empresa['historicos'] += 1
+                if not empresa['ultimo_pagamento'] or data > empresa['ultimo_pagamento']:
+                    empresa['ultimo_pagamento'] = data
+            else:
+                if div.get('status') == 'provisionado':
+                    total_provisionado += valor
+                empresa['futuros'] += 1
+                if not empresa['proximo_pagamento'] or data < empresa['proximo_pagamento']:
+                    empresa['proximo_pagamento'] = data
+        
+        return {
+            'quantidade': len(dividendos),
+            'historicos': sum(1 for d in dividendos if d.get('status') == 'pago'),
+            'futuros': sum(1 for d in dividendos if d.get('status') == 'provisionado'),
+            'por_status': dict(Counter(d.get('status') for d in dividendos)),
+            'por_tipo': dict(Counter(d.get('tipo') for d in dividendos)),
+            'por_mes': dict(por_mes),
+            'total_pago': total_pago,
+            'total_provisionado': total_provisionado,
+            'valor_pagador': valor_pagador if com_valor else None,
+            'empresa': empresa,
+        }
+    
     def consolidar_tudo(self) -> Dict:
         """
         Consolida todas as empresas em feed único.
         """
         print("="*70)
-        print("📊 CONSOLIDANDO DIVIDENDOS")
+        print("📊 CONSOLIDANDO DIVIDENDOS" + (" (incremental)" if self.incremental else ""))
         print("="*70)
         
-        todos_dividendos = []
+        manifesto_anterior, feed_anterior = self._carregar_estado() if self.incremental else ({}, {})
+        listas: List[List[Dict]] = []
+        self._manifesto = {}
+        self.contribuicoes = {}
         
-        # Buscar todas as pastas de tickers
-        for pasta_ticker in self.pasta_balancos.iterdir():
+        # Buscar todas as pastas de tickers (ordem fixa: saída determinística)
+        for pasta_ticker in sorted(self.pasta_balancos.iterdir()):
             if not pasta_ticker.is_dir():
                 continue
             
@@ -109,17 +222,42 @@ class ConsolidadorDividendos:
             if ticker.endswith('.json'):
                 continue
             
-            dados = self.carregar_dividendos_empresa(ticker)
-            if dados:
-                todos_dividendos.extend(dados['dividendos'])
+            anterior = manifesto_anterior.get(ticker)
+            assinatura = self._assinatura(pasta_ticker)
+            if not assinatura:
+                continue
+            
+            if anterior and self._mesmo_conteudo(anterior.get('assinatura'), assinatura) and (
+                anterior.get('contribuicao') is None or ticker in feed_anterior
+            ):
+                # Sem mudança: eventos e contribuição da execução anterior
+                dividendos = feed_anterior.get(ticker, [])
+                contribuicao = anterior.get('contribuicao')
+                self.empresas_reaproveitadas += 1
+                if contribuicao:
+                    self.dividendos_historicos += contribuicao['historicos']
+                    self.dividendos_futuros += contribuicao['futuros']
+            else:
+                dados = self.carregar_dividendos_empresa(ticker)
+                dividendos = dados['dividendos'] if dados else []
+                contribuicao = self._contribuicao(dividendos) if dividendos else None
+                if dividendos:
+                    print(f"  ✅ {ticker}: {len(dividendos)} dividendos")
+            
+            self._manifesto[ticker] = {'assinatura': assinatura, 'contribuicao': contribuicao}
+            if dividendos:
+                listas.append(dividendos)
+                self.contribuicoes[ticker] = contribuicao
                 self.empresas_processadas += 1
-                print(f"  ✅ {ticker}: {len(dados['dividendos'])} dividendos")
         
-        # Ordenar todos por data
-        todos_dividendos.sort(key=lambda x: self._get_data_ordenacao(x), reverse=True)
+        if self.empresas_reaproveitadas:
+            print(f"  ♻️  {self.empresas_reaproveitadas} empresa(s) sem mudança (agenda anterior)")
         
-        # Calcular estatísticas
-        estatisticas = self._calcular_estatisticas(todos_dividendos)
+        # Intercalar as listas já ordenadas de cada ticker (mais recente primeiro)
+        todos_dividendos = list(heapq.merge(*listas, key=self._get_data_ordenacao, reverse=True))
+        
+        # Calcular estatísticas (soma das contribuições por ticker)
+        estatisticas = self._combinar_estatisticas(self.contribuicoes)
         
         # Estrutura final
         agenda = {
@@ -138,39 +276,47 @@ class ConsolidadorDividendos:
         
         return agenda
     
+    def _contribuicoes_de(self, dividendos: List[Dict]) -> Dict[str, Dict]:
+        por_ticker = defaultdict(list)
+        for d in dividendos:
+            por_ticker[d.get('ticker')].append(d)
+        return {t: self._contribuicao(divs) for t, divs in por_ticker.items()}
+    
     def _calcular_estatisticas(self, dividendos: List[Dict]) -> Dict:
         """
         Calcula estatísticas agregadas.
         """
+        return self._combinar_estatisticas(self._contribuicoes_de(dividendos))
+    
+    def _combinar_estatisticas(self, contribuicoes: Dict[str, Dict]) -> Dict:
+        """
+        Estatísticas agregadas a partir das contribuições por ticker.
+        """
         # Contadores
-        por_status = Counter(d.get('status') for d in dividendos)
-        por_tipo = Counter(d.get('tipo') for d in dividendos)
-        por_ticker = Counter(d.get('ticker') for d in dividendos)
-        
-        # Valores
-        total_pago = sum(d.get('valor', 0) for d in dividendos if d.get('status') == 'pago')
-        total_provisionado = sum(d.get('valor', 0) for d in dividendos if d.get('status') == 'provisionado')
+        por_status = Counter()
+        por_tipo = Counter()
+        por_mes = Counter()
+        por_ticker = Counter()
+        total_pago = total_provisionado = 0
+        valores_por_ticker = {}
+        
+        for ticker, c in contribuicoes.items():
+            por_status.update(c['por_status'])
+            por_tipo.update(c['por_tipo'])
+            por_mes.update(c['por_mes'])
+            por_ticker[ticker] = c['quantidade']
+            total_pago += c['total_pago']
+            total_provisionado += c['total_provisionado']
+            if c['valor_pagador'] is not None:
+                valores_por_ticker[ticker] = c['valor_pagador']
         
         # Top pagadores
-        valores_por_ticker = defaultdict(float)
-        for d in dividendos:
-            if d.get('valor'):
-                valores_por_ticker[d.get('ticker')] += d.get('valor', 0)
-        
         top_pagadores = sorted(
             [{'ticker': t, 'total': round(v, 2)} for t, v in valores_por_ticker.items()],
             key=lambda x: x['total'],
             reverse=True
         )[:20]
         
-        # Dividendos por mês
-        por_mes = defaultdict(int)
-        for d in dividendos:
-            data = self._get_data_ordenacao(d)
-            if data and len(data) >= 7:
-                mes = data[:7]  # YYYY-MM
-                por_mes[mes] += 1
-        
         return {
             'por_status': dict(por_status),
             'por_tipo': dict(por_tipo),
@@ -223,38 +369,28 @@ class ConsolidadorDividendos:
             'por_mes': meses_ordenados
         }
     
-    def gerar_estatisticas_detalhadas(self, dividendos: List[Dict]) -> Dict:
+    def gerar_estatisticas_detalhadas(
+        self, dividendos: List[Dict], contribuicoes: Optional[Dict[str, Dict]] = None
+    ) -> Dict:
         """
         Gera arquivo separado com estatísticas detalhadas.
+        
+        `dividendos` é o feed já ordenado (mais recente primeiro); `contribuicoes` são os
+        agregados por ticker de consolidar_tudo (recalculados do feed se omitidos).
         """
-        # Dividendos futuros (próximos 12 meses)
+        # Dividendos futuros (próximos 12 meses): prefixo do feed ordenado
         hoje = datetime.now().strftime('%Y-%m-%d')
-        futuros = [d for d in dividendos if self._get_data_ordenacao(d) >= hoje]
+        n_futuros = 0
+        for d in dividendos:
+            if self._get_data_ordenacao(d) < hoje:
+                break
+            n_futuros += 1
+        futuros = dividendos[:n_futuros]
         
         # Análise por empresa
-        por_empresa = defaultdict(lambda: {
-            'historicos': 0,
-            'futuros': 0,
-            'total_valor': 0,
-            'ultimo_pagamento': None,
-            'proximo_pagamento': None
-        })
-        
-        for div in dividendos:
-            ticker = div.get('ticker')
-            valor = div.get('valor', 0)
-            data = self._get_data_ordenacao(div)
-            
-            por_empresa[ticker]['total_valor'] += valor
-            
-            if div.get('status') == 'pago':
-                por_empresa[ticker]['historicos'] += 1
-                if not por_empresa[ticker]['ultimo_pagamento'] or data > por_empresa[ticker]['ultimo_pagamento']:
-                    por_empresa[ticker]['ultimo_pagamento'] = data
-            else:
-                por_empresa[ticker]['futuros'] += 1
-                if not por_empresa[ticker]['proximo_pagamento'] or data < por_empresa[ticker]['proximo_pagamento']:
-                    por_empresa[ticker]['proximo_pagamento'] = data
+        if contribuicoes is None:
+            contribuicoes = self._contribuicoes_de(dividendos)
+        por_empresa = {ticker: c['empresa'] for ticker, c in contribuicoes.items()}
         
         # Converter para lista
         empresas_lista = [
@@ -284,7 +420,7 @@ class ConsolidadorDividendos:
             }
         }
     
-    def salvar_json(self, dados: Dict, nome_arquivo: str):
+    def salvar_json(self, dados: Dict, nome_arquivo: str, verbose: bool = True):
         """
         Salva JSON no diretório balancos.
         """
@@ -293,6 +429,9 @@ class ConsolidadorDividendos:
         with open(arquivo, 'w', encoding='utf-8') as f:
             json.dump(dados, f, ensure_ascii=False, indent=2)
         
+        if not verbose:
+            return
+        
         # Calcular tamanho
         tamanho_kb = arquivo.stat().st_size / 1024
         
@@ -311,7 +450,7 @@ class ConsolidadorDividendos:
         por_mes = self.organizar_por_mes(agenda['dividendos'])
         
         # 3. Estatísticas detalhadas
-        estatisticas = self.gerar_estatisticas_detalhadas(agenda['dividendos'])
+        estatisticas = self.gerar_estatisticas_detalhadas(agenda['dividendos'], self.contribuicoes)
         
         # Imprimir resumo
         print(f"\n{'='*70}")
@@ -333,6 +472,13 @@ class ConsolidadorDividendos:
         self.salvar_json(por_mes, "agenda_dividendos_mes.json")
         self.salvar_json(estatisticas, "estatisticas_dividendos.json")
         
+        # Manifesto por último: só vale se a agenda correspondente foi gravada
+        self.salvar_json(
+            {'versao': VERSAO_MANIFESTO, 'tickers': self._manifesto},
+            ARQUIVO_MANIFESTO,
+            verbose=False
+        )
+        
         print(f"\n{'='*70}")
         print(f"✅ CONSOLIDAÇÃO CONCLUÍDA COM SUCESSO!")
         print(f"{'='*70}")
@@ -348,7 +494,12 @@ class ConsolidadorDividendos:
 # ============================================================================
 
 def main():
-    consolidador = ConsolidadorDividendos()
+    parser = argparse.ArgumentParser(description="Consolida dividendos de todas as empresas")
+    parser.add_argument("--completo", action="store_true",
+                       help="Ignora o manifesto e relê todas as empresas")
+    args = parser.parse_args()
+    
+    consolidador = ConsolidadorDividendos(incremental=not args.completo)
     consolidador.consolidar_e_salvar()
 
 
@@ -27,6 +27,9 @@ from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import requests
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
 
 BASE_URL = "https://olinda.bcb.gov.br/olinda/servico/Expectativas/versao/v1/odata/ExpectativasMercadoSelic"
 
@@ -83,7 +86,7 @@ def _http_get_json(url: str, params: Dict[str, str], timeout: int = 30) -> Dict:
         "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
         "Connection": "keep-alive",
     }
-    r = requests.get(url, params=params, headers=headers, timeout=timeout)
+    r = cliente_http_padrao().get(url, params=params, headers=headers, timeout=timeout)
     # Se der 400, queremos a mensagem completa no log
     try:
         r.raise_for_status()
@@ -8,23 +8,35 @@ Atualiza a cada 30min (seg-sex, 10h30-18h30).
 
 SAÍDA:
 - balancos/IBOV/monitor_diario.json
+- balancos/IBOV/monitor_intraday.json  (--snapshots: fotografias do dia, para gráficos de amplitude)
+- balancos/IBOV/monitor_delta.json     (--snapshots: só o que mudou na última fotografia)
 
 TOP 5:
 - Maiores altas
 - Maiores baixas
 - Maiores volumes
+
+As cotações de todas as ações vêm de um único download agrupado (provedores_precos.py),
+limitado por um orçamento de latência por execução (--prazo, padrão 60s).
 """
 
 from __future__ import annotations
 
+import argparse
 import json
-from datetime import datetime
+import sys
+from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, str(Path(__file__).parent))
+from provedores_precos import ProvedorPrecos, ProvedorYahoo, simbolo_yahoo
+from multi_ticker_utils import escrever_se_mudou
+
 try:
     import yfinance as yf
     HAS_YFINANCE = True
@@ -41,6 +53,11 @@ IBOV_TICKERS_CSV = Path("ibov_tickers.csv")
 OUTPUT_DIR = Path("balancos") / "IBOV"
 OUTPUT_FILE = "monitor_diario.json"
 TZ_BRASILIA = ZoneInfo("America/Sao_Paulo")
+PRAZO_SEGUNDOS = 60   # Orçamento de latência da busca de cotações (workflow roda a cada 30 min)
+JANELA_DIAS = 10      # Dias corridos baixados para garantir os 2 últimos pregões
+ARQUIVO_INTRADAY = "monitor_intraday.json"
+ARQUIVO_DELTA = "monitor_delta.json"
+MAX_SNAPSHOTS = 48    # Anel do dia: 10h30-19h a cada 30 min cabe com folga (execuções manuais incluídas)
 
 
 # ======================================================================================
@@ -65,68 +82,63 @@ def carregar_tickers() -> List[str]:
         return []
 
 
-def buscar_cotacao_ticker(ticker: str) -> Optional[Dict]:
+def buscar_cotacoes(
+    tickers: List[str],
+    provedor: Optional[ProvedorPrecos] = None,
+    prazo: Optional[float] = PRAZO_SEGUNDOS,
+) -> pd.DataFrame:
     """
-    Busca cotação atual e calcula variação do dia.
-    
+    Busca as cotações de todos os tickers em uma requisição agrupada.
+
+    Variação do dia sobre os dois últimos fechamentos ajustados de cada ticker. Tickers sem dados (ou fora do prazo)
+    ficam de fora.
+
     Returns:
-        {
-            'ticker': str,
-            'preco_atual': float,
-            'preco_anterior': float,
-            'variacao_pct': float,
-            'volume': int
-        }
+        DataFrame na ordem de `tickers` com colunas
+        ticker, preco_atual, preco_anterior, variacao_pct, volume
     """
-    if not HAS_YFINANCE:
-        return None
-    
-    ticker_yahoo = f"{ticker}.SA"
-    
-    try:
-        stock = yf.Ticker(ticker_yahoo)
-        
-        # Buscar dados do dia com PREÇOS AJUSTADOS
-        hist = stock.history(period='2d', auto_adjust=True)  # ← CORREÇÃO
-        
+    colunas = ['ticker', 'preco_atual', 'preco_anterior', 'variacao_pct', 'volume']
+    provedor = provedor or ProvedorYahoo(lote=max(1, len(tickers)), lote_max=max(100, len(tickers)), tentativas=2)
+
+    inicio = (date.today() - timedelta(days=JANELA_DIAS)).isoformat()
+    historicos = provedor.baixar([simbolo_yahoo(t) for t in tickers], inicio, prazo=prazo)
+
+    linhas = []
+    for ticker in tickers:
+        hist = historicos.get(simbolo_yahoo(ticker))
         if hist is None or len(hist) < 2:
-            return None
-        
-        # Preço anterior (último fechamento)
-        preco_anterior = float(hist['Close'].iloc[-2])
-        
-        # Preço atual (último disponível)
-        preco_atual = float(hist['Close'].iloc[-1])
-        
-        # Volume do dia atual
-        volume = int(hist['Volume'].iloc[-1])
-        
-        # Variação percentual
-        if preco_anterior > 0:
-            variacao_pct = ((preco_atual - preco_anterior) / preco_anterior) * 100
-        else:
-            variacao_pct = 0.0
-        
-        return {
-            'ticker': ticker,
-            'preco_atual': round(preco_atual, 2),
-            'preco_anterior': round(preco_anterior, 2),
-            'variacao_pct': round(variacao_pct, 2),
-            'volume': volume
-        }
-        
-    except Exception as e:
-        # Silencioso - muitos tickers podem falhar
-        return None
+            continue
+        linhas.append((ticker, hist['fechamento'].iloc[-1], hist['fechamento'].iloc[-2], hist['volume'].iloc[-1]))
+
+    if not linhas:
+        return pd.DataFrame(columns=colunas)
+
+    df = pd.DataFrame(linhas, columns=['ticker', 'preco_atual', 'preco_anterior', 'volume'])
+    atual = df['preco_atual'].to_numpy(dtype=float)
+    anterior = df['preco_anterior'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacao = np.where(anterior > 0, (atual - anterior) / anterior * 100, 0.0)
+
+    df['variacao_pct'] = [round(float(v), 2) for v in variacao]
+    df['preco_atual'] = [round(float(v), 2) for v in atual]
+    df['preco_anterior'] = [round(float(v), 2) for v in anterior]
+    df['volume'] = df['volume'].fillna(0).astype('int64')
+    return df[colunas]
 
 
 # ======================================================================================
 # ANÁLISE E RANKINGS
 # ======================================================================================
 
-def processar_ibovespa() -> Dict:
+def processar_ibovespa(
+    provedor: Optional[ProvedorPrecos] = None,
+    prazo: Optional[float] = PRAZO_SEGUNDOS,
+    snapshots: bool = False,
+) -> Dict:
     """
     Processa todos os tickers do IBOVESPA e gera rankings.
+
+    Com snapshots=True, registra também a fotografia intraday (registrar_snapshot).
     
     Returns:
         {
@@ -148,33 +160,28 @@ def processar_ibovespa() -> Dict:
         return {"erro": "Nenhum ticker carregado"}
     
     print(f"Total de tickers: {len(tickers)}")
-    print(f"Buscando cotações...\n")
+    print(f"Buscando cotações (download agrupado, prazo {prazo}s)...\n")
     
-    # Buscar todas as cotações
-    cotacoes = []
+    # Buscar todas as cotações de uma vez
+    df = buscar_cotacoes(tickers, provedor=provedor, prazo=prazo)
     
-    for i, ticker in enumerate(tickers, 1):
-        print(f"[{i}/{len(tickers)}] {ticker}...", end=" ")
-        
-        cot = buscar_cotacao_ticker(ticker)
-        
-        if cot:
-            cotacoes.append(cot)
-            var = cot['variacao_pct']
-            sinal = "📈" if var > 0 else "📉" if var < 0 else "➡️"
-            print(f"{sinal} {var:+.2f}%")
-        else:
-            print("⚠️  sem dados")
+    obtidos = set(df['ticker'])
+    for ticker, var in zip(df['ticker'], df['variacao_pct']):
+        sinal = "📈" if var > 0 else "📉" if var < 0 else "➡️"
+        print(f"{ticker} {sinal} {var:+.2f}%")
+    for ticker in tickers:
+        if ticker not in obtidos:
+            print(f"{ticker} ⚠️  sem dados")
     
     print(f"\n{'='*70}")
-    print(f"Cotações obtidas: {len(cotacoes)}/{len(tickers)}")
+    print(f"Cotações obtidas: {len(df)}/{len(tickers)}")
     print(f"{'='*70}\n")
     
-    if len(cotacoes) == 0:
+    if len(df) == 0:
         return {"erro": "Nenhuma cotação obtida"}
     
-    # Criar DataFrame para facilitar análise
-    df = pd.DataFrame(cotacoes)
+    if snapshots:
+        registrar_snapshot(df)
     
     # TOP 5 MAIORES ALTAS
     top_altas = df.nlargest(5, 'variacao_pct')[
@@ -191,15 +198,16 @@ def processar_ibovespa() -> Dict:
         ['ticker', 'volume', 'variacao_pct', 'preco_atual']
     ].to_dict('records')
     
-    # Estatísticas gerais
-    media_variacao = df['variacao_pct'].mean()
-    acoes_alta = len(df[df['variacao_pct'] > 0])
-    acoes_baixa = len(df[df['variacao_pct'] < 0])
-    acoes_estavel = len(df[df['variacao_pct'] == 0])
+    # Estatísticas gerais (uma passada sobre o array de variações)
+    variacoes = df['variacao_pct'].to_numpy(dtype=float)
+    media_variacao = float(variacoes.mean())
+    acoes_alta = int((variacoes > 0).sum())
+    acoes_baixa = int((variacoes < 0).sum())
+    acoes_estavel = int((variacoes == 0).sum())
     
     return {
         'ultima_atualizacao': datetime.now(TZ_BRASILIA).isoformat(timespec="minutes"),
-        'total_acoes': len(cotacoes),
+        'total_acoes': len(df),
         'estatisticas': {
             'variacao_media': round(media_variacao, 2),
             'acoes_em_alta': acoes_alta,
@@ -212,6 +220,117 @@ def processar_ibovespa() -> Dict:
     }
 
 
+# ======================================================================================
+# FOTOGRAFIAS INTRADAY (ANEL DO DIA + DELTA)
+# ======================================================================================
+
+def _amplitude(variacoes: np.ndarray) -> Dict:
+    return {
+        'alta': int((variacoes > 0).sum()),
+        'baixa': int((variacoes < 0).sum()),
+        'estaveis': int((variacoes == 0).sum()),
+    }
+
+
+def registrar_snapshot(
+    df: pd.DataFrame,
+    agora: Optional[datetime] = None,
+    pasta: Path = OUTPUT_DIR,
+    max_snapshots: int = MAX_SNAPSHOTS,
+) -> Dict:
+    """
+    Acrescenta a fotografia atual ao anel do dia e publica o delta.
+
+    monitor_intraday.json:
+        {"data": "2026-01-20", "tickers": [...],
+         "snapshots": [{"seq": 1, "hora": "10:30", "preco": [...], "variacao": [...],
+                        "volume": [...], "amplitude": {"alta", "baixa", "estaveis"}}, ...]}
+        Arrays alinhados a "tickers" (null = sem cotação). Ticker novo no dia entra no fim da
+        lista; fotografias anteriores ficam mais curtas. O anel reinicia a cada dia e guarda
+        no máximo `max_snapshots` fotografias.
+
+    monitor_delta.json (consulta frequente do site):
+        {"data", "seq", "hora", "ultima_atualizacao", "amplitude", "variacao_media",
+         "mudancas": {"tickers": [...], "preco": [...], "variacao": [...], "volume": [...]}}
+        Só os tickers que mudaram desde a fotografia seq-1; quem tem a seq-1 aplica o delta,
+        os demais recarregam o anel.
+
+    Returns:
+        O delta publicado
+    """
+    agora = agora or datetime.now(TZ_BRASILIA)
+    dia = agora.date().isoformat()
+    arquivo = pasta / ARQUIVO_INTRADAY
+
+    anel = None
+    if arquivo.exists():
+        try:
+            with open(arquivo, encoding='utf-8') as f:
+                anel = json.load(f)
+        except (OSError, ValueError):
+            anel = None
+    if not anel or anel.get('data') != dia:
+        anel = {'data': dia, 'tickers': [], 'snapshots': []}
+
+    tickers = anel['tickers']
+    posicao = {t: i for i, t in enumerate(tickers)}
+    for t in df['ticker']:
+        if t not in posicao:
+            posicao[t] = len(tickers)
+            tickers.append(t)
+
+    n = len(tickers)
+    idx = [posicao[t] for t in df['ticker']]
+    colunas = {}
+    for chave, col in (('preco', 'preco_atual'), ('variacao', 'variacao_pct'), ('volume', 'volume')):
+        valores: List = [None] * n
+        for i, v in zip(idx, df[col].tolist()):
+            valores[i] = v
+        colunas[chave] = valores
+
+    variacoes = df['variacao_pct'].to_numpy(dtype=float)
+    anterior = anel['snapshots'][-1] if anel['snapshots'] else None
+    snap = {
+        'seq': (anterior['seq'] + 1) if anterior else 1,
+        'hora': agora.strftime('%H:%M'),
+        **colunas,
+        'amplitude': _amplitude(variacoes),
+    }
+    anel['snapshots'] = (anel['snapshots'] + [snap])[-max_snapshots:]
+
+    # Delta: posições cujo trio (preço, variação, volume) mudou desde a fotografia anterior
+    mudou = list(range(n))
+    if anterior:
+        def _valor(chave: str, i: int):
+            arr = anterior[chave]
+            return arr[i] if i < len(arr) else None
+        mudou = [
+            i for i in range(n)
+            if any(colunas[k][i] != _valor(k, i) for k in ('preco', 'variacao', 'volume'))
+        ]
+
+    delta = {
+        'data': dia,
+        'seq': snap['seq'],
+        'hora': snap['hora'],
+        'ultima_atualizacao': agora.isoformat(timespec="minutes"),
+        'amplitude': snap['amplitude'],
+        'variacao_media': round(float(variacoes.mean()), 2),
+        'mudancas': {
+            'tickers': [tickers[i] for i in mudou],
+            **{k: [colunas[k][i] for i in mudou] for k in ('preco', 'variacao', 'volume')},
+        },
+    }
+
+    minificado = dict(ensure_ascii=False, separators=(",", ":"))
+    escrever_se_mudou(arquivo, json.dumps(anel, **minificado))
+    escrever_se_mudou(pasta / ARQUIVO_DELTA, json.dumps(delta, **minificado))
+
+    print(f"🕒 Fotografia #{snap['seq']} ({snap['hora']}): {len(mudou)} ticker(s) mudaram → "
+          f"{ARQUIVO_INTRADAY}, {ARQUIVO_DELTA}")
+    return delta
+
+
 # ======================================================================================
 # SALVAMENTO
 # ======================================================================================
@@ -282,12 +401,19 @@ def exibir_resumo(dados: Dict):
 # ======================================================================================
 
 def main():
+    parser = argparse.ArgumentParser(description="Monitor de variações diárias do IBOVESPA")
+    parser.add_argument("--prazo", default=PRAZO_SEGUNDOS, type=float,
+                       help="Orçamento de latência da busca de cotações, em segundos (padrão: 60)")
+    parser.add_argument("--snapshots", action="store_true",
+                       help="Registra a fotografia intraday (monitor_intraday.json) e publica monitor_delta.json")
+    args = parser.parse_args()
+    
     if not HAS_YFINANCE:
         print("❌ Instale yfinance: pip install yfinance")
         return
     
     # Processar
-    resultado = processar_ibovespa()
+    resultado = processar_ibovespa(prazo=args.prazo, snapshots=args.snapshots)
     
     # Exibir
     exibir_resumo(resultado)
@@ -3,11 +3,20 @@
 Utilitários para gerenciamento de múltiplos tickers
 """
 
+import gzip
+import hashlib
+import os
 import re
 from pathlib import Path
 from typing import Optional
 import pandas as pd
 
+# Opcional: irmãos .br pré-comprimidos; sem o módulo, gera apenas .gz
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # Diretório base do projeto (relativo ao script)
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -194,3 +203,48 @@ def load_mapeamento_consolidado() -> pd.DataFrame:
         ("\n... (truncado)" if len(tried) > 80 else "")
     )
 
+
+# ======================================================================================
+# ESCRITA COMPACTA (WRITE-IF-CHANGED)
+# ======================================================================================
+
+def hash_conteudo(conteudo: bytes) -> str:
+    """SHA-256 (hex) do conteúdo."""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _escrever_comprimidos(path: Path, dados: bytes, somente_ausentes: bool = False) -> None:
+    """Gera irmãos pré-comprimidos (.gz sempre; .br se o módulo brotli estiver instalado)."""
+    gz_path = path.with_name(path.name + ".gz")
+    if not (somente_ausentes and gz_path.exists()):
+        # mtime=0: saída determinística (mesmo conteúdo -> mesmos bytes, sem diff no git)
+        gz_path.write_bytes(gzip.compress(dados, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        br_path = path.with_name(path.name + ".br")
+        if not (somente_ausentes and br_path.exists()):
+            br_path.write_bytes(brotli.compress(dados, quality=11))
+
+
+def escrever_se_mudou(path: Path, conteudo: str, comprimir: bool = False) -> bool:
+    """
+    Grava o arquivo apenas se o hash do conteúdo mudou. Retorna True se gravou.
+
+    A escrita é atômica (arquivo temporário + os.replace), segura com vários processos
+    gravando o mesmo arquivo compartilhado. comprimir=True mantém também .gz/.br ao lado.
+    """
+    dados = conteudo.encode("utf-8")
+
+    if path.exists() and hash_conteudo(path.read_bytes()) == hash_conteudo(dados):
+        if comprimir:
+            _escrever_comprimidos(path, dados, somente_ausentes=True)
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(dados)
+    os.replace(tmp, path)
+
+    if comprimir:
+        _escrever_comprimidos(path, dados)
+    return True
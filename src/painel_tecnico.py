@@ -0,0 +1,286 @@
+# src/painel_tecnico.py
+"""
+PAINEL TÉCNICO - INDICADORES DO UNIVERSO INTEIRO
+================================================
+Outubro 2026
+
+Monta uma única matriz data × ticker de fechamentos e calcula, com operações de janela
+sobre a matriz (sem laço por ticker):
+- RSI (Wilder, 14 períodos)
+- Volatilidade anualizada (52 semanas)
+- Drawdown máximo (52 semanas)
+- Beta e correlação contra o IBOV (retornos diários, 52 semanas)
+- Distância da máxima / mínima de 52 semanas
+
+FONTES:
+- json:    balancos/*/historico_precos_<TICKER>.json (capturar_historico_precos.py)
+- armazem: balancos/PRECOS/precos_diarios.sqlite (armazem_precos.py)
+
+SAÍDA: balancos/TECNICO/painel_tecnico.json (um registro por ticker + rankings)
+
+EXECUÇÃO:
+python src/painel_tecnico.py
+python src/painel_tecnico.py --fonte armazem
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+from multi_ticker_utils import _find_balancos_dir, escrever_se_mudou
+
+
+# ======================================================================================
+# CONFIGURAÇÕES
+# ======================================================================================
+
+REFERENCIA = "IBOV"
+JANELA_DIAS = 252          # 52 semanas de pregões
+PERIODO_RSI = 14
+MIN_OBSERVACOES = 120      # Mínimo de retornos na janela para volatilidade/beta/correlação
+MAX_DIAS_DEFASAGEM = 10    # Tickers sem pregão há mais que isso (deslistados/suspensos) ficam de fora
+TOP_RANKING = 10
+PASTA_SAIDA = "TECNICO"
+ARQUIVO_SAIDA = "painel_tecnico.json"
+ARQUIVO_LEGADO = "historico_precos_diarios.json"  # cópia antiga do site legado, não é ticker
+
+INDICADORES = [
+    "rsi14",
+    "volatilidade_anual",
+    "drawdown_max_52s",
+    "beta_ibov",
+    "correlacao_ibov",
+    "dist_max_52s",
+    "dist_min_52s",
+]
+
+
+# ======================================================================================
+# CARREGAMENTO DA MATRIZ DE FECHAMENTOS
+# ======================================================================================
+
+def carregar_fechamentos_json(pasta_base: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Matriz data × ticker a partir dos fechamentos dos históricos de 5 anos já salvos.
+    """
+    pasta_base = pasta_base or _find_balancos_dir()
+    colunas: Dict[str, pd.Series] = {}
+
+    for arquivo in sorted(pasta_base.glob("*/historico_precos_*.json")):
+        if arquivo.name.endswith(".min.json") or arquivo.name == ARQUIVO_LEGADO:
+            continue
+        ticker = arquivo.stem[len("historico_precos_"):]
+        try:
+            with open(arquivo, encoding="utf-8") as f:
+                dados_json = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        dados = dados_json.get("dados") or []
+        if not dados:
+            continue
+        fechamentos = [r.get("fechamento") for r in dados]
+
+        colunas[ticker] = pd.Series(
+            np.array([np.nan if v is None else v for v in fechamentos], dtype=float),
+            index=pd.DatetimeIndex(pd.to_datetime([r["data"] for r in dados]), name="Date"),
+        )
+
+    if not colunas:
+        return pd.DataFrame()
+    return pd.DataFrame(colunas).sort_index()
+
+
+def carregar_fechamentos_armazem() -> pd.DataFrame:
+    """Matriz data × ticker direto do armazém SQLite (uma consulta)."""
+    from armazem_precos import ArmazemPrecos
+
+    return ArmazemPrecos().matriz_fechamentos()
+
+
+# ======================================================================================
+# INDICADORES (VETORIZADOS SOBRE A MATRIZ)
+# ======================================================================================
+
+def _rsi(fechamentos: pd.DataFrame, periodo: int = PERIODO_RSI) -> pd.Series:
+    """RSI de Wilder (média exponencial com alpha = 1/período) no último pregão."""
+    variacao = fechamentos.diff()
+    ganho = variacao.clip(lower=0).ewm(alpha=1 / periodo, adjust=False, min_periods=periodo).mean()
+    perda = (-variacao.clip(upper=0)).ewm(alpha=1 / periodo, adjust=False, min_periods=periodo).mean()
+    g, p = ganho.iloc[-1], perda.iloc[-1]
+    rsi = 100 - 100 / (1 + g / p)
+    return rsi.where(p > 0, 100.0).where(g.notna() & p.notna())
+
+
+def _beta_correlacao(retornos: pd.DataFrame, referencia: pd.Series, min_obs: int) -> pd.DataFrame:
+    """Beta e correlação de cada coluna contra a referência, só nos pares de dias presentes em ambos."""
+    r = retornos.to_numpy(dtype=float)
+    m = np.broadcast_to(referencia.to_numpy(dtype=float)[:, None], r.shape)
+    ok = ~np.isnan(r) & ~np.isnan(m)
+    n = ok.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media_r = np.where(ok, r, 0.0).sum(axis=0) / n
+        media_m = np.where(ok, m, 0.0).sum(axis=0) / n
+        dr = np.where(ok, r - media_r, 0.0)
+        dm = np.where(ok, m - media_m, 0.0)
+        cov = (dr * dm).sum(axis=0)
+        var_r = (dr * dr).sum(axis=0)
+        var_m = (dm * dm).sum(axis=0)
+        beta = cov / var_m
+        correlacao = cov / np.sqrt(var_r * var_m)
+
+    valido = n >= min_obs
+    return pd.DataFrame(
+        {"beta_ibov": np.where(valido, beta, np.nan), "correlacao_ibov": np.where(valido, correlacao, np.nan)},
+        index=retornos.columns,
+    )
+
+
+def calcular_painel(
+    fechamentos: pd.DataFrame,
+    referencia: str = REFERENCIA,
+    janela: int = JANELA_DIAS,
+    min_obs: int = MIN_OBSERVACOES,
+) -> pd.DataFrame:
+    """
+    Indicadores técnicos de todos os tickers da matriz (índice = ticker).
+
+    A referência (IBOV) entra só como mercado para beta/correlação.
+    """
+    fechamentos = fechamentos.sort_index()
+    ultimo_valido = fechamentos.apply(pd.Series.last_valid_index)
+    fim = fechamentos.index.max()
+    ativos = ultimo_valido[ultimo_valido >= fim - pd.Timedelta(days=MAX_DIAS_DEFASAGEM)].index
+    ativos = [t for t in ativos if t != referencia]
+
+    # Preenche só lacunas internas (suspensões): não estende o histórico além do último pregão
+    precos = fechamentos[ativos].ffill().where(fechamentos[ativos].bfill().notna())
+    recentes = precos.iloc[-janela:]
+    retornos = recentes.pct_change(fill_method=None).iloc[1:]
+    n_ret = retornos.notna().sum()
+
+    ultimo = precos.ffill().iloc[-1]
+    maxima = recentes.max()
+    minima = recentes.min()
+
+    painel = pd.DataFrame({
+        "data_ultimo": ultimo_valido[ativos].dt.strftime("%Y-%m-%d"),
+        "preco": ultimo,
+        "rsi14": _rsi(precos),
+        "volatilidade_anual": (retornos.std() * np.sqrt(JANELA_DIAS) * 100).where(n_ret >= min_obs),
+        "drawdown_max_52s": ((recentes / recentes.cummax() - 1).min() * 100),
+        "dist_max_52s": (ultimo / maxima - 1) * 100,
+        "dist_min_52s": (ultimo / minima - 1) * 100,
+    })
+
+    if referencia in fechamentos.columns:
+        mercado = fechamentos[referencia].reindex(recentes.index).pct_change(fill_method=None).iloc[1:]
+        painel = painel.join(_beta_correlacao(retornos, mercado, min_obs))
+    else:
+        painel["beta_ibov"] = np.nan
+        painel["correlacao_ibov"] = np.nan
+
+    return painel.sort_index()
+
+
+# ======================================================================================
+# ARTEFATO
+# ======================================================================================
+
+def gerar_artefato(painel: pd.DataFrame, data_referencia: str, top: int = TOP_RANKING) -> Dict:
+    """
+    {
+        "ultima_atualizacao", "data_referencia", "referencia", "janela_dias", "total_tickers",
+        "dados": [{"ticker", "data_ultimo", "preco", "rsi14", ...}, ...],
+        "rankings": {"rsi14": {"maiores": [...], "menores": [...]}, ...}
+    }
+    """
+    casas = {"beta_ibov": 3, "correlacao_ibov": 3}
+    dados: List[Dict] = []
+    for ticker, linha in zip(painel.index, painel.to_dict("records")):
+        registro = {"ticker": ticker, "data_ultimo": linha["data_ultimo"], "preco": round(float(linha["preco"]), 2)}
+        for ind in INDICADORES:
+            v = linha[ind]
+            registro[ind] = round(float(v), casas.get(ind, 2)) if pd.notna(v) else None
+        dados.append(registro)
+
+    rankings = {}
+    for ind in INDICADORES:
+        serie = painel[ind].dropna()
+        rankings[ind] = {
+            "maiores": serie.nlargest(top).index.tolist(),
+            "menores": serie.nsmallest(top).index.tolist(),
+        }
+
+    return {
+        "ultima_atualizacao": datetime.now().isoformat(timespec="seconds"),
+        "data_referencia": data_referencia,
+        "referencia": REFERENCIA,
+        "janela_dias": JANELA_DIAS,
+        "total_tickers": len(dados),
+        "dados": dados,
+        "rankings": rankings,
+    }
+
+
+def salvar_artefato(saida: Path, artefato: Dict) -> bool:
+    """Grava o painel se algo além do carimbo de hora mudou. Retorna True se gravou."""
+    try:
+        with open(saida, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if {k: v for k, v in anterior.items() if k != "ultima_atualizacao"} == \
+                {k: v for k, v in artefato.items() if k != "ultima_atualizacao"}:
+            return False
+    except (OSError, ValueError):
+        pass
+    return escrever_se_mudou(saida, json.dumps(artefato, ensure_ascii=False, indent=2))
+
+
+# ======================================================================================
+# CLI
+# ======================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Painel técnico cross-sectional (RSI, volatilidade, beta...)")
+    parser.add_argument("--fonte", default="json", choices=["json", "armazem"],
+                       help="Origem dos fechamentos (padrão: históricos JSON de 5 anos)")
+    parser.add_argument("--saida", default="", help="Arquivo de saída (padrão: balancos/TECNICO/painel_tecnico.json)")
+    args = parser.parse_args()
+
+    print(f"\n{'='*70}")
+    print("📐 PAINEL TÉCNICO")
+    print(f"{'='*70}\n")
+
+    fechamentos = carregar_fechamentos_armazem() if args.fonte == "armazem" else carregar_fechamentos_json()
+    if fechamentos.empty:
+        print("❌ Nenhum histórico de preços encontrado")
+        return
+
+    print(f"Matriz: {fechamentos.shape[0]} pregões × {fechamentos.shape[1]} tickers")
+    if REFERENCIA not in fechamentos.columns:
+        print(f"⚠️  {REFERENCIA} ausente: beta/correlação ficarão vazios")
+
+    painel = calcular_painel(fechamentos)
+    artefato = gerar_artefato(painel, fechamentos.index.max().strftime("%Y-%m-%d"))
+
+    saida = Path(args.saida) if args.saida else _find_balancos_dir() / PASTA_SAIDA / ARQUIVO_SAIDA
+    gravou = salvar_artefato(saida, artefato)
+
+    status = "atualizado" if gravou else "sem mudança"
+    print(f"✅ {artefato['total_tickers']} tickers ({status}) → {saida}")
+    for ind in ("rsi14", "dist_max_52s", "beta_ibov"):
+        print(f"   {ind:<18} maiores: {', '.join(artefato['rankings'][ind]['maiores'][:5])}")
+
+
+if __name__ == "__main__":
+    main()
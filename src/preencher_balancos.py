@@ -5,9 +5,7 @@ Monalisa Research - Antonio Siqueira
 """
 
 import pandas as pd
-import json
-import urllib.request
-import urllib.error
+import requests
 from datetime import datetime
 from pathlib import Path
 import sys
@@ -15,6 +13,9 @@ import os
 import argparse
 import time
 
+sys.path.insert(0, str(Path(__file__).parent))
+from cliente_http import cliente_http_padrao
+
 
 import re
 
@@ -249,35 +250,34 @@ def validar_token_brapi():
     # Testar com PETR4 (ação gratuita da BRAPI)
     url = 'https://brapi.dev/api/quote/PETR4'
     
-    req = urllib.request.Request(url)
-    req.add_header('Authorization', f'Bearer {BRAPI_TOKEN}')
-    
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
-            if 'results' in data and len(data['results']) > 0:
-                print(f"✅ Token válido! Testado com PETR4")
-                print(f"   Preço PETR4: R$ {data['results'][0].get('regularMarketPrice', 'N/A')}")
-                return True
-            else:
-                print("⚠️  Token válido mas resposta inesperada")
-                return False
+        response = cliente_http_padrao().get(url, headers={'Authorization': f'Bearer {BRAPI_TOKEN}'}, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        if 'results' in data and len(data['results']) > 0:
+            print(f"✅ Token válido! Testado com PETR4")
+            print(f"   Preço PETR4: R$ {data['results'][0].get('regularMarketPrice', 'N/A')}")
+            return True
+        else:
+            print("⚠️  Token válido mas resposta inesperada")
+            return False
                 
-    except urllib.error.HTTPError as e:
-        print(f"❌ Erro HTTP {e.code}: {e.reason}")
+    except requests.HTTPError as e:
+        codigo = e.response.status_code
+        print(f"❌ Erro HTTP {codigo}: {e.response.reason}")
         
-        if e.code == 401:
+        if codigo == 401:
             print("\n🔴 Token inválido ou expirado!")
             print("\nSoluções:")
             print("  1. Verificar se o token está correto")
             print("  2. Gerar novo token em: https://brapi.dev/dashboard")
             print("  3. Configurar no GitHub: Settings → Secrets → BRAPI_TOKEN")
             
-        elif e.code == 402:
+        elif codigo == 402:
             print("\n🔴 Limite de requisições excedido!")
             print("   Considere upgrade do plano BRAPI")
             
-        elif e.code == 429:
+        elif codigo == 429:
             print("\n🔴 Rate limit excedido!")
             print("   Aguarde alguns minutos e tente novamente")
         
@@ -291,22 +291,21 @@ def validar_token_brapi():
 def buscar_dados_brapi(ticker, modulo='balanceSheetHistoryQuarterly'):
     """Busca dados na BRAPI com tratamento de erros melhorado"""
     url = f'https://brapi.dev/api/quote/{ticker}?modules={modulo}'
-    req = urllib.request.Request(url)
-    req.add_header('Authorization', f'Bearer {BRAPI_TOKEN}')
     
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
-            return json.loads(response.read().decode())
+        response = cliente_http_padrao().get(url, headers={'Authorization': f'Bearer {BRAPI_TOKEN}'}, timeout=30)
+        response.raise_for_status()
+        return response.json()
             
-    except urllib.error.HTTPError as e:
-        error_msg = f"HTTP {e.code}"
+    except requests.HTTPError as e:
+        error_msg = f"HTTP {e.response.status_code}"
         
         try:
-            error_body = json.loads(e.read().decode())
+            error_body = e.response.json()
             if 'message' in error_body:
                 error_msg += f": {error_body['message']}"
         except:
-            error_msg += f": {e.reason}"
+            error_msg += f": {e.response.reason}"
         
         print(f"❌ Erro ao buscar {ticker} ({modulo}): {error_msg}")
         return None
@@ -0,0 +1,373 @@
+# src/provedores_precos.py
+"""
+PROVEDORES DE PREÇOS DIÁRIOS (OHLCV)
+====================================
+
+Abstração da fonte de preços usada pelo armazém local (armazem_precos.py) e pela
+atualização diária (atualizar_precos_diarios.py):
+
+- ProvedorYahoo:   yf.download agrupado (group_by="ticker") em lotes de N símbolos, com
+                   tamanho de lote adaptativo, backoff exponencial e nova tentativa apenas
+                   para os símbolos que falharam.
+- ProvedorFixture: mesmo caminho (lotes/retry/backoff), mas servindo dados locais
+                   (CSV em uma pasta ou série sintética determinística) com latência e
+                   limite de requisição simulados -> benchmark offline.
+
+Todos devolvem {símbolo: DataFrame OHLCV normalizado} (colunas abertura/maxima/minima/
+fechamento/volume, índice diário "Date"); símbolos sem dados ficam de fora.
+Com ProvedorYahoo(ajustado=False) os preços vêm sem ajuste de proventos e o DataFrame traz
+também as colunas de eventos (dividendos, desdobramento) usadas pelo armazém.
+
+BENCHMARK OFFLINE:
+python src/provedores_precos.py --simbolos 300 --lote 50 --latencia 0.05 --limite 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import yfinance as yf
+    HAS_YFINANCE = True
+except ImportError:
+    HAS_YFINANCE = False
+
+
+COLUNAS_OHLCV = ["abertura", "maxima", "minima", "fechamento", "volume"]
+COLUNAS_EVENTOS = ["dividendos", "desdobramento"]
+
+
+# ======================================================================================
+# UTILITÁRIOS
+# ======================================================================================
+
+def ticker_armazem(ticker: str) -> str:
+    """Chave do ticker (código B3 sem .SA; Ibovespa = IBOV)."""
+    t = str(ticker).upper().strip()
+    if t in ("^BVSP", "IBOV"):
+        return "IBOV"
+    return t[:-3] if t.endswith(".SA") else t
+
+
+def simbolo_yahoo(ticker: str) -> str:
+    """Símbolo do Yahoo Finance para o ticker."""
+    t = ticker_armazem(ticker)
+    return "^BVSP" if t == "IBOV" else f"{t}.SA"
+
+
+def normalizar_ohlcv(hist: Optional[pd.DataFrame], simbolo: str) -> pd.DataFrame:
+    """
+    Normaliza o retorno do yfinance para colunas abertura/maxima/minima/fechamento/volume,
+    índice diário sem fuso (nome "Date") e apenas linhas com fechamento válido.
+
+    Aceita colunas simples ou MultiIndex (dependendo da versão do yfinance / group_by).
+    """
+    vazio = pd.DataFrame(columns=COLUNAS_OHLCV, index=pd.DatetimeIndex([], name="Date"))
+    if hist is None or not isinstance(hist, pd.DataFrame) or hist.empty:
+        return vazio
+
+    if isinstance(hist.columns, pd.MultiIndex):
+        for lvl in range(hist.columns.nlevels):
+            if simbolo in set(hist.columns.get_level_values(lvl)):
+                hist = hist.xs(simbolo, level=lvl, axis=1)
+                break
+
+        if isinstance(hist.columns, pd.MultiIndex):
+            # Símbolo não encontrado: só aproveita se o outro nível tiver um único símbolo
+            niveis = range(hist.columns.nlevels)
+            campos = [lvl for lvl in niveis if "Close" in set(hist.columns.get_level_values(lvl))]
+            if not campos or any(
+                len(set(hist.columns.get_level_values(lvl))) > 1 for lvl in niveis if lvl != campos[0]
+            ):
+                return vazio
+            hist = hist.copy()
+            hist.columns = hist.columns.get_level_values(campos[0])
+
+    hist = hist.rename(columns={
+        "Open": "abertura",
+        "High": "maxima",
+        "Low": "minima",
+        "Close": "fechamento",
+        "Volume": "volume",
+        "Dividends": "dividendos",
+        "Stock Splits": "desdobramento",
+    })
+    if "fechamento" not in hist.columns:
+        return vazio
+
+    out = pd.DataFrame(index=hist.index)
+    for col in COLUNAS_OHLCV:
+        out[col] = pd.to_numeric(hist[col], errors="coerce") if col in hist.columns else np.nan
+    for col in COLUNAS_EVENTOS:
+        if col in hist.columns:
+            out[col] = pd.to_numeric(hist[col], errors="coerce").fillna(0.0)
+
+    idx = pd.DatetimeIndex(pd.to_datetime(out.index))
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    out.index = idx.normalize().rename("Date")
+
+    out = out[np.isfinite(out["fechamento"].to_numpy(dtype=float)) & (out["fechamento"] > 0)]
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+
+# ======================================================================================
+# PROVEDORES
+# ======================================================================================
+
+class ProvedorPrecos:
+    """
+    Interface: baixar OHLCV diário de vários símbolos em [inicio, fim).
+
+    `prazo` (segundos) é o orçamento de latência da chamada: estourado, devolve o que já obteve.
+    """
+
+    def baixar(
+        self,
+        simbolos: Iterable[str],
+        inicio: str,
+        fim: Optional[str] = None,
+        prazo: Optional[float] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+
+class ProvedorYahoo(ProvedorPrecos):
+    """
+    yf.download agrupado em lotes.
+
+    - Lote que falha por inteiro (exceção ou nenhum símbolo retornado) indica limite de
+      requisições: o tamanho do lote cai pela metade, o teto (lote_max) cai para 3/4 do
+      lote que falhou e, após espera exponencial (com jitter), o trecho é refeito.
+    - Lote que volta completo faz o tamanho crescer (até o teto).
+    - Símbolos sem dados são tentados de novo nas rodadas seguintes (até `tentativas`).
+    - Com `prazo`, nenhuma requisição começa depois do limite e as esperas são encurtadas
+      para caber nele; o resultado pode vir parcial.
+    - ajustado=False: preços sem ajuste de proventos (o Yahoo ainda os corrige por
+      desdobramento) mais as colunas de eventos; o armazém desfaz os desdobramentos e
+      aplica os ajustes localmente.
+    """
+
+    def __init__(
+        self,
+        lote: int = 50,
+        lote_min: int = 5,
+        lote_max: int = 100,
+        tentativas: int = 3,
+        espera_base: float = 2.0,
+        espera_max: float = 60.0,
+        dormir: Callable[[float], None] = time.sleep,
+        ajustado: bool = True,
+    ):
+        self.lote = lote
+        self.lote_min = lote_min
+        self.lote_max = lote_max
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.dormir = dormir
+        self.ajustado = ajustado
+        self.estatisticas: Dict[str, float] = {"requisicoes": 0, "falhas_lote": 0, "espera_total": 0.0}
+
+    def _download(self, simbolos: List[str], inicio: str, fim: Optional[str]) -> pd.DataFrame:
+        """Uma requisição agrupada ao Yahoo (sobrescrito pelo ProvedorFixture)."""
+        if not HAS_YFINANCE:
+            raise RuntimeError("yfinance não instalado")
+        return yf.download(
+            simbolos,
+            start=inicio,
+            end=fim,
+            progress=False,
+            auto_adjust=self.ajustado,
+            actions=not self.ajustado,  # sem ajuste: traz Dividends / Stock Splits
+            group_by="ticker",
+            threads=True,
+        )
+
+    def _esperar(self, tentativa: int, limite: Optional[float] = None) -> None:
+        segundos = min(self.espera_max, self.espera_base * (2 ** tentativa)) * (1.0 + 0.25 * random.random())
+        if limite is not None:
+            segundos = max(0.0, min(segundos, limite - time.monotonic()))
+        self.estatisticas["espera_total"] += segundos
+        self.dormir(segundos)
+
+    def baixar(
+        self,
+        simbolos: Iterable[str],
+        inicio: str,
+        fim: Optional[str] = None,
+        prazo: Optional[float] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        fim = fim or (date.today() + timedelta(days=1)).isoformat()
+        limite = None if prazo is None else time.monotonic() + prazo
+        pendentes = list(dict.fromkeys(simbolos))
+        resultado: Dict[str, pd.DataFrame] = {}
+
+        for tentativa in range(self.tentativas):
+            if not pendentes:
+                break
+            if tentativa > 0:
+                self._esperar(tentativa - 1, limite)
+
+            falhas: List[str] = []
+            i = 0
+            while i < len(pendentes):
+                if limite is not None and time.monotonic() >= limite:
+                    self.estatisticas["prazo_esgotado"] = 1
+                    print(f"  ⏱️  Prazo de {prazo:g}s esgotado: {len(pendentes) - i + len(falhas)} símbolo(s) sem dados")
+                    return resultado
+
+                lote = pendentes[i:i + self.lote]
+
+                self.estatisticas["requisicoes"] += 1
+                try:
+                    data = self._download(lote, inicio, fim)
+                    erro = False
+                except Exception as e:
+                    print(f"  ⚠️  Falha no lote de {len(lote)} símbolo(s): {type(e).__name__}: {str(e)[:80]}")
+                    data, erro = None, True
+
+                obtidos = 0
+                for sym in lote:
+                    df = normalizar_ohlcv(data, sym) if data is not None else None
+                    if df is None or df.empty:
+                        falhas.append(sym)
+                    else:
+                        resultado[sym] = df
+                        obtidos += 1
+
+                if erro or (obtidos == 0 and len(lote) > 1):
+                    # Provável limite de requisições: o teto cai para 3/4 deste lote,
+                    # o lote cai pela metade e, após a espera, o mesmo trecho é refeito
+                    self.estatisticas["falhas_lote"] += 1
+                    self.lote_max = max(self.lote_min, min(self.lote_max, len(lote) * 3 // 4))
+                    if len(lote) > self.lote_min:
+                        self.lote = max(self.lote_min, min(self.lote_max, len(lote) // 2))
+                        del falhas[len(falhas) - len(lote):]
+                        self._esperar(tentativa, limite)
+                        continue
+                    self._esperar(tentativa, limite)
+                elif obtidos == len(lote):
+                    self.lote = min(self.lote_max, self.lote + max(1, self.lote // 2))
+                i += len(lote)
+
+            pendentes = falhas
+
+        return resultado
+
+
+class ProvedorFixture(ProvedorYahoo):
+    """
+    Provedor offline para testes/benchmark: mesmo fluxo de lotes do ProvedorYahoo, mas
+    o "download" lê <pasta>/<SÍMBOLO>.csv (Date,Open,High,Low,Close,Volume) ou gera uma
+    série sintética determinística (passeio aleatório semeado pelo símbolo).
+
+    Args:
+        pasta: Pasta com CSVs (opcional)
+        latencia_requisicao: Segundos por requisição (simula o round-trip HTTP)
+        latencia_simbolo: Segundos adicionais por símbolo no lote
+        limite_simbolos: Lotes maiores que isso falham (simula o rate limit)
+        ausentes: Símbolos sem dados (simula ticker deslistado)
+    """
+
+    def __init__(
+        self,
+        pasta: Optional[Path] = None,
+        latencia_requisicao: float = 0.0,
+        latencia_simbolo: float = 0.0,
+        limite_simbolos: Optional[int] = None,
+        ausentes: Iterable[str] = (),
+        **kwargs,
+    ):
+        kwargs.setdefault("espera_base", 0.0)
+        super().__init__(**kwargs)
+        self.pasta = Path(pasta) if pasta is not None else None
+        self.latencia_requisicao = latencia_requisicao
+        self.latencia_simbolo = latencia_simbolo
+        self.limite_simbolos = limite_simbolos
+        self.ausentes = set(ausentes)
+        self._calendario: Optional[pd.DatetimeIndex] = None
+
+    def _serie(self, simbolo: str) -> pd.DataFrame:
+        if self.pasta is not None:
+            arq = self.pasta / f"{simbolo}.csv"
+            if arq.exists():
+                return pd.read_csv(arq, index_col=0, parse_dates=True)
+
+        if self._calendario is None:
+            self._calendario = pd.bdate_range("2005-01-03", date.today())
+        idx = self._calendario
+        rng = np.random.default_rng(zlib.crc32(simbolo.encode("utf-8")))
+        fechamento = 10.0 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(idx))))
+        return pd.DataFrame({
+            "Open": fechamento * (1 + rng.normal(0, 0.005, len(idx))),
+            "High": fechamento * 1.01,
+            "Low": fechamento * 0.99,
+            "Close": fechamento,
+            "Volume": rng.integers(1e4, 1e7, len(idx)),
+        }, index=idx)
+
+    def _download(self, simbolos: List[str], inicio: str, fim: Optional[str]) -> pd.DataFrame:
+        if self.latencia_requisicao or self.latencia_simbolo:
+            time.sleep(self.latencia_requisicao + self.latencia_simbolo * len(simbolos))
+        if self.limite_simbolos is not None and len(simbolos) > self.limite_simbolos:
+            raise RuntimeError("Too Many Requests (simulado)")
+
+        partes = {}
+        for sym in simbolos:
+            if sym in self.ausentes:
+                continue
+            df = self._serie(sym)
+            partes[sym] = df[(df.index >= pd.Timestamp(inicio)) & (df.index < pd.Timestamp(fim))]
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes, axis=1)
+
+
+# ======================================================================================
+# BENCHMARK
+# ======================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do download agrupado de preços")
+    parser.add_argument("--simbolos", type=int, default=300, help="Quantidade de símbolos sintéticos")
+    parser.add_argument("--lote", type=int, default=50, help="Tamanho inicial do lote")
+    parser.add_argument("--dias", type=int, default=10, help="Janela de download (dias corridos)")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência por requisição (s)")
+    parser.add_argument("--limite", type=int, default=0, help="Rate limit simulado (símbolos/lote; 0 = sem)")
+    parser.add_argument("--ausentes", type=int, default=0, help="Quantidade de símbolos sem dados")
+    args = parser.parse_args()
+
+    simbolos = [f"SIM{i:04d}.SA" for i in range(args.simbolos)]
+    inicio = (date.today() - timedelta(days=args.dias)).isoformat()
+
+    provedor = ProvedorFixture(
+        latencia_requisicao=args.latencia,
+        limite_simbolos=args.limite or None,
+        ausentes=simbolos[:args.ausentes],
+        lote=args.lote,
+    )
+    t0 = time.perf_counter()
+    dados = provedor.baixar(simbolos, inicio)
+    dt = time.perf_counter() - t0
+
+    print(f"\n>>> BENCHMARK: {len(dados)}/{len(simbolos)} símbolos em {dt:.2f}s <<<")
+    print(f"Requisições: {provedor.estatisticas['requisicoes']} | "
+          f"lotes com falha: {provedor.estatisticas['falhas_lote']} | "
+          f"lote final: {provedor.lote}")
+
+    individual = args.simbolos * args.latencia
+    print(f"Referência (1 requisição por símbolo): ~{individual:.2f}s de latência\n")
+
+
+if __name__ == "__main__":
+    main()
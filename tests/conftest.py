@@ -0,0 +1,7 @@
+# tests/conftest.py
+"""Os scripts de src/ importam uns aos outros pelo nome do módulo (sem pacote)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,164 @@
+# tests/test_armazem_precos.py
+"""Armazém de preços: base negociada, ajuste local por eventos e atualização incremental."""
+
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from armazem_precos import ArmazemPrecos, desfazer_desdobramentos, fatores_ajuste, precos_asof
+from provedores_precos import ProvedorPrecos
+
+DATAS = pd.bdate_range("2024-01-02", periods=35, name="Date")
+EX_DESDOBRAMENTO = 10   # desdobramento 2:1 a partir deste pregão
+DATA_COM = 19           # dividendo de R$ 1,00 com data COM neste pregão (ex-data no dia seguinte)
+
+
+def _bruto(n: int = len(DATAS)) -> pd.DataFrame:
+    """Série como negociada: preço cai pela metade e volume dobra no desdobramento."""
+    i = np.arange(n)
+    fech = np.where(i < EX_DESDOBRAMENTO, 40.0, 20.0) + 0.1 * i
+    return pd.DataFrame(
+        {"abertura": fech, "maxima": fech + 0.5, "minima": fech - 0.5, "fechamento": fech,
+         "volume": np.where(i < EX_DESDOBRAMENTO, 1000.0, 2000.0)},
+        index=DATAS[:n],
+    )
+
+
+def _yahoo(bruto: pd.DataFrame) -> pd.DataFrame:
+    """Download sem ajuste de proventos do Yahoo: já corrigido pelo desdobramento."""
+    df = bruto.copy()
+    antes = np.arange(len(df)) < EX_DESDOBRAMENTO
+    for col in ("abertura", "maxima", "minima", "fechamento"):
+        df.loc[antes, col] = df.loc[antes, col] / 2
+    df.loc[antes, "volume"] = df.loc[antes, "volume"] * 2
+    df["dividendos"] = 0.0
+    df["desdobramento"] = 0.0
+    if len(df) > EX_DESDOBRAMENTO:
+        df.iloc[EX_DESDOBRAMENTO, df.columns.get_loc("desdobramento")] = 2.0
+    return df
+
+
+class ProvedorFalso(ProvedorPrecos):
+    def __init__(self, series):
+        self.series = series
+        self.inicios = []
+
+    def baixar(self, simbolos, inicio, fim=None, prazo=None):
+        self.inicios.append(inicio)
+        return {s: self.series[s][self.series[s].index >= pd.Timestamp(inicio)]
+                for s in simbolos if s in self.series}
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    provedor = ProvedorFalso({"TEST3.SA": _yahoo(_bruto(30))})
+    return ArmazemPrecos(tmp_path / "precos.sqlite", inicio="2024-01-01", provedor=provedor)
+
+
+def test_desfazer_desdobramentos_volta_a_base_negociada():
+    bruto, eventos = desfazer_desdobramentos(_yahoo(_bruto()))
+
+    pd.testing.assert_frame_equal(bruto, _bruto(), check_freq=False)
+    assert eventos == [(DATAS[EX_DESDOBRAMENTO].strftime("%Y-%m-%d"), "desdobramento", 2.0)]
+
+
+def test_fatores_ajuste_dividendo_e_desdobramento():
+    bruto = _bruto()
+    ex_div = DATAS[DATA_COM + 1]
+    eventos = pd.DataFrame({
+        "data": [DATAS[EX_DESDOBRAMENTO].strftime("%Y-%m-%d"), ex_div.strftime("%Y-%m-%d"), "2030-01-02"],
+        "tipo": ["desdobramento", "dividendo", "dividendo"],
+        "valor": [2.0, 1.0, 5.0],
+    })
+
+    preco, volume = fatores_ajuste(DATAS, bruto["fechamento"].to_numpy(), eventos)
+
+    f_div = 1 - 1.0 / bruto["fechamento"].iloc[DATA_COM]
+    esperado = np.where(np.arange(len(DATAS)) < EX_DESDOBRAMENTO, 0.5, 1.0) * \
+        np.where(np.arange(len(DATAS)) <= DATA_COM, f_div, 1.0)
+    np.testing.assert_allclose(preco, esperado)
+    np.testing.assert_allclose(volume, np.where(np.arange(len(DATAS)) < EX_DESDOBRAMENTO, 2.0, 1.0))
+
+
+def test_grava_bruto_e_le_ajustado(armazem):
+    armazem.atualizar("TEST3")
+
+    pd.testing.assert_frame_equal(armazem.historico("TEST3", ajustado=False), _bruto(30), check_freq=False)
+    ajustado = armazem.historico("TEST3")
+    np.testing.assert_allclose(ajustado["fechamento"], _yahoo(_bruto(30))["fechamento"])
+    np.testing.assert_allclose(ajustado["volume"], _yahoo(_bruto(30))["volume"])
+    assert armazem.ultimo_fechamento("TEST3")["fechamento"] == pytest.approx(_bruto(30)["fechamento"].iloc[-1])
+
+
+def test_proventos_b3_ajustam_sem_rede(armazem, tmp_path):
+    armazem.atualizar("TEST3")
+    pasta = tmp_path / "balancos" / "TEST3"
+    pasta.mkdir(parents=True)
+    data_com = DATAS[DATA_COM].strftime("%Y-%m-%d")
+    (pasta / "dividendos_detalhado.json").write_text(json.dumps({
+        "ticker": "TEST3",
+        # ON e PN do mesmo evento: vale o maior valor, uma vez
+        "dividendos": [{"data_com": data_com, "valor": 1.0, "tipo": "Dividendo"},
+                       {"data_com": data_com, "valor": 0.8, "tipo": "Dividendo"}],
+    }))
+
+    assert armazem.importar_proventos(tmp_path / "balancos") == {"TEST3": 1}
+    chamadas = len(armazem.provedor.inicios)
+
+    fech = armazem.historico("TEST3")["fechamento"].to_numpy()
+    split = _yahoo(_bruto(30))["fechamento"].to_numpy()
+    f_div = 1 - 1.0 / _bruto(30)["fechamento"].iloc[DATA_COM]
+    np.testing.assert_allclose(fech[:DATA_COM + 1], split[:DATA_COM + 1] * f_div)
+    np.testing.assert_allclose(fech[DATA_COM + 1:], split[DATA_COM + 1:])
+    assert len(armazem.provedor.inicios) == chamadas
+
+
+def test_atualizacao_incremental_baixa_so_a_sobreposicao(armazem):
+    armazem.atualizar("TEST3")
+    assert armazem.atualizar("TEST3")["baixado"] is False   # já verificado hoje
+
+    armazem.provedor.series["TEST3.SA"] = _yahoo(_bruto())
+    status = armazem.atualizar("TEST3", forcar=True)
+
+    assert status == {"ticker": "TEST3", "baixado": True, "novos": 5, "reajustado": False}
+    assert armazem.provedor.inicios[-1] == (DATAS[29] - pd.Timedelta(days=10)).strftime("%Y-%m-%d")
+    assert armazem.marca_dagua("TEST3") == DATAS[-1].strftime("%Y-%m-%d")
+    pd.testing.assert_frame_equal(armazem.historico("TEST3", ajustado=False), _bruto(), check_freq=False)
+
+
+def test_divergencia_na_sobreposicao_refaz_o_historico(armazem):
+    armazem.atualizar("TEST3")
+    corrigido = _bruto()
+    corrigido.iloc[:, :4] *= 1.01
+    armazem.provedor.series["TEST3.SA"] = _yahoo(corrigido)
+
+    status = armazem.atualizar("TEST3", forcar=True)
+
+    assert status["reajustado"] is True
+    pd.testing.assert_frame_equal(armazem.historico("TEST3", ajustado=False), corrigido, check_freq=False)
+    with sqlite3.connect(armazem.caminho) as con:
+        assert con.execute("SELECT COUNT(*) FROM reajustes").fetchone()[0] == 1
+
+
+def test_matriz_e_precos_em_datas(armazem):
+    armazem.atualizar("TEST3")
+    ajustado = armazem.historico("TEST3")["fechamento"]
+
+    matriz = armazem.matriz_fechamentos(["TEST3"])
+    np.testing.assert_allclose(matriz["TEST3"].to_numpy(), ajustado.to_numpy())
+
+    # Sábado pega a sexta; data anterior ao histórico não tem preço
+    sabado = DATAS[3] + pd.Timedelta(days=1)   # 2024-01-06
+    precos = armazem.precos_em_datas("TEST3", [sabado, pd.Timestamp("2023-06-30")], max_dias=5)
+    assert precos[0] == pytest.approx(ajustado.loc[DATAS[3]])
+    assert np.isnan(precos[1])
+
+
+def test_precos_asof_respeita_janela():
+    serie = pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-02", "2024-01-10"]))
+    out = precos_asof(serie, pd.to_datetime(["2024-01-01", "2024-01-05", "2024-01-09", "2024-01-11"]), max_dias=3)
+
+    np.testing.assert_allclose(out, [np.nan, 1.0, np.nan, 2.0])
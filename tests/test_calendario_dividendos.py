@@ -0,0 +1,110 @@
+# tests/test_calendario_dividendos.py
+"""Calendário de proventos indexado por data (buscas binárias) contra a varredura direta."""
+
+import json
+
+import pytest
+
+from calendario_dividendos import CalendarioTicker, CalendarioUniverso, salvar_calendario
+
+EVENTOS = [
+    {"data_com": "2024-03-15", "tipo": "Dividendo", "valor": 0.50, "data_pagamento": "2024-04-01"},
+    # ON e PN do mesmo evento: vale o maior valor
+    {"data_com": "2024-03-15", "tipo": "Dividendo", "valor": 0.55},
+    {"data_com": "2024-03-15", "tipo": "JCP", "valor": 0.20},
+    {"data_com": "2024-09-10T00:00:00", "tipo": "Dividendo", "valor": 1.00},
+    {"data_com": "2025-03-14", "tipo": "Dividendo", "valor": 0.70},
+    # inválidos: sem data, data ilegível, valor não numérico
+    {"data_com": None, "tipo": "Dividendo", "valor": 9.0},
+    {"data_com": "31/12/2024", "tipo": "Dividendo", "valor": 9.0},
+    {"data_com": "2024-12-01", "tipo": "Dividendo", "valor": "9"},
+]
+
+
+def _soma_direta(inicio: str, fim: str) -> float:
+    """Referência: varredura com o mesmo critério (um evento por data COM e tipo, maior valor)."""
+    por_evento = {}
+    for ev in EVENTOS:
+        data = str(ev["data_com"] or "")[:10]
+        if len(data) == 10 and data[4] == "-" and isinstance(ev["valor"], (int, float)):
+            chave = (data, ev["tipo"])
+            por_evento[chave] = max(por_evento.get(chave, 0.0), ev["valor"])
+    return sum(v for (d, _), v in por_evento.items() if inicio < d <= fim)
+
+
+def test_eventos_deduplicados_e_invalidos_descartados():
+    cal = CalendarioTicker(EVENTOS)
+
+    assert len(cal) == 4
+    assert cal.valores.tolist() == [0.55, 0.20, 1.00, 0.70]
+
+
+@pytest.mark.parametrize("inicio,fim", [
+    ("2024-01-01", "2024-12-31"),
+    ("2024-03-15", "2025-03-14"),   # início exclusivo, fim inclusivo
+    ("2024-03-14", "2024-03-15"),
+    ("2025-03-14", "2026-01-01"),
+    ("2020-01-01", "2020-12-31"),
+])
+def test_soma_igual_a_varredura(inicio, fim):
+    assert CalendarioTicker(EVENTOS).soma(inicio, fim) == pytest.approx(_soma_direta(inicio, fim))
+
+
+def test_ltm_e_proxima_data_com():
+    cal = CalendarioTicker(EVENTOS)
+
+    # janela de 365 dias: (2024-03-14, 2025-03-14] ainda pega o evento de 2024-03-15
+    assert cal.ltm("2025-03-14") == pytest.approx(2.45)
+    assert cal.ltm("2025-03-16") == pytest.approx(1.70)
+    assert cal.proxima_data_com("2024-09-10") == "2024-09-10"
+    assert cal.proxima_data_com("2024-09-11") == "2025-03-14"
+    assert cal.proxima_data_com("2025-03-15") is None
+
+
+def test_calendario_vazio():
+    cal = CalendarioTicker([])
+
+    assert len(cal) == 0
+    assert cal.ltm("2025-01-01") == 0.0
+    assert cal.proxima_data_com("2025-01-01") is None
+
+
+def _universo():
+    eventos = [dict(ev, ticker=t) for t in ("BBAS3", "ABEV3") for ev in EVENTOS]
+    return CalendarioUniverso(eventos + [{"data_com": "2024-05-01", "valor": 1.0}])  # sem ticker
+
+
+def test_universo_ordenado_com_indice_por_mes():
+    uni = _universo()
+
+    datas = [ev["data_com"] for ev in uni.eventos]
+    assert datas == sorted(datas)
+    assert [ev["ticker"] for ev in uni.do_mes("2024-09")] == ["ABEV3", "BBAS3"]
+    assert uni.do_mes("2024-01") == []
+    assert uni.entre("2024-03-15", "2024-09-10") == [ev for ev in uni.eventos if "2024-03-15" <= ev["data_com"] <= "2024-09-10"]
+    assert len(uni.proximos(dias=30, hoje="2025-03-01")) == 2
+
+
+def test_indice_do_site_comeca_no_mes_corrente():
+    indice = _universo().gerar_indice(hoje="2024-09-20")
+
+    # o universo não deduplica nem filtra valor: é a vitrine dos eventos como informados
+    assert indice["total_eventos"] == 6
+    assert indice["meses"] == {"2024-09": [0, 2], "2024-12": [2, 4], "2025-03": [4, 6]}
+    assert all(ev["data_com"] >= "2024-09-01" for ev in indice["eventos"])
+
+
+def test_salvar_ignora_mudanca_so_no_carimbo(tmp_path):
+    agenda = tmp_path / "agenda.json"
+    agenda.write_text(json.dumps({"dividendos": [dict(ev, ticker="BBAS3") for ev in EVENTOS[:5]]}))
+    saida = tmp_path / "calendario.json"
+
+    _, _, gravou = salvar_calendario(agenda, saida)
+    anterior = json.loads(saida.read_text())
+    anterior["ultima_atualizacao"] = "2000-01-01T00:00:00"
+    saida.write_text(json.dumps(anterior))
+
+    _, _, gravou_de_novo = salvar_calendario(agenda, saida)
+
+    assert gravou and not gravou_de_novo
+    assert json.loads(saida.read_text())["ultima_atualizacao"] == "2000-01-01T00:00:00"
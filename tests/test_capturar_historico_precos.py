@@ -0,0 +1,70 @@
+# tests/test_capturar_historico_precos.py
+"""Modo incremental do histórico de preços contra a reconstrução completa."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import capturar_historico_precos as chp
+
+
+def _ohlcv(n: int = 600, semente: int = 1) -> pd.DataFrame:
+    datas = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n, name="Date")
+    fech = 20 + np.cumsum(np.random.default_rng(semente).normal(0, 0.3, n))
+    return pd.DataFrame(
+        {"abertura": fech, "maxima": fech + 0.1, "minima": fech - 0.1, "fechamento": fech, "volume": 1000},
+        index=datas,
+    )
+
+
+def _completo(df: pd.DataFrame, anos: int) -> dict:
+    """Mesmo caminho do modo completo: janela de `anos`, médias móveis e JSON (ida e volta em disco)."""
+    df = df[df.index >= pd.Timestamp(chp._inicio_janela(anos).date())]
+    return json.loads(json.dumps(chp.df_para_json(chp.calcular_medias_moveis(df), "TESTE")))
+
+
+@pytest.mark.parametrize("anos_base", [1, 2])
+def test_incremental_igual_reconstrucao_completa(anos_base):
+    df = _ohlcv()
+    salvo = _completo(df.iloc[:-10], anos_base)
+
+    novo = chp.atualizar_json_incremental(salvo, df.iloc[-20:], anos=1)
+    referencia = _completo(df, 1)
+
+    assert {k: v for k, v in novo.items() if k != "ultima_atualizacao"} == \
+        {k: v for k, v in referencia.items() if k != "ultima_atualizacao"}
+    assert len(novo["estado"]["fechamentos"]) == max(chp.PERIODOS_MM) - 1
+
+
+def test_sem_pregoes_novos_devolve_o_mesmo_json():
+    df = _ohlcv()
+    salvo = _completo(df, 1)
+
+    assert chp.atualizar_json_incremental(salvo, df.iloc[-10:], anos=1) is salvo
+
+
+def test_lacuna_exige_reconstrucao():
+    df = _ohlcv()
+    salvo = _completo(df.iloc[:-30], 1)
+
+    # Primeiro pregão baixado depois dos últimos salvos: sem sobreposição
+    assert chp.atualizar_json_incremental(salvo, df.iloc[-10:], anos=1) is None
+
+
+def test_reajuste_de_precos_exige_reconstrucao():
+    df = _ohlcv()
+    salvo = _completo(df.iloc[:-5], 1)
+    reajustado = df.iloc[-15:].copy()
+    reajustado["fechamento"] *= 0.97
+
+    assert chp.atualizar_json_incremental(salvo, reajustado, anos=1) is None
+
+
+def test_sem_estado_exige_reconstrucao():
+    df = _ohlcv()
+    salvo = _completo(df.iloc[:-5], 1)
+    del salvo["estado"]
+
+    assert chp.atualizar_json_incremental(salvo, df.iloc[-15:], anos=1) is None
@@ -0,0 +1,148 @@
+# tests/test_cliente_http.py
+"""ClienteHTTP sem rede: um adaptador falso responde no lugar do servidor."""
+
+from typing import List
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+import cliente_http
+from cliente_http import ClienteHTTP, ErroReproducao, LimitadorTaxa, MODO_GRAVAR, MODO_REPRODUZIR
+
+
+class AdaptadorFalso(BaseAdapter):
+    """Devolve as respostas (status, corpo, cabeçalhos) na ordem e guarda as requisições."""
+
+    def __init__(self, respostas: List[tuple]):
+        super().__init__()
+        self.respostas = list(respostas)
+        self.requisicoes: List[requests.PreparedRequest] = []
+
+    def send(self, request, **kwargs):
+        self.requisicoes.append(request)
+        status, corpo, headers = self.respostas.pop(0)
+        resposta = requests.Response()
+        resposta.status_code = status
+        resposta._content = corpo
+        resposta.headers = CaseInsensitiveDict(headers)
+        resposta.url = request.url
+        resposta.request = request
+        return resposta
+
+    def close(self):
+        pass
+
+
+def _cliente(tmp_path, respostas, **kwargs) -> tuple:
+    cliente = ClienteHTTP(
+        pasta_cache=tmp_path / "cache",
+        pasta_gravacoes=tmp_path / "gravacoes",
+        espera_base=0,
+        dormir=lambda s: None,
+        **kwargs,
+    )
+    adaptador = AdaptadorFalso(respostas)
+    cliente.session.mount("https://", adaptador)
+    return cliente, adaptador
+
+
+URL = "https://exemplo.com.br/arquivo.xls"
+
+
+def test_ttl_explicito_serve_do_cache(tmp_path):
+    cliente, adaptador = _cliente(tmp_path, [(200, b"planilha", {})])
+
+    assert cliente.get(URL, ttl=60).origem == "rede"
+    segunda = cliente.get(URL, ttl=60)
+
+    assert segunda.origem == "cache"
+    assert segunda.content == b"planilha"
+    assert len(adaptador.requisicoes) == 1
+
+
+def test_validar_nao_guarda_resposta_reprovada(tmp_path):
+    respostas = [(200, b"aguarde", {}), (200, b"x" * 2000, {})]
+    cliente, adaptador = _cliente(tmp_path, respostas)
+    valida = lambda r: len(r.content) > 1000
+
+    assert cliente.get(URL, ttl=3600, validar=valida).content == b"aguarde"
+    segunda = cliente.get(URL, ttl=3600, validar=valida)
+
+    assert segunda.origem == "rede"
+    assert len(segunda.content) == 2000
+    assert cliente.get(URL, ttl=3600, validar=valida).origem == "cache"
+    assert len(adaptador.requisicoes) == 2
+
+
+def test_validar_ignora_entrada_reprovada_ja_gravada(tmp_path):
+    cliente, adaptador = _cliente(tmp_path, [(200, b"aguarde", {}), (200, b"x" * 2000, {})])
+    cliente.get(URL, ttl=3600)
+
+    resposta = cliente.get(URL, ttl=3600, validar=lambda r: len(r.content) > 1000)
+
+    assert resposta.origem == "rede"
+    assert len(adaptador.requisicoes) == 2
+
+
+def test_revalidacao_304_reaproveita_corpo(tmp_path):
+    respostas = [(200, b"corpo", {"ETag": '"v1"', "Cache-Control": "no-cache"}), (304, b"", {})]
+    cliente, adaptador = _cliente(tmp_path, respostas)
+
+    cliente.get(URL)
+    segunda = cliente.get(URL)
+
+    assert adaptador.requisicoes[1].headers["If-None-Match"] == '"v1"'
+    assert segunda.origem == "revalidada"
+    assert segunda.content == b"corpo"
+
+
+def test_no_store_nao_entra_no_cache(tmp_path):
+    respostas = [(200, b"a", {"Cache-Control": "no-store, max-age=600"}), (200, b"b", {})]
+    cliente, _ = _cliente(tmp_path, respostas)
+
+    cliente.get(URL)
+
+    assert cliente.get(URL).content == b"b"
+
+
+def test_retry_em_5xx_e_429_reduz_taxa(tmp_path):
+    respostas = [(503, b"", {}), (429, b"", {"Retry-After": "0"}), (200, b"ok", {})]
+    cliente, adaptador = _cliente(tmp_path, respostas)
+    taxa = cliente.limitador("exemplo.com.br").taxa
+
+    resposta = cliente.get(URL)
+
+    assert resposta.status_code == 200
+    assert len(adaptador.requisicoes) == 3
+    assert cliente.estatisticas["retentativas"] == 2
+    assert cliente.limitador("exemplo.com.br").taxa == max(cliente_http.TAXA_MINIMA, taxa / 2)
+
+
+def test_gravar_e_reproduzir_sem_rede(tmp_path):
+    gravador, _ = _cliente(tmp_path, [(404, b"nada", {})], modo=MODO_GRAVAR)
+    gravador.post(URL, data={"a": 1})
+
+    reprodutor, adaptador = _cliente(tmp_path, [], modo=MODO_REPRODUZIR)
+    resposta = reprodutor.post(URL, data={"a": 1})
+
+    assert (resposta.status_code, resposta.content, resposta.origem) == (404, b"nada", "reproduzida")
+    assert adaptador.requisicoes == []
+    with pytest.raises(ErroReproducao):
+        reprodutor.post(URL, data={"a": 2})
+
+
+def test_limitador_espera_quando_balde_vazio():
+    agora = [0.0]
+    esperas = []
+
+    def dormir(s):
+        esperas.append(s)
+        agora[0] += s
+
+    limitador = LimitadorTaxa(taxa=2.0, capacidade=1, relogio=lambda: agora[0], dormir=dormir)
+
+    assert limitador.adquirir() == 0.0
+    assert limitador.adquirir() == pytest.approx(0.5)
+    assert esperas == [pytest.approx(0.5)]